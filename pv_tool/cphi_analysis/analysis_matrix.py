@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+from typing import Optional, List, TYPE_CHECKING
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+from scipy.stats import norm
+
+from pv_tool.cphi_analysis.globals import TEXTUAL_NAMES, TEXTUAL_NAMES_DSS
+from pv_tool.cphi_analysis.sufficient_statistics import t_quantile
+
+if TYPE_CHECKING:
+    from pv_tool.imports.import_data import Dbase
+
+# Proeftype -> (ALG-vlag in de Dbase, kolommen per rekniveau)
+TEST_TYPES = {
+    'TXT': ('ALG__TRIAXIAAL', TEXTUAL_NAMES),
+    'DSS': ('ALG__DSS', TEXTUAL_NAMES_DSS),
+}
+ANALYSES = ['CPhi', 'SH']
+KEY_COLUMNS = ['PV_NAAM', 'PV_TYPE_PROEF', 'PV_REK']
+MATRIX_COLUMNS = ['PV_NAAM', 'PV_TYPE_PROEF', 'PV_REK', 'PV_ANALYSE', 'AANTAL',
+                  'A1_GEM', 'A2_GEM', 'SIGMA_A1', 'SIGMA_A2', 'RHO_A1_A2', 'A1_KAR', 'A2_KAR',
+                  'TAN_PHI_GEM', 'PHI_GEM', 'C_GEM', 'TAN_PHI_KAR', 'PHI_KAR', 'C_KAR',
+                  'TAN_PHI_D', 'PHI_D', 'C_D', 'PHI_SD_DSTAB', 'COH_SD_DSTAB']
+
+
+def _long_data(dbase_df: DataFrame, groups: Optional[List[str]], effective_stresses: Optional[List[str]],
+               test_types: List[str]) -> DataFrame:
+    """Zet alle (S', T)-paren van alle proeftypes en rekniveaus onder elkaar, met de sleutelkolommen erbij."""
+    frames = []
+    for test_type in test_types:
+        flag, columns_per_level = TEST_TYPES[test_type]
+        selection = dbase_df[dbase_df[flag].fillna(False).astype(bool)] if flag in dbase_df.columns else dbase_df[[]]
+        if groups is not None:
+            selection = selection[selection['PV_NAAM'].isin(groups)]
+        for level, (_, s_column, t_column) in columns_per_level.items():
+            if effective_stresses is not None and level not in effective_stresses:
+                continue
+            if s_column not in selection.columns or t_column not in selection.columns:
+                continue
+            frames.append(DataFrame({
+                'PV_NAAM': selection['PV_NAAM'].to_numpy(),
+                'PV_TYPE_PROEF': test_type,
+                'PV_REK': level,
+                'S': pd.to_numeric(selection[s_column], errors='coerce').to_numpy(dtype=float),
+                'T': pd.to_numeric(selection[t_column], errors='coerce').to_numpy(dtype=float),
+            }))
+    if not frames:
+        return DataFrame(columns=KEY_COLUMNS + ['S', 'T'])
+    long_df = pd.concat(frames, ignore_index=True)
+    return long_df[long_df['PV_NAAM'].notna() & long_df['S'].notna() & long_df['T'].notna()]
+
+
+def _t_quantiles(q: float, degrees_of_freedom: np.ndarray) -> np.ndarray:
+    """t_quantile voor een array vrijheidsgraden (één scipy-aanroep per unieke waarde)."""
+    values = np.full(len(degrees_of_freedom), np.nan)
+    valid = degrees_of_freedom > 0
+    unique, inverse = np.unique(degrees_of_freedom[valid], return_inverse=True)
+    values[valid] = np.array([t_quantile(q, dof) for dof in unique])[inverse]
+    return values
+
+
+def _st_dev(mean: np.ndarray, design: np.ndarray) -> np.ndarray:
+    """Standaarddeviatie voor D-stability uit verwachtingswaarde en rekenwaarde (zie calc_st_dev_phi)."""
+    z = norm.ppf(0.05) * 2
+    with np.errstate(invalid='ignore', divide='ignore', over='ignore'):
+        root = np.sqrt(z ** 2 + 8 * (np.log(mean) - np.log(design)))
+        return mean * np.sqrt(np.exp(((z + root) / 2) ** 2) - 1)
+
+
+def batched_cphi_results(stats: DataFrame, alpha, material_cohesie, material_tan_phi) -> DataFrame:
+    """
+    De c-phi regressie (eerste benadering, zonder handmatige waarden) voor alle rijen van stats tegelijk.
+
+    Iedere rij van stats beschrijft één dataset met de kolommen PV_TYPE_PROEF, n, sum_x, sum_y, min_x, max_x en de
+    gecentreerde sommen s_tt, s_ty en s_yy; bijvoorbeeld één groep (analysis_matrix) of één resample (bootstrap).
+    alpha en de materiaalfactoren zijn een getal of een array met één waarde per rij (sensitivity_sweep).
+    """
+    n = stats['n'].to_numpy(dtype=float)
+    alpha = np.broadcast_to(np.asarray(alpha, dtype=float), n.shape)
+    sum_x, sum_y = stats['sum_x'].to_numpy(), stats['sum_y'].to_numpy()
+    s_tt, s_ty, s_yy = stats['s_tt'].to_numpy(), stats['s_ty'].to_numpy(), stats['s_yy'].to_numpy()
+    with np.errstate(invalid='ignore', divide='ignore'):
+        e_a2 = s_ty / s_tt
+        e_a1 = (sum_y - sum_x * e_a2) / n
+        kappa_2 = np.maximum(s_yy - e_a2 * s_ty, 0.0)
+        var_a2 = (1 / s_tt) * kappa_2 / (n - 2)
+        var_a1 = 1 / n * (1 + sum_x ** 2 / (n * s_tt)) * kappa_2 / (n - 2)
+        cov_a1_a2 = -(sum_x / (n * s_tt)) * kappa_2 / (n - 2)
+        rho = cov_a1_a2 / np.sqrt(var_a2 * var_a1)
+        sigma_a1, sigma_a2 = np.sqrt(var_a1), np.sqrt(var_a2)
+        t_n_2 = _t_quantiles(1 - 0.1 / 2, n - 2)
+
+        # s'-raster per groep (gelijke stappen tussen min en max S') als rijen van een gemaskeerde matrix
+        width = int(n.max()) if len(n) else 0
+        positions = np.arange(width)
+        mask = positions[np.newaxis, :] < n[:, np.newaxis]
+        step = (stats['max_x'].to_numpy() - stats['min_x'].to_numpy()) / (n - 1)
+        steps = np.where(positions[np.newaxis, :] == 0, stats['min_x'].to_numpy()[:, np.newaxis], step[:, np.newaxis])
+        grid = np.where(mask, np.cumsum(steps, axis=1), 0.0)
+
+        ondergrens = (e_a1[:, None] + e_a2[:, None] * grid - t_n_2[:, None] *
+                      (sigma_a1[:, None] ** 2 + grid ** 2 * sigma_a2[:, None] ** 2 +
+                       2 * rho[:, None] * grid * sigma_a1[:, None] * sigma_a2[:, None] +
+                       (1.0 - alpha[:, None]) * (kappa_2[:, None] / (n[:, None] - 2))) ** 0.5)
+        ondergrens = np.where(mask, ondergrens, 0.0)
+        mean_grid = grid.sum(axis=1) / n
+        centred = np.where(mask, grid - mean_grid[:, None], 0.0)
+        a2_kar = (centred * ondergrens).sum(axis=1) / (centred ** 2).sum(axis=1)
+        a1_kar = (ondergrens.sum(axis=1) - grid.sum(axis=1) * a2_kar) / n
+
+    is_txt = (stats['PV_TYPE_PROEF'] == 'TXT').to_numpy()
+    with np.errstate(invalid='ignore', divide='ignore'):
+        factor_gem = np.where(is_txt, 1 / np.sqrt(1 - e_a2 ** 2), 1.0)
+        factor_kar = np.where(is_txt, 1 / np.sqrt(1 - a2_kar ** 2), 1.0)
+    tan_phi_gem, c_gem = e_a2 * factor_gem, e_a1 * factor_gem
+    tan_phi_kar, c_kar = a2_kar * factor_kar, a1_kar * factor_kar
+    tan_phi_d, c_d = tan_phi_kar / material_tan_phi, c_kar / material_cohesie
+    phi_gem, phi_d = np.degrees(np.arctan(tan_phi_gem)), np.degrees(np.arctan(tan_phi_d))
+
+    # Zoals calc_st_dev_phi (ongeldig bij phi <= 0) en calc_st_dev_c (c <= 0 wordt 0.01)
+    phi_sd = np.where((phi_gem > 0) & (phi_d > 0), _st_dev(phi_gem, phi_d), np.nan)
+    coh_sd = _st_dev(np.where(c_gem <= 0, 0.01, c_gem), np.where(c_d <= 0, 0.01, c_d))
+
+    return DataFrame({
+        'A1_GEM': e_a1, 'A2_GEM': e_a2, 'SIGMA_A1': sigma_a1, 'SIGMA_A2': sigma_a2, 'RHO_A1_A2': rho,
+        'A1_KAR': a1_kar, 'A2_KAR': a2_kar,
+        'TAN_PHI_GEM': tan_phi_gem, 'PHI_GEM': phi_gem, 'C_GEM': c_gem,
+        'TAN_PHI_KAR': tan_phi_kar, 'PHI_KAR': np.degrees(np.arctan(tan_phi_kar)), 'C_KAR': c_kar,
+        'TAN_PHI_D': tan_phi_d, 'PHI_D': phi_d, 'C_D': c_d, 'PHI_SD_DSTAB': phi_sd, 'COH_SD_DSTAB': coh_sd,
+    }, index=stats.index)
+
+
+def batched_sh_results(stats: DataFrame, alpha, material_tan_phi) -> DataFrame:
+    """
+    De schematiseringshandleiding-analyse (lognormale tan(a)) voor alle rijen van stats tegelijk.
+
+    Naast PV_TYPE_PROEF en n zijn het gemiddelde (mean_ln) en de standaardafwijking (std_ln) van LN(tan(a)) nodig.
+    alpha en de materiaalfactor zijn een getal of een array met één waarde per rij.
+    """
+    n = stats['n'].to_numpy(dtype=float)
+    mean_ln, std_ln = stats['mean_ln'].to_numpy(), stats['std_ln'].to_numpy()
+    t_n_1 = _t_quantiles(0.05, n - 1)
+    with np.errstate(invalid='ignore', divide='ignore', over='ignore'):
+        a2_gem = np.exp(mean_ln)
+        a2_kar = np.exp(mean_ln + t_n_1 * std_ln * np.sqrt((1 - alpha) + 1 / n))
+        is_txt = (stats['PV_TYPE_PROEF'] == 'TXT').to_numpy()
+        tan_phi_gem = np.where(is_txt, a2_gem / np.sqrt(1 - a2_gem ** 2), a2_gem)
+        tan_phi_kar = np.where(is_txt, a2_kar / np.sqrt(1 - a2_kar ** 2), a2_kar)
+    tan_phi_d = tan_phi_kar / material_tan_phi
+    phi_gem, phi_d = np.degrees(np.arctan(tan_phi_gem)), np.degrees(np.arctan(tan_phi_d))
+    return DataFrame({
+        'A2_GEM': a2_gem, 'A2_KAR': a2_kar, 'TAN_PHI_GEM': tan_phi_gem, 'PHI_GEM': phi_gem,
+        'TAN_PHI_KAR': tan_phi_kar, 'PHI_KAR': np.degrees(np.arctan(tan_phi_kar)),
+        'TAN_PHI_D': tan_phi_d, 'PHI_D': phi_d,
+        'PHI_SD_DSTAB': np.where((phi_gem > 0) & (phi_d > 0), _st_dev(phi_gem, phi_d), np.nan),
+    }, index=stats.index)
+
+
+def analysis_matrix(dbase: Dbase, groups: Optional[List[str]] = None,
+                    effective_stresses: Optional[List[str]] = None, test_types: Optional[List[str]] = None,
+                    analyses: Optional[List[str]] = None, alpha: float = 0.75, material_cohesie: float = 1.0,
+                    material_tan_phi: float = 1.0, min_samples: int = 3) -> DataFrame:
+    """
+    Berekent de c-phi resultaten voor alle proevenverzamelingen, rekniveaus en proeftypes in één keer.
+
+    De sufficient statistics van alle combinaties (PV_NAAM x proeftype x rekniveau) komen uit één groupby; de
+    regressie, standaarddeviaties en karakteristieke waarden worden daarna voor alle combinaties tegelijk berekend.
+    De uitkomst is gelijk aan die van CPhiAnalyse zonder handmatige parameters (de eerste benadering).
+
+    Parameters
+    ----------
+    dbase: Dbase
+        Database object met proefresultaten
+    groups: List, optional
+        Alleen deze proevenverzamelingen (standaard alle PV_NAAM-waarden)
+    effective_stresses: List, optional
+        Alleen deze rekniveaus, bijvoorbeeld ['5% rek', 'eindsterkte'] (standaard alle)
+    test_types: List, optional
+        'TXT' en/of 'DSS' (standaard beide)
+    analyses: List, optional
+        'CPhi' en/of 'SH' (standaard beide)
+    alpha: float
+        Type verzameling (lokaal = 1.0; regionaal = 0.75)
+    material_cohesie, material_tan_phi: float
+        Materiaalfactoren voor de rekenwaarden
+    min_samples: int
+        Combinaties met minder paren worden niet berekend (de c-phi regressie heeft er minstens 3 nodig)
+
+    Returns
+    -------
+    DataFrame
+        Eén rij per (PV_NAAM, PV_TYPE_PROEF, PV_REK, PV_ANALYSE) met de kolommen uit MATRIX_COLUMNS
+    """
+    test_types = list(TEST_TYPES) if test_types is None else test_types
+    analyses = ANALYSES if analyses is None else analyses
+    unknown = [value for value in test_types if value not in TEST_TYPES] + \
+              [value for value in analyses if value not in ANALYSES]
+    if unknown:
+        raise ValueError(f"Onbekend proeftype of analyse: {unknown}. Kies uit {list(TEST_TYPES)} en {ANALYSES}.")
+
+    long_df = _long_data(dbase.dbase_df, groups, effective_stresses, test_types)
+    if long_df.empty:
+        return DataFrame(columns=MATRIX_COLUMNS)
+
+    grouped = long_df.groupby(KEY_COLUMNS, sort=True)
+    long_df = long_df.assign(dS=long_df['S'] - grouped['S'].transform('mean'),
+                             dT=long_df['T'] - grouped['T'].transform('mean'))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ln_tan = np.log(long_df['T'] / long_df['S'])
+    long_df = long_df.assign(s_tt=long_df['dS'] ** 2, s_ty=long_df['dS'] * long_df['T'], s_yy=long_df['dT'] ** 2,
+                             ln_tan=ln_tan.where(np.isfinite(ln_tan)))
+    stats = long_df.groupby(KEY_COLUMNS, sort=True).agg(
+        n=('S', 'size'), sum_x=('S', 'sum'), sum_y=('T', 'sum'), min_x=('S', 'min'), max_x=('S', 'max'),
+        s_tt=('s_tt', 'sum'), s_ty=('s_ty', 'sum'), s_yy=('s_yy', 'sum'),
+        mean_ln=('ln_tan', 'mean'), std_ln=('ln_tan', 'std'),
+    ).reset_index()
+    stats = stats[stats['n'] >= min_samples].reset_index(drop=True)
+
+    results = []
+    if 'CPhi' in analyses:
+        results.append(pd.concat([stats[KEY_COLUMNS].assign(PV_ANALYSE='CPhi', AANTAL=stats['n']),
+                                  batched_cphi_results(stats, alpha, material_cohesie, material_tan_phi)], axis=1))
+    if 'SH' in analyses:
+        results.append(pd.concat([stats[KEY_COLUMNS].assign(PV_ANALYSE='SH', AANTAL=stats['n']),
+                                  batched_sh_results(stats, alpha, material_tan_phi)], axis=1))
+    matrix = pd.concat(results, ignore_index=True).reindex(columns=MATRIX_COLUMNS)
+    return matrix.sort_values(['PV_NAAM', 'PV_TYPE_PROEF', 'PV_REK', 'PV_ANALYSE'], ignore_index=True)
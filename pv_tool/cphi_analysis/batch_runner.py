@@ -0,0 +1,216 @@
+"""
+Batchverwerking van c-phi analyses en exports op een process pool.
+
+Iedere job is één combinatie van analysetype, proevenverzameling, rekniveau en instellingen; dit is wat
+voer_cphi_analyse_uit en export_results met de hand per verzameling doen. De Dbase wordt één keer in gedeeld
+geheugen gezet (SharedDbase) en in iedere worker gekoppeld. Workers schrijven nooit naar de template: zij geven
+hun resultaatrij terug en het hoofdproces schrijft alle rijen na afloop in één keer weg met een ResultsJournal.
+HTML- en PDF-bestanden krijgen per job een eigen naam en iedere PDF gebruikt een eigen tijdelijk figuurbestand.
+"""
+
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Optional
+import plotly.graph_objects as go
+from pandas import DataFrame
+
+from pv_tool.cphi_analysis.c_phi_analysis import CPhiAnalyse
+from pv_tool.imports.results_journal import ResultsJournal
+from pv_tool.imports.shared_dbase import SharedDbase, attach_worker, get_worker_dbase
+
+if TYPE_CHECKING:
+    from pv_tool.imports.import_data import Dbase
+
+ANALYSIS_TYPES = ['TXT_CPhi', 'DSS_CPhi', 'TXT_SH', 'DSS_SH']
+EXPORTS = ('template', 'html', 'pdf')
+
+
+class CPhiJob:
+    """Eén c-phi analyse in een batch: analysetype, proevenverzameling, rekniveau en instellingen."""
+
+    def __init__(self, analysis_type: str, group: str, effective_stress: str, alpha: Optional[float] = None,
+                 material_factor_cohesion: Optional[float] = None, material_factor_tan_phi: Optional[float] = None,
+                 cohesie_gem: Optional[float] = None, phi_kar: Optional[float] = None,
+                 cohesie_kar: Optional[float] = None):
+        """
+        Parameters
+        ----------
+        analysis_type: str
+            'TXT_CPhi', 'DSS_CPhi', 'TXT_SH' of 'DSS_SH'
+        group: str
+            De proevenverzameling (PV_NAAM)
+        effective_stress: str
+            Het rekniveau, bijvoorbeeld '15% rek'
+        alpha, material_factor_cohesion, material_factor_tan_phi: float, optional
+            Instellingen zoals in CPhiAnalyse.apply_settings
+        cohesie_gem, phi_kar, cohesie_kar: float, optional
+            Handmatige waarden zoals in CPhiAnalyse.apply_parameters; alleen voor de CPhi analyses, bij een SH
+            analyse geeft dit een ValueError
+        """
+        if analysis_type not in ANALYSIS_TYPES:
+            raise ValueError(f"Onbekend analysetype '{analysis_type}'. Kies uit: {', '.join(ANALYSIS_TYPES)}.")
+        parameters = {'cohesie_gem': cohesie_gem, 'phi_kar': phi_kar, 'cohesie_kar': cohesie_kar}
+        ignored = [name for name, value in parameters.items() if value is not None]
+        if analysis_type.endswith('SH') and ignored:
+            raise ValueError(f"Handmatige parameters {ignored} horen bij een CPhi analyse en worden bij "
+                             f"'{analysis_type}' niet gebruikt.")
+        self.analysis_type = analysis_type
+        self.group = group
+        self.effective_stress = effective_stress
+        self.settings = {'alpha': alpha, 'material_factor_cohesion': material_factor_cohesion,
+                         'material_factor_tan_phi': material_factor_tan_phi}
+        self.parameters = parameters
+
+    @classmethod
+    def from_spec(cls, spec) -> CPhiJob:
+        """Maakt een job van een CPhiJob of een tuple (analysetype, verzameling, instellingen-dict)."""
+        if isinstance(spec, cls):
+            return spec
+        analysis_type, group, settings = spec
+        return cls(analysis_type, group, **settings)
+
+    @property
+    def key(self) -> str:
+        """Unieke naam van de job, gelijk aan het PV_RESULTAAT_ID in de template."""
+        test_type, analysis = self.analysis_type.split('_')
+        return f"{self.group}_{self.effective_stress}_{test_type}_{analysis}"
+
+    @property
+    def file_stem(self) -> str:
+        """Bestandsnaamdeel zonder spaties en procenttekens, voor de HTML-export."""
+        effective_stress = str(self.effective_stress).replace('%', 'procent_').replace(' ', '')
+        return f"{str(self.group).replace(' ', '_')}_{self.analysis_type}_{effective_stress}"
+
+    def __repr__(self):
+        return f"CPhiJob({self.key!r})"
+
+
+def run_job(job: CPhiJob, export_dir: str | Path, export_name: str, exports: Iterable[str] = EXPORTS,
+            dbase: Optional[Dbase] = None) -> dict:
+    """
+    Voert één job uit: de analyse en de gevraagde exports. Fouten worden niet doorgegeven maar teruggegeven.
+
+    Parameters
+    ----------
+    job: CPhiJob
+        De uit te voeren analyse
+    export_dir: str of Path
+        Map voor de HTML- en PDF-bestanden; hierin staat ook de template
+    export_name: str
+        Bestandsnaam van de template
+    exports: Iterable
+        Een of meer van 'template', 'html' en 'pdf'
+    dbase: Dbase, optional
+        De Dbase; standaard de met attach_worker gekoppelde Dbase van dit worker-proces
+
+    Returns
+    -------
+    dict
+        De job, de pending journal-entries (tabblad, kolommen, rij), de geschreven bestanden en een eventuele fout
+    """
+    outcome = {'job': job, 'journal': [], 'html': None, 'pdf': None, 'error': None}
+    try:
+        dbase = get_worker_dbase() if dbase is None else dbase
+        analyse = CPhiAnalyse(dbase=dbase, analysis_type=job.analysis_type, investigation_groups=[job.group],
+                              effective_stress=job.effective_stress)
+        analyse.apply_settings(**job.settings)
+        if job.analysis_type.endswith('CPhi'):
+            analyse.apply_parameters(**job.parameters)
+        analyse.update()
+
+        if 'template' in exports:
+            # Alleen verzamelen; het hoofdproces schrijft alle rijen in één keer naar de template
+            journal = ResultsJournal(Path(export_dir) / export_name)
+            analyse.add_results_to_template(path=export_dir, export_name=export_name, journal=journal)
+            outcome['journal'] = journal.pending
+        if 'html' in exports or 'pdf' in exports:
+            analyse.figure = go.Figure()
+            analyse.set_figure()
+        if 'html' in exports:
+            html_name = f"c-phi_analyse_{job.file_stem}.html"
+            analyse.save_fig_html(path=str(export_dir), export_name=html_name)
+            outcome['html'] = str(Path(export_dir) / html_name)
+        if 'pdf' in exports:
+            outcome['pdf'] = analyse.save_to_pdf(str(export_dir))
+    except Exception as e:
+        outcome['error'] = f"{type(e).__name__}: {str(e).strip()}"
+    return outcome
+
+
+def _run_worker_job(job: CPhiJob, export_dir: str, export_name: str, exports: tuple) -> dict:
+    return run_job(job, export_dir, export_name, exports)
+
+
+def run_batch(dbase: Dbase, jobs: Iterable, export_dir: str | Path, export_name: str = 'Template_PVtool5_0.xlsx',
+              max_workers: Optional[int] = None, exports: Iterable[str] = EXPORTS,
+              sidecar_path: Optional[str | Path] = None) -> DataFrame:
+    """
+    Voert een lijst c-phi analyses met exports uit op een process pool.
+
+    Parameters
+    ----------
+    dbase: Dbase
+        Database object met proefresultaten
+    jobs: Iterable
+        CPhiJob-objecten of tuples (analysetype, verzameling, instellingen-dict), bijvoorbeeld
+        ('TXT_CPhi', 'klei', {'effective_stress': '15% rek', 'alpha': 0.75})
+    export_dir: str of Path
+        Map voor de template en de HTML- en PDF-bestanden
+    export_name: str
+        Bestandsnaam van de template waarin de resultaten worden opgeslagen
+    max_workers: int, optional
+        Aantal worker-processen (standaard het aantal processoren); bij 1 wordt alles in dit proces uitgevoerd
+    exports: Iterable
+        Een of meer van 'template', 'html' en 'pdf'
+    sidecar_path: str of Path, optional
+        Sidecar-bestand van het ResultsJournal, zodat resultaten een crash voor het wegschrijven overleven
+
+    Returns
+    -------
+    DataFrame
+        Eén rij per job (index: PV_RESULTAAT_ID) met STATUS ('ok' of 'fout'), FOUT, de geschreven HTML- en
+        PDF-bestanden en de resultaatwaarden zoals in de template
+    """
+    jobs = [CPhiJob.from_spec(spec) for spec in jobs]
+    exports = tuple(exports)
+    unknown = [export for export in exports if export not in EXPORTS]
+    if unknown:
+        raise ValueError(f"Onbekende export {unknown}. Kies uit: {', '.join(EXPORTS)}.")
+    keys = [job.key for job in jobs]
+    duplicates = sorted({key for key in keys if keys.count(key) > 1})
+    if duplicates:
+        raise ValueError(f"Dubbele jobs schrijven naar dezelfde bestanden: {duplicates}")
+
+    export_dir = Path(export_dir)
+    export_dir.mkdir(parents=True, exist_ok=True)
+    if max_workers == 1:
+        outcomes = [run_job(job, export_dir, export_name, exports, dbase=dbase) for job in jobs]
+    else:
+        with SharedDbase(dbase) as shared:
+            with ProcessPoolExecutor(max_workers=max_workers, initializer=attach_worker,
+                                     initargs=(shared.handle,)) as pool:
+                outcomes = list(pool.map(_run_worker_job, jobs, [str(export_dir)] * len(jobs),
+                                         [export_name] * len(jobs), [exports] * len(jobs)))
+
+    # Eén schrijver voor de template: alle rijen in één atomaire flush
+    if 'template' in exports:
+        journal = ResultsJournal(export_dir / export_name, sidecar_path=sidecar_path)
+        for outcome in outcomes:
+            for sheet_name, columns, row in outcome['journal']:
+                journal.add(sheet_name, row, columns)
+        journal.flush()
+
+    rows = []
+    for outcome in outcomes:
+        job = outcome['job']
+        row = {'PV_RESULTAAT_ID': job.key, 'PV_NAAM': job.group, 'PV_REK': job.effective_stress,
+               'PV_TYPE_PROEF': job.analysis_type.split('_')[0], 'PV_ANALYSE': job.analysis_type.split('_')[1],
+               'STATUS': 'fout' if outcome['error'] else 'ok', 'FOUT': outcome['error'],
+               'HTML': outcome['html'], 'PDF': outcome['pdf']}
+        for _, _, result_row in outcome['journal']:
+            row.update({col: value for col, value in result_row.items() if col not in row})
+        rows.append(row)
+    failed = sum(outcome['error'] is not None for outcome in outcomes)
+    print(f"Batch klaar: {len(outcomes) - failed} van {len(outcomes)} analyses gelukt.")
+    return DataFrame(rows).set_index('PV_RESULTAAT_ID')
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+from typing import Optional, TYPE_CHECKING
+import numpy as np
+from pandas import DataFrame
+
+from pv_tool.cphi_analysis.analysis_matrix import batched_cphi_results, batched_sh_results
+
+if TYPE_CHECKING:
+    from pv_tool.cphi_analysis.c_phi_analysis import CPhiAnalyse
+
+# Parameters waarvoor de bootstrap een interval geeft, per analyse
+BOOTSTRAP_PARAMETERS = {
+    'CPhi': ['A1_GEM', 'A2_GEM', 'A1_KAR', 'A2_KAR', 'C_GEM', 'PHI_GEM', 'C_KAR', 'PHI_KAR', 'C_D', 'PHI_D'],
+    'SH': ['A2_GEM', 'A2_KAR', 'PHI_GEM', 'PHI_KAR', 'PHI_D'],
+}
+
+
+def batched_statistics(s_values: np.ndarray, t_values: np.ndarray, test_type: str) -> DataFrame:
+    """
+    Sufficient statistics van iedere rij van twee (resamples x monsters) matrices, in de vorm die
+    batched_cphi_results en batched_sh_results verwachten.
+    """
+    n = s_values.shape[1]
+    mean_s = s_values.mean(axis=1, keepdims=True)
+    mean_t = t_values.mean(axis=1, keepdims=True)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ln_tan = np.log(t_values / s_values)
+    ln_tan = np.where(np.isfinite(ln_tan), ln_tan, np.nan)
+    count_ln = np.sum(~np.isnan(ln_tan), axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_ln = np.nansum(ln_tan, axis=1) / count_ln
+        std_ln = np.sqrt(np.nansum((ln_tan - mean_ln[:, None]) ** 2, axis=1) / (count_ln - 1))
+    return DataFrame({
+        'PV_TYPE_PROEF': test_type, 'n': n,
+        'sum_x': s_values.sum(axis=1), 'sum_y': t_values.sum(axis=1),
+        'min_x': s_values.min(axis=1), 'max_x': s_values.max(axis=1),
+        's_tt': ((s_values - mean_s) ** 2).sum(axis=1), 's_ty': ((s_values - mean_s) * t_values).sum(axis=1),
+        's_yy': ((t_values - mean_t) ** 2).sum(axis=1), 'mean_ln': mean_ln, 'std_ln': std_ln,
+    })
+
+
+def _results(self: CPhiAnalyse, stats: DataFrame) -> DataFrame:
+    if self.analysis_type.endswith('SH'):
+        return batched_sh_results(stats, self.alpha, self.material_tan_phi)
+    return batched_cphi_results(stats, self.alpha, self.material_cohesie, self.material_tan_phi)
+
+
+def bootstrap_samples(self: CPhiAnalyse, n_resamples: int = 10000, seed: Optional[int] = None) -> DataFrame:
+    """
+    Berekent de regressie voor n_resamples bootstrap-resamples van de (S', T)-paren in één keer.
+
+    Alle resamples worden als één indexmatrix (resamples x monsters) getrokken; de sufficient statistics en de
+    regressie worden daarna voor alle resamples tegelijk berekend, zonder Python-lus per resample.
+
+    Parameters
+    ----------
+    self: CPhiAnalyse
+        Uitgevoerde c-phi analyse
+    n_resamples: int
+        Aantal resamples
+    seed: int, optional
+        Startwaarde van de random generator; met dezelfde seed zijn de resultaten reproduceerbaar
+
+    Returns
+    -------
+    DataFrame
+        Eén rij per resample met dezelfde kolommen als analysis_matrix (A1_GEM, PHI_KAR, C_KAR, ...)
+    """
+    data = self.cphi_analyses_data_df[['S\'', 'T']].astype(float).dropna()
+    if len(data) < 3:
+        raise ValueError(f"Voor een bootstrap zijn minstens 3 (S', T)-paren nodig, er zijn er {len(data)}.")
+    rng = np.random.default_rng(seed)
+    index = rng.integers(0, len(data), size=(n_resamples, len(data)))
+    s_values, t_values = data['S\''].to_numpy(), data['T'].to_numpy()
+    stats = batched_statistics(s_values[index], t_values[index], self.analysis_type.split('_')[0])
+    return _results(self, stats)
+
+
+def bootstrap_intervals(self: CPhiAnalyse, n_resamples: int = 10000, confidence: float = 0.90,
+                        seed: Optional[int] = None) -> DataFrame:
+    """
+    Percentiel-betrouwbaarheidsintervallen uit de bootstrap, naast de analytische waarde (eerste benadering).
+
+    De bootstrap gebruikt de eerste benadering van de regressie; handmatig opgegeven waarden (apply_parameters)
+    worden niet meegenomen. Resamples waarin de regressie niet bestaat (bijvoorbeeld alle S' gelijk) tellen niet mee.
+
+    Parameters
+    ----------
+    self: CPhiAnalyse
+        Uitgevoerde c-phi analyse
+    n_resamples: int
+        Aantal resamples
+    confidence: float
+        Betrouwbaarheid van het tweezijdige interval, bijvoorbeeld 0.90 voor het 5%- en 95%-percentiel
+    seed: int, optional
+        Startwaarde van de random generator
+
+    Returns
+    -------
+    DataFrame
+        Per parameter de analytische waarde, het bootstrap-gemiddelde, de standaardafwijking en de onder- en
+        bovengrens van het interval
+    """
+    if not 0 < confidence < 1:
+        raise ValueError(f"De betrouwbaarheid moet tussen 0 en 1 liggen, niet {confidence}.")
+    samples = bootstrap_samples(self, n_resamples=n_resamples, seed=seed)
+    data = self.cphi_analyses_data_df[['S\'', 'T']].astype(float).dropna()
+    analytical = _results(self, batched_statistics(data['S\''].to_numpy()[np.newaxis, :],
+                                                   data['T'].to_numpy()[np.newaxis, :],
+                                                   self.analysis_type.split('_')[0])).iloc[0]
+
+    parameters = BOOTSTRAP_PARAMETERS[self.analysis_type.split('_')[1]]
+    values = samples[parameters].to_numpy()
+    tail = (1 - confidence) / 2 * 100
+    with np.errstate(invalid='ignore'):
+        lower, upper = np.nanpercentile(values, [tail, 100 - tail], axis=0)
+    return DataFrame({
+        'analytisch': analytical[parameters].to_numpy(dtype=float),
+        'bootstrap gemiddelde': np.nanmean(values, axis=0),
+        'bootstrap standaardafwijking': np.nanstd(values, axis=0, ddof=1),
+        'ondergrens': lower,
+        'bovengrens': upper,
+    }, index=parameters)
@@ -1,29 +1,31 @@
+import hashlib
 from typing import Optional, List, Literal
 from pathlib import Path
 from datetime import datetime
-from pv_tool.utilities.utils import get_repo_root
-from pandas import DataFrame, concat, read_excel, isna
-from pv_tool.cphi_analysis.globals import (TEXTUAL_NAMES, ALL_TEXTUAL_NAMES,
-                                           NEW_COLUMN_NAMES, TEXTUAL_NAMES_DSS, ALL_TEXTUAL_NAMES_DSS)
+from pandas import DataFrame, to_numeric
+from pandas.api.types import is_numeric_dtype
+from pandas.util import hash_pandas_object
+from pv_tool.cphi_analysis.globals import TEXTUAL_NAMES, NEW_COLUMN_NAMES, TEXTUAL_NAMES_DSS
 from pv_tool.cphi_analysis.save_and_export import save_total_to_excel, save_to_pdf
 
 from pv_tool.imports.import_data import Dbase
+from pv_tool.imports.results_journal import ResultsJournal, write_result
+from pv_tool.imports.results_store import get_results_store
+import numpy as np
 import plotly.graph_objects as go
-from pv_tool.cphi_analysis.expand_analysis_df import (calculate_tan_a, calculate_ln_tan_a, calculate_s_tt,
-                                                      calculate_s_ty, calculate_kappa_2, calculate_s,
-                                                      calculate_5pr_ondergrens, calculate_5pr_bovengrens,
-                                                      calculate_s_tt_ondergrens, calculate_s_ty_ondergrens,
-                                                      calculate_kappa_2_ondergrens, calculate_correctie_t,
-                                                      kappa_2_2pr_cor,
-                                                      calculate_5pr_ondergrens_correctie_c,
-                                                      calculate_5pr_bovengrens_correctie_c,
-                                                      calculate_s_ty_ondergrens_correctie_c,
-                                                      calculate_kappa_2_ondergrens_correctie_c)
-from pv_tool.cphi_analysis.visualization import (add_proefresultaten, add_extra_proefresultaten, add_5pr_bovengrens,
-                                                 add_5pr_ondergrens, add_fysische_realiseerbare_ondergrens,
+from pv_tool.cphi_analysis.expand_analysis_df import (calculate_tan_a, calculate_ln_tan_a, expand_columns,
+                                                      expand_columns_corrected)
+from pv_tool.cphi_analysis.sufficient_statistics import SufficientStatistics
+from pv_tool.cphi_analysis.bootstrap import bootstrap_intervals
+from pv_tool.cphi_analysis.influence import influence_diagnostics, influence_trace
+from pv_tool.cphi_analysis.sensitivity import SENSITIVITY_PARAMETERS, sensitivity_figure, sensitivity_sweep
+from pv_tool.cphi_analysis.visualization import (add_proefresultaten, add_extra_proefresultaten, figure_band,
+                                                 add_5pr_bovengrens, add_5pr_ondergrens, add_fysische_realiseerbare_ondergrens,
                                                  add_gemiddelde,
                                                  set_layout, add_gemiddelde_sh, add_raaklijn_kar_boven,
-                                                 add_raaklijn_kar_onder)
+                                                 add_raaklijn_kar_onder, add_stress_paths)
+from pv_tool.cphi_analysis.stress_paths import stress_paths
+from pv_tool.cphi_analysis.envelope import strength_envelope, envelope_figure
 from pv_tool.cphi_analysis.calc_parameters import (calc_watergehalte_gem, calc_watergehalte_sd, calc_vgwnat_gem,
                                                    calc_vgwnat_sd, calc_a2_phi_gem, calc_a2_kar, calc_phi_d,
                                                    helling_gecorrigeerd, calc_a1_c_gem, calc_tan_phi_gem, calc_phi_kar,
@@ -32,7 +34,27 @@ from pv_tool.cphi_analysis.calc_parameters import (calc_watergehalte_gem, calc_w
                                                    calc_a2_phi_gem_sh, calc_a2_phi_kar_boven_sh,
                                                    calc_a2_phi_kar_onder_sh,
                                                    calc_tan_phi_kar_sh)
-from openpyxl import load_workbook
+
+# Stappen van de analyse in uitvoervolgorde: stap -> (voorgaande stappen, invoer-attributen). Een stap wordt opnieuw
+# uitgevoerd als een van zijn invoer-attributen is gewijzigd of als een voorgaande stap opnieuw is uitgevoerd.
+# De dbase_df telt mee via de inhoud van de kolommen die get_cphi_data leest (zie data_signature).
+DATA_INPUTS = ('data_signature', 'analysis_type', 'investigation_groups', 'effective_stress')
+# Kolommen van de dbase_df die naast de vlag en de (S', T)-kolommen van het rekniveau in de analyse en de export komen
+DATA_SIGNATURE_COLUMNS = ['PV_NAAM', 'BORING_POSITIE', 'MONSTER_NIVEAU_NAP_VANAF', 'MONSTER_NIVEAU_NAP_TOT']
+CPHI_STAGES = {
+    'get_cphi_data': ((), DATA_INPUTS),
+    'expand_analysis_df': (('get_cphi_data',), ('alpha',)),
+    'eerste_benadering': (('get_cphi_data',), ()),
+    'expand_analysis_df_corrected': (('expand_analysis_df', 'eerste_benadering'), ('cohesie_gem_handmatig',)),
+    'eerste_benadering_deel2': (('expand_analysis_df_corrected',), ('cohesie_gem_handmatig',)),
+    'result_values': (('eerste_benadering', 'eerste_benadering_deel2'),
+                      ('phi_kar_handmatig', 'cohesie_kar_handmatig', 'material_cohesie', 'material_tan_phi')),
+}
+SH_STAGES = {
+    'get_cphi_data': ((), DATA_INPUTS),
+    'expand_analysis_df_sh': (('get_cphi_data',), ()),
+    'result_values_sh': (('expand_analysis_df_sh',), ('alpha', 'material_tan_phi')),
+}
 
 
 class CPhiAnalyse:
@@ -80,6 +102,9 @@ class CPhiAnalyse:
         self.alpha: Optional[float] = 0.75
         self.material_cohesie: Optional[float] = 1.0
         self.material_tan_phi: Optional[float] = 1.0
+        # Raster van het betrouwbaarheidsinterval in de figuren (zie confidence_band)
+        self.band_resolution: int = 200
+        self.band_s_values: Optional[List[float]] = None
 
         # Parameters
         self.eerste_benadering_a2_gem: Optional[float] = None  # phi_gem
@@ -101,6 +126,11 @@ class CPhiAnalyse:
         self.cphi_analyses_data_df: Optional[DataFrame] = None
         self.total_cphi_analyses_data_df: Optional[DataFrame] = None
 
+        # Sufficient statistics van (S', T) en van de 5% ondergrenzen, één keer per analyse berekend
+        self.statistics: Optional[SufficientStatistics] = None
+        self.statistics_ondergrens: Optional[SufficientStatistics] = None
+        self.statistics_ondergrens_cor: Optional[SufficientStatistics] = None
+
         # Results
         self.tan_phi_gem: Optional[float] = None
         self.phi_gem: Optional[float] = None
@@ -125,8 +155,13 @@ class CPhiAnalyse:
 
         # Figure
         self.figure = go.Figure()
+        self.figure_sensitivity: Optional[go.Figure] = None
+        self.figure_envelope: Optional[go.Figure] = None
         self.show_title: Optional[bool] = True
 
+        # Invoer waarmee iedere stap het laatst is uitgevoerd (zie update)
+        self._stage_signatures: dict = {}
+
     # ========= Instelling en Data Ophalen Methodes ==========
 
     def get_cphi_data(self):
@@ -135,7 +170,7 @@ class CPhiAnalyse:
 
         Selecteert de juiste data voor de analyse op basis van het type test (TXT/DSS),
         de proefgroepen en het gewenste rekpercentage. Berekent tevens gemiddelde
-        eigenschappen zoals watergehalte.
+        eigenschappen zoals watergehalte. Monsters zonder S' of T op het rekniveau vallen weg.
         """
         if self.analysis_type in ['TXT_CPhi', 'TXT_SH']:
             self.cphi_analyses_data_df = self.dbase_df[self.dbase_df['ALG__TRIAXIAAL']]
@@ -176,10 +211,22 @@ class CPhiAnalyse:
             print(f"Data na filtering: {len(self.cphi_analyses_data_df)} rijen gevonden")
 
         self.cphi_analyses_data_df.columns = NEW_COLUMN_NAMES
+        # Alleen volledige (S', T)-paren doen mee: het s'-raster heeft één punt per rij en moet dezelfde monsters
+        # gebruiken als de regressie (zoals analysis_matrix en strength_envelope)
+        complete = self.cphi_analyses_data_df[['S\'', 'T']].apply(to_numeric, errors='coerce').notna().all(axis=1)
+        self.cphi_analyses_data_df = self.cphi_analyses_data_df[complete]
+        if self.cphi_analyses_data_df.empty:
+            raise ValueError(f"Geen volledige (S', T)-paren gevonden voor effective_stress '{self.effective_stress}' "
+                             f"en analyse type '{self.analysis_type}'")
+        self.statistics = SufficientStatistics(self.cphi_analyses_data_df['S\''], self.cphi_analyses_data_df['T'])
+        self.statistics_ondergrens = None
+        self.statistics_ondergrens_cor = None
 
     def apply_settings(self, alpha: Optional[float] = None,
                        material_factor_cohesion: Optional[float] = None,
-                       material_factor_tan_phi: Optional[float] = None):
+                       material_factor_tan_phi: Optional[float] = None,
+                       band_resolution: Optional[int] = None,
+                       band_s_values: Optional[List[float]] = None):
         """
         Past analyse-instellingen aan.
 
@@ -191,12 +238,22 @@ class CPhiAnalyse:
             Materiaalfactor voor cohesie
         material_factor_tan_phi : float, optioneel
             Materiaalfactor voor tan(phi)
+        band_resolution : int, optioneel
+            Aantal punten waarop het betrouwbaarheidsinterval in de figuren wordt getekend (standaard 200)
+        band_s_values : List, optioneel
+            Expliciete s' waarden voor het betrouwbaarheidsinterval in de figuren, in plaats van band_resolution
         """
         self.alpha = alpha if alpha is not None else self.alpha
         self.material_cohesie = material_factor_cohesion if material_factor_cohesion is not None \
             else self.material_cohesie
         self.material_tan_phi = material_factor_tan_phi if material_factor_tan_phi is not None \
             else self.material_tan_phi
+        self.band_resolution = band_resolution if band_resolution is not None else self.band_resolution
+        self.band_s_values = band_s_values if band_s_values is not None else self.band_s_values
+
+        # Een bestaande analyse direct bijwerken; alleen de stappen die van deze instellingen afhangen
+        if self._stage_signatures:
+            self.update()
 
     def apply_parameters(self, cohesie_gem: Optional[float] = None,
                          phi_kar: Optional[float] = None,
@@ -220,10 +277,20 @@ class CPhiAnalyse:
         if cohesie_kar is not None:
             self.cohesie_kar_handmatig = cohesie_kar
 
-        if self.analysis_type in ['TXT_SH', 'DSS_SH']:
-            self._run_sh()
-        else:
-            self._run()
+        self.update()
+
+    def get_stress_paths(self) -> DataFrame:
+        """
+        Geeft de spanningspaden van alle monsters binnen de geselecteerde investigation groups als één tabel.
+
+        Returns
+        -------
+        DataFrame
+            De kolommen monster, stress_state, S' en T, per monster in de volgorde van het pad (zie stress_paths)
+        """
+        if self.analysis_type not in ['TXT_CPhi', 'TXT_SH', 'DSS_CPhi', 'DSS_SH']:
+            raise ValueError("Ongeldig analysetype. Gebruik 'TXT_CPhi', 'TXT_SH', 'DSS_CPhi' of 'DSS_SH'.")
+        return stress_paths(self.dbase_df, self.analysis_type.split('_')[0], self.investigation_groups)
 
     def plot_spanningspaden(self):
         """
@@ -237,105 +304,10 @@ class CPhiAnalyse:
         Wordt aangeroepen binnen set_figure(). Het is aan de gebruiker om de spanningspaden wel of niet toe te voegen
         aan de figuur.
         """
-        if self.analysis_type in ['TXT_CPhi', 'TXT_SH']:
-            relevant_df = self.dbase_df[self.dbase_df['ALG__TRIAXIAAL']]
-            relevant_df = relevant_df[relevant_df['PV_NAAM'].isin(self.investigation_groups)]
-            effective_stress_options = ['consolidatie', '2% rek', '5% rek', '15% rek', 'pieksterkte', 'eindsterkte']
-        elif self.analysis_type in ['DSS_CPhi', 'DSS_SH']:
-            relevant_df = self.dbase_df[self.dbase_df['ALG__DSS']]
-            relevant_df = relevant_df[relevant_df['PV_NAAM'].isin(self.investigation_groups)]
-            effective_stress_options = ['consolidatie', '2% rek', '5% rek', '10% rek', '15% rek', '20% rek',
-                                        'pieksterkte', 'eindsterkte']
-            relevant_df['DSS_T_CONSOLIDATIE'] = [0] * len(relevant_df)
-        else:
-            raise ValueError("Ongeldig analysetype. Gebruik 'TXT_CPhi', 'TXT_SH', 'DSS_CPhi' of 'DSS_SH'.")
-
-        # Eerst verzamelen we alle data per spanningsstap
-        all_data = {}
-        for stress in effective_stress_options:
-            columns = ALL_TEXTUAL_NAMES.get(stress, []) \
-                if self.analysis_type in ['TXT_CPhi', 'TXT_SH'] else ALL_TEXTUAL_NAMES_DSS.get(stress, [])
-            if len(columns) > 0:
-                data = relevant_df[columns].copy()
-                if not data.empty and not data.isna().all().all():
-                    data.columns = NEW_COLUMN_NAMES
-                    all_data[stress] = data
-
-        # Nu herstructureren we de data per monster (uit de index)
-        sample_stress_paths = {}
-
-        # Verzamel alle unieke monster namen uit de indices van alle dataframes
-        all_samples = set()
-        for df in all_data.values():
-            all_samples.update(df.index)
-
-        # Voor elk monster, verzamel alle spanningsstappen
-        for sample_name in all_samples:
-            stress_data = {'S\'': [], 'T': [], 'stress_state': []}
-            for stress, df in all_data.items():
-                if sample_name in df.index:
-                    sample_data = df.loc[sample_name]
-                    if not (isna(sample_data['S\'']) or isna(sample_data['T'])):
-                        stress_data['S\''].append(sample_data['S\''])
-                        stress_data['T'].append(sample_data['T'])
-                        stress_data['stress_state'].append(stress)
-
-            if stress_data['S\'']:  # Als er data is voor dit monster
-                stress_df = DataFrame(stress_data)
-
-                if self.analysis_type in ['TXT_CPhi', 'TXT_SH']:
-                    rek_bij_t_piek = self.total_cphi_analyses_data_df.loc[sample_name, 'TXT_SS_REK_BIJ_T_PIEK']
-                    rek_bij_t_eind = self.total_cphi_analyses_data_df.loc[sample_name, 'TXT_SS_REK_BIJ_T_EIND']
-                    if not isna(rek_bij_t_piek) and 'pieksterkte' in stress_df['stress_state'].values:
-                        # Verplaats de rij met 'pieksterkte' naar de juiste positie
-                        piek_row = stress_df[stress_df['stress_state'] == 'pieksterkte']
-                        stress_df = stress_df[stress_df['stress_state'] != 'pieksterkte']
-                        if rek_bij_t_piek < 2:
-                            insert_index = 1
-                        elif rek_bij_t_piek < 5:
-                            insert_index = 2
-                        elif rek_bij_t_piek < 15:
-                            insert_index = 3
-                        elif not isna(rek_bij_t_eind) and rek_bij_t_eind > rek_bij_t_piek:
-                            insert_index = 4
-                        else:
-                            insert_index = len(stress_df)
-                        stress_df = concat(
-                            [stress_df.iloc[:insert_index], piek_row, stress_df.iloc[insert_index:]]).reset_index(
-                            drop=True)
-                elif self.analysis_type in ['DSS_CPhi', 'DSS_SH']:
-                    rek_bij_t_max = self.total_cphi_analyses_data_df.loc[sample_name, 'DSS_REK_BIJ_T_MAX']
-                    rek_bij_t_eind = self.total_cphi_analyses_data_df.loc[sample_name, 'DSS_REK_BIJ_T_EIND']
-                    if not isna(rek_bij_t_max) and 'pieksterkte' in stress_df['stress_state'].values:
-                        # Verplaats de rij met 'pieksterkte' naar de juiste positie
-                        piek_row = stress_df[stress_df['stress_state'] == 'pieksterkte']
-                        stress_df = stress_df[stress_df['stress_state'] != 'pieksterkte']
-                        if rek_bij_t_max < 2:
-                            insert_index = 1
-                        elif rek_bij_t_max < 5:
-                            insert_index = 2
-                        elif rek_bij_t_max < 10:
-                            insert_index = 3
-                        elif rek_bij_t_max < 15:
-                            insert_index = 4
-                        elif rek_bij_t_max < 20:
-                            insert_index = 5
-                        elif not isna(rek_bij_t_eind) and rek_bij_t_eind > rek_bij_t_max:
-                            insert_index = 6
-                        else:
-                            insert_index = len(stress_df)
-                        stress_df = concat(
-                            [stress_df.iloc[:insert_index], piek_row, stress_df.iloc[insert_index:]]).reset_index(
-                            drop=True)
-
-                sample_stress_paths[sample_name] = stress_df
-
-        # Plot de spanningspaden
-        if sample_stress_paths:
-            from pv_tool.cphi_analysis.visualization import add_stress_paths
-            add_stress_paths(self, sample_stress_paths)
-        else:
+        paths = self.get_stress_paths()
+        if paths.empty:
             raise ValueError("Geen geldige data gevonden voor de spanningspaden.")
+        add_stress_paths(self, paths)
 
     def get_previous_results(self, path: str, file_name: str):
         """
@@ -362,24 +334,18 @@ class CPhiAnalyse:
         except FileNotFoundError:
             raise FileNotFoundError("Er is geen dbase aanwezig onder de naam Template_PVtool5_0.xlsx")
 
-        try:
-            results_df = read_excel(file_path, sheet_name='Resultaten c-phi', skiprows=6)
-        except ValueError:
+        # De resultaten worden geïndexeerd en pas opnieuw ingelezen als het bestand is gewijzigd
+        store = get_results_store(file_path)
+        if 'Resultaten c-phi' not in store.sheets:
             print("Er is geen tabblad 'Resultaten c-phi' aanwezig in het Excel-bestand.")
             return None
 
-        filtered_df = results_df[
-            (results_df['PV_RESULTAAT_ID'].str.contains(self.investigation_groups[0])) &
-            (results_df['PV_RESULTAAT_ID'].str.contains(self.effective_stress)) &
-            (results_df['PV_RESULTAAT_ID'].str.contains(self.analysis_type))
-            ]
-
-        if filtered_df.empty:
+        latest_entry = store.latest('Resultaten c-phi', group=self.investigation_groups[0],
+                                    analysis_type=self.analysis_type, effective_stress=self.effective_stress)
+        if latest_entry is None:
             print("Er zijn geen eerdere resultaten gevonden voor de opgegeven parameters.")
             return None
 
-        latest_entry = filtered_df.sort_values(by='Timestamp', ascending=False).iloc[0]
-
         return latest_entry
 
     # ========= Analyse Methodes ==========
@@ -391,15 +357,7 @@ class CPhiAnalyse:
         Voegt kolommen toe aan het dataframe met berekende waarden voor
         s_tt, s_ty, kappa_2 en verschillende onder- en bovengrenzen.
         """
-        calculate_s_tt(self)
-        calculate_s_ty(self)
-        calculate_kappa_2(self)
-        calculate_s(self)
-        calculate_5pr_ondergrens(self)
-        calculate_5pr_bovengrens(self)
-        calculate_s_tt_ondergrens(self)
-        calculate_s_ty_ondergrens(self)
-        calculate_kappa_2_ondergrens(self)
+        expand_columns(self)
 
     def expand_analysis_df_sh(self):
         """
@@ -431,12 +389,7 @@ class CPhiAnalyse:
         Voegt gecorrigeerde parameters toe aan de analyse: gecorrigeerde waarden voor
         onder- en bovengrenzen en kappa_2.
         """
-        calculate_correctie_t(self)
-        kappa_2_2pr_cor(self)
-        calculate_5pr_ondergrens_correctie_c(self)
-        calculate_5pr_bovengrens_correctie_c(self)
-        calculate_s_ty_ondergrens_correctie_c(self)
-        calculate_kappa_2_ondergrens_correctie_c(self)
+        expand_columns_corrected(self)
 
     # ========= Resultaten Methodes ==========
 
@@ -490,30 +443,109 @@ class CPhiAnalyse:
 
         self.st_dev_phi = calc_st_dev_phi(self)
 
+    @property
+    def data_signature(self) -> tuple:
+        """
+        Vingerafdruk van de data die get_cphi_data leest: de monsters met de proefvlag en een PV_NAAM uit
+        investigation_groups, met hun (S', T)-kolommen van het rekniveau, watergehalte, volumegewicht en
+        DATA_SIGNATURE_COLUMNS. Zo wordt de data ook opnieuw ingelezen na een aanpassing ter plekke (bijvoorbeeld
+        dbase_df.loc[...] = ... met of zonder Dbase.refresh_rows). Alleen de waarden van de geselecteerde rijen
+        worden gehasht, zodat een update() bij een grote Dbase goedkoop blijft.
+        """
+        df = self.dbase_df
+        if self.analysis_type.startswith('DSS'):
+            flag, columns_per_level = 'ALG__DSS', TEXTUAL_NAMES_DSS
+        else:
+            flag, columns_per_level = 'ALG__TRIAXIAAL', TEXTUAL_NAMES
+        selected = np.ones(len(df), dtype=bool)
+        if flag in df.columns:
+            selected &= df[flag].to_numpy(dtype=bool, na_value=False)
+        if 'PV_NAAM' in df.columns:
+            selected &= df['PV_NAAM'].isin(self.investigation_groups or []).to_numpy()
+        columns = [*columns_per_level.get(self.effective_stress, []), *DATA_SIGNATURE_COLUMNS]
+        columns += [col for col in df.columns if 'WATERGEHALTE_VOOR' in str(col) or 'VOLUMEGEWICHT' in str(col)]
+        columns = [col for col in dict.fromkeys(columns) if col in df.columns]
+        if len(self.investigation_groups or []) == 1:
+            # De selectie legt PV_NAAM al vast
+            columns = [col for col in columns if col != 'PV_NAAM']
+
+        # De index is onveranderlijk en telt mee via zijn identiteit en de posities van de geselecteerde rijen;
+        # numerieke kolommen gaan als ruwe bytes in de hash, alleen de overige kolommen worden per waarde gehasht
+        digest = hashlib.blake2b(np.flatnonzero(selected).tobytes(), digest_size=16)
+        for col in columns:
+            series = df[col]
+            if is_numeric_dtype(series.dtype):
+                values = series.to_numpy()
+                if values.dtype.kind in 'biuf':
+                    digest.update(np.ascontiguousarray(values[selected]).tobytes())
+                    continue
+            digest.update(hash_pandas_object(series[selected], index=False).to_numpy().tobytes())
+        return id(df), id(df.index), tuple(columns), digest.hexdigest()
+
+    def _input_signature(self, inputs: tuple) -> tuple:
+        """Momentopname van de invoer-attributen van een stap (DataFrames op identiteit, lijsten als tuple)."""
+        signature = []
+        for name in inputs:
+            value = getattr(self, name)
+            if isinstance(value, DataFrame):
+                value = id(value)
+            elif isinstance(value, list):
+                value = tuple(value)
+            signature.append(value)
+        return tuple(signature)
+
+    def _run_stages(self, stages: dict, force: bool = False) -> List[str]:
+        """Voert de stappen uit die verouderd zijn (of alle stappen bij force=True); geeft de uitgevoerde stappen."""
+        executed = []
+        for stage, (upstream, inputs) in stages.items():
+            signature = self._input_signature(inputs)
+            if (force or self._stage_signatures.get(stage) != signature
+                    or any(previous in executed for previous in upstream)):
+                self._stage_signatures.pop(stage, None)
+                getattr(self, stage)()
+                self._stage_signatures[stage] = signature
+                executed.append(stage)
+        return executed
+
+    def update(self) -> List[str]:
+        """
+        Werkt de analyse bij na een wijziging van de instellingen of handmatige parameters.
+
+        Alleen de stappen waarvan de invoer is gewijzigd en de stappen die daarvan afhangen worden opnieuw uitgevoerd
+        (zie CPHI_STAGES en SH_STAGES). Een andere alpha berekent bijvoorbeeld alleen de betrouwbaarheidsgrenzen en
+        de karakteristieke waarden opnieuw, een andere handmatige phi_kar alleen de resultaten.
+
+        Returns
+        -------
+        List[str]
+            De stappen die zijn uitgevoerd
+        """
+        if self.analysis_type in ['TXT_SH', 'DSS_SH']:
+            return self._run_stages(SH_STAGES)
+        return self._run_stages(CPHI_STAGES)
+
+    def invalidate(self):
+        """Markeert alle stappen als verouderd, zodat update() de hele analyse opnieuw uitvoert."""
+        self._stage_signatures = {}
+
     def _run(self):
         """
         Voert de volledige c-phi analyse uit in de juiste volgorde:
         data ophalen, parameters berekenen en resultaten bepalen.
         """
-        self.get_cphi_data()
-        self.expand_analysis_df()
-        self.eerste_benadering()
-        self.expand_analysis_df_corrected()
-        self.eerste_benadering_deel2()
-        self.result_values()
+        self._run_stages(CPHI_STAGES, force=True)
 
     def _run_sh(self):
         """
         Voert de volledige c-phi schematiseringshandleiding analyse uit in de juiste volgorde:
         data ophalen, parameters berekenen en resultaten bepalen.
         """
-        self.get_cphi_data()
-        self.expand_analysis_df_sh()
-        self.result_values_sh()
+        self._run_stages(SH_STAGES, force=True)
 
     # ========== Visualisatie Methodes ==========
 
-    def set_figure(self, plot_extra_dataset: Optional[List] = None, plot_spanningspaden: bool = False):
+    def set_figure(self, plot_extra_dataset: Optional[List] = None, plot_spanningspaden: bool = False,
+                   plot_invloed: bool = False):
         """
         Maakt een visualisatie van de analyseresultaten.
 
@@ -524,6 +556,9 @@ class CPhiAnalyse:
 
         plot_spanningspaden : bool, optioneel
             Of de spanningspaden moeten worden weergegeven
+
+        plot_invloed : bool, optioneel
+            Of de invloedrijke monsters (Cook's distance, zie influence_diagnostics) omcirkeld worden
         """
         if plot_spanningspaden:
             self.plot_spanningspaden()
@@ -537,14 +572,18 @@ class CPhiAnalyse:
             add_raaklijn_kar_onder(self)
             add_raaklijn_kar_boven(self)
         else:
-            add_5pr_bovengrens(self)
-            add_5pr_ondergrens(self)
+            band = figure_band(self)
+            add_5pr_bovengrens(self, band)
+            add_5pr_ondergrens(self, band)
             add_fysische_realiseerbare_ondergrens(self)
             add_gemiddelde(self)
+            if plot_invloed:
+                self.figure.add_trace(influence_trace(self.influence_diagnostics()))
 
         set_layout(self)
 
-    def show_figure(self, plot_extra_dataset: Optional[List] = None, plot_spanningspaden: bool = False):
+    def show_figure(self, plot_extra_dataset: Optional[List] = None, plot_spanningspaden: bool = False,
+                    plot_invloed: bool = False):
         """
         Toont de visualisatie van de analyseresultaten.
 
@@ -555,13 +594,13 @@ class CPhiAnalyse:
 
         plot_spanningspaden : bool, optioneel
             Of de spanningspaden moeten worden weergegeven
+
+        plot_invloed : bool, optioneel
+            Of de invloedrijke monsters omcirkeld worden (alleen bij de CPhi analyses)
         """
-        if self.analysis_type in ['TXT_SH', 'DSS_SH']:
-            self._run_sh()
-        else:
-            self._run()
+        self.update()
         self.figure = go.Figure()
-        self.set_figure(plot_extra_dataset, plot_spanningspaden=plot_spanningspaden)
+        self.set_figure(plot_extra_dataset, plot_spanningspaden=plot_spanningspaden, plot_invloed=plot_invloed)
         self.figure.show()
 
     def save_fig_html(self, path: str, export_name: Optional[str] = None):
@@ -593,15 +632,14 @@ class CPhiAnalyse:
             DataFrame met verwachtingswaarden, karakteristieke waarden,
             rekenwaarden en standaarddeviaties
         """
+        self.update()
         if self.analysis_type in ['TXT_SH', 'DSS_SH']:
-            self._run_sh()
             index = ['Verwachtingswaarde', 'Karakteristieke waarde', 'Rekenwaarde', 'Standaarddeviatie D-stability']
             columns = ['tan phi [-]', 'phi [graden]']
             analyse_output_df = DataFrame(index=index, columns=columns)
             analyse_output_df['tan phi [-]'] = [self.tan_phi_gem, self.tan_phi_kar, self.tan_phi_d, '[-]']
             analyse_output_df['phi [graden]'] = [self.phi_gem, self.phi_kar, self.phi_d, self.st_dev_phi]
         else:
-            self._run()
             index = ['Verwachtingswaarde', 'Karakteristieke waarde', 'Rekenwaarde', 'Standaarddeviatie D-stability']
             columns = ['tan phi [-]', 'phi [graden]', 'cohesie [kPa]']
             analyse_output_df = DataFrame(index=index, columns=columns)
@@ -610,12 +648,133 @@ class CPhiAnalyse:
             analyse_output_df['cohesie [kPa]'] = [self.c_gem, self.c_kar, self.c_d, self.st_dev_c]
         return analyse_output_df
 
+    def bootstrap(self, n_resamples: int = 10000, confidence: float = 0.90, seed: Optional[int] = None):
+        """
+        Bootstrap-betrouwbaarheidsintervallen voor c, phi en de karakteristieke waarden.
+
+        Parameters
+        ----------
+        n_resamples: int
+            Aantal resamples, alle tegelijk berekend
+        confidence: float
+            Betrouwbaarheid van het tweezijdige percentiel-interval
+        seed: int, optioneel
+            Startwaarde van de random generator, voor reproduceerbare resultaten
+
+        Returns
+        -------
+        DataFrame
+            Per parameter de analytische waarde, het bootstrap-gemiddelde, de standaardafwijking en het interval
+        """
+        self.update()
+        return bootstrap_intervals(self, n_resamples=n_resamples, confidence=confidence, seed=seed)
+
+    def sensitivity_sweep(self, alpha=None, material_factor_cohesion=None, material_factor_tan_phi=None):
+        """
+        Karakteristieke waarden en rekenwaarden voor een reeks waarden van alpha en de materiaalfactoren, zonder
+        de analyse per waarde opnieuw uit te voeren.
+
+        Parameters
+        ----------
+        alpha: float of array-like, optioneel
+            Waarde(n) voor het type verzameling, bijvoorbeeld np.linspace(0.75, 1.0, 100)
+        material_factor_cohesion, material_factor_tan_phi: float of array-like, optioneel
+            Waarde(n) voor de materiaalfactoren; standaard de huidige instellingen
+
+        Returns
+        -------
+        DataFrame
+            Eén rij per combinatie van instellingen met de resultaten (zie sensitivity.sensitivity_sweep)
+        """
+        self.update()
+        return sensitivity_sweep(self, alpha=alpha, material_factor_cohesion=material_factor_cohesion,
+                                 material_factor_tan_phi=material_factor_tan_phi)
+
+    def show_sensitivity_figure(self, alpha=None, material_factor_cohesion=None, material_factor_tan_phi=None,
+                                parameters: Optional[List] = None):
+        """
+        Toont de gevoeligheidsanalyse als small multiples, één deelfiguur per parameter.
+
+        Parameters
+        ----------
+        alpha, material_factor_cohesion, material_factor_tan_phi: float of array-like, optioneel
+            Zie sensitivity_sweep
+        parameters: List, optioneel
+            Resultaatkolommen in de figuur (standaard C_KAR, PHI_KAR, C_D en PHI_D, bij SH alleen phi)
+        """
+        sweep = self.sensitivity_sweep(alpha, material_factor_cohesion, material_factor_tan_phi)
+        parameters = SENSITIVITY_PARAMETERS[self.analysis_type.split('_')[1]] if parameters is None else parameters
+        self.figure_sensitivity = sensitivity_figure(
+            sweep, parameters, title=f"Gevoeligheidsanalyse {self.analysis_type} {self.effective_stress}")
+        self.figure_sensitivity.show()
+
+    def strength_envelope(self, effective_stresses: Optional[List[str]] = None) -> DataFrame:
+        """
+        Voert de analyse uit voor alle rekniveaus tegelijk, uit één keer inlezen van de proevenverzamelingen.
+
+        Parameters
+        ----------
+        effective_stresses: List, optioneel
+            Alleen deze rekniveaus, bijvoorbeeld ['2% rek', '5% rek', 'pieksterkte', 'eindsterkte'] (standaard alle)
+
+        Returns
+        -------
+        DataFrame
+            Eén rij per rekniveau met de resultaten van de eerste benadering (zie envelope.strength_envelope)
+        """
+        return strength_envelope(self, effective_stresses=effective_stresses)
+
+    def show_envelope_figure(self, effective_stresses: Optional[List[str]] = None, plot_proefresultaten: bool = True):
+        """
+        Toont de gemiddelde en karakteristieke lijnen van alle rekniveaus in één figuur.
+
+        Parameters
+        ----------
+        effective_stresses: List, optioneel
+            Alleen deze rekniveaus (standaard alle)
+        plot_proefresultaten: bool, optioneel
+            Of de proefresultaten per rekniveau worden getoond
+        """
+        envelope = self.strength_envelope(effective_stresses)
+        self.figure_envelope = envelope_figure(self, envelope, effective_stresses=effective_stresses,
+                                               plot_proefresultaten=plot_proefresultaten)
+        self.figure_envelope.show()
+
+    def influence_diagnostics(self, threshold: Optional[float] = None) -> DataFrame:
+        """
+        Invloed van ieder monster op de regressie van T op S' (leverage, residu, Cook's distance en de parameters
+        zonder dat monster), in gesloten vorm uit de sufficient statistics.
+
+        Parameters
+        ----------
+        threshold: float, optioneel
+            Grens voor Cook's distance waarboven een monster invloedrijk heet (standaard 4 / n)
+
+        Returns
+        -------
+        DataFrame
+            Per monster de diagnostiek, met daarnaast phi en c (gemiddeld) van de fit zonder dat monster
+        """
+        self.update()
+        if self.analysis_type in ['TXT_SH', 'DSS_SH']:
+            raise ValueError("Invloedsdiagnostiek is alleen beschikbaar voor de regressie van de analyses TXT_CPhi "
+                             f"en DSS_CPhi, niet voor '{self.analysis_type}'.")
+        diagnostics = influence_diagnostics(self.cphi_analyses_data_df['S\''], self.cphi_analyses_data_df['T'],
+                                            index=self.cphi_analyses_data_df.index, threshold=threshold)
+        a1, a2 = diagnostics['a1_zonder_monster'], diagnostics['a2_zonder_monster']
+        factor = 1 / np.sqrt(1 - a2 ** 2) if self.analysis_type == 'TXT_CPhi' else 1.0
+        diagnostics['phi_gem_zonder_monster'] = np.degrees(np.arctan(a2 * factor))
+        diagnostics['c_gem_zonder_monster'] = a1 * factor
+        return diagnostics
+
     # ========== Export Methodes ==========
 
-    def add_results_to_template(self, path, export_name=None):
+    def add_results_to_template(self, path, export_name=None, journal: Optional[ResultsJournal] = None):
         """
         Voegt een nieuwe resultatenrij toe aan tabblad 'Resultaten c-phi' in het Excel-template.
         Als het tabblad niet bestaat, wordt het aangemaakt en worden de kolomnamen weggeschreven.
+        Een eerder resultaat voor dezelfde verzameling en instellingen wordt vervangen. Met een ResultsJournal
+        wordt de rij verzameld en pas bij journal.flush() (in het bestand van het journal) weggeschreven.
         """
         if export_name is None:
             export_name = "Template_PVtool5_0.xlsx"
@@ -681,27 +840,12 @@ class CPhiAnalyse:
             'Timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         }
 
-        if file_path.exists():
-            wb = load_workbook(file_path)
-        else:
-            template_path = Path(get_repo_root()) / "pv_tool" / "templates" / "Template_PVtool5_0.xlsx"
-            wb = load_workbook(template_path)
-
-        if sheet_name in wb.sheetnames:
-            ws = wb[sheet_name]
-            first_empty_row = ws.max_row + 1 if any(
-                ws.iter_rows(min_row=ws.max_row, max_row=ws.max_row, values_only=True)) else ws.max_row
-        else:
-            ws = wb.create_sheet(sheet_name)
-            for col_idx, col_name in enumerate(expected_columns, start=1):
-                ws.cell(row=1, column=col_idx, value=col_name)
-            first_empty_row = 2
-
-        for col_idx, col_name in enumerate(expected_columns, start=1):
-            ws.cell(row=first_empty_row, column=col_idx, value=new_row.get(col_name, ""))
-
-        wb.save(file_path)
-        print(f"Resultaat toegevoegd aan template in tabblad '{sheet_name}'.")
+        # Bestaande rijen voor dezelfde verzameling en instellingen worden vervangen; met een journal wordt de rij
+        # pas bij journal.flush() (samen met de andere rijen) weggeschreven
+        result_df = write_result(file_path, sheet_name, new_row, expected_columns, journal=journal)
+        if journal is None:
+            print(f"Resultaat toegevoegd aan template in tabblad '{sheet_name}'.")
+        return result_df
 
     @property
     def save_total_to_excel(self):
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import math
 import numpy as np
-from scipy.stats import linregress, norm
+from scipy.stats import norm
 from typing import TYPE_CHECKING
 import warnings
 
@@ -44,10 +44,8 @@ def calc_vgwnat_sd(self: CPhiAnalyse):
 
 def calc_a2_phi_gem(self: CPhiAnalyse):
     """Berekent een eerste schatting van de gemiddelde phi middels lineaire regressie."""
-    x_values = self.cphi_analyses_data_df['S\'']
-    y_values = self.cphi_analyses_data_df['T']
-    a2_phi_gem = linregress(x=x_values, y=y_values).slope
-    return a2_phi_gem
+    a2_phi_gem = e_a2(self)
+    return float(a2_phi_gem)
 
 
 def calc_a2_phi_gem_sh(self: CPhiAnalyse):
@@ -0,0 +1,176 @@
+"""
+Sterkte-omhullende over alle rekniveaus: de c-phi analyse voor ieder rekniveau uit TEXTUAL_NAMES in één run.
+
+De proefresultaten van de proevenverzamelingen worden één keer als (rekniveaus x monsters) matrix uit de Dbase
+gelezen; de sufficient statistics van alle rekniveaus volgen uit bewerkingen langs de monsters van die matrix en de
+regressie wordt voor alle rekniveaus tegelijk berekend (batched_cphi_results en batched_sh_results).
+"""
+
+from __future__ import annotations
+
+from typing import Optional, List, TYPE_CHECKING
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+import plotly.graph_objects as go
+from plotly.colors import qualitative
+
+from pv_tool.cphi_analysis.analysis_matrix import (TEST_TYPES, MATRIX_COLUMNS, batched_cphi_results,
+                                                   batched_sh_results)
+from pv_tool.cphi_analysis.stress_paths import _numeric_column
+
+if TYPE_CHECKING:
+    from pv_tool.cphi_analysis.c_phi_analysis import CPhiAnalyse
+
+ENVELOPE_COLUMNS = ['PV_REK'] + MATRIX_COLUMNS[3:]
+COLORS = qualitative.Plotly
+
+
+def _envelope_data(self: CPhiAnalyse, effective_stresses: Optional[List[str]]):
+    """
+    De rekniveaus en de S'- en T-waarden van de proevenverzamelingen als (rekniveaus x monsters) matrices.
+
+    Een paar waarvan S' of T ontbreekt is in beide matrices NaN.
+    """
+    test_type = self.analysis_type.split('_')[0]
+    flag, columns_per_level = TEST_TYPES[test_type]
+    unknown = [level for level in effective_stresses or [] if level not in columns_per_level]
+    if unknown:
+        raise ValueError(f"Onbekend rekniveau {unknown} voor {test_type}. "
+                         f"Kies uit: {', '.join(columns_per_level)}.")
+    levels = [level for level in columns_per_level if effective_stresses is None or level in effective_stresses]
+
+    dbase_df = self.dbase_df
+    selection = dbase_df[dbase_df[flag].fillna(False).astype(bool)] if flag in dbase_df.columns else dbase_df[[]]
+    selection = selection[selection['PV_NAAM'].isin(self.investigation_groups)] \
+        if 'PV_NAAM' in selection.columns else selection[[]]
+    s_values = np.array([_numeric_column(selection, columns_per_level[level][1]) for level in levels])
+    t_values = np.array([_numeric_column(selection, columns_per_level[level][2]) for level in levels])
+    s_values = s_values.reshape(len(levels), len(selection))
+    t_values = t_values.reshape(len(levels), len(selection))
+    missing = np.isnan(s_values) | np.isnan(t_values)
+    s_values[missing] = np.nan
+    t_values[missing] = np.nan
+    return levels, s_values, t_values
+
+
+def level_statistics(s_values: np.ndarray, t_values: np.ndarray) -> dict:
+    """
+    Sufficient statistics van iedere rij van twee (rekniveaus x monsters) matrices waarin ontbrekende paren NaN zijn.
+
+    Returns
+    -------
+    dict
+        De kolommen n, sum_x, sum_y, min_x, max_x, s_tt, s_ty, s_yy, mean_ln en std_ln zoals batched_statistics, één
+        waarde per rij
+    """
+    n = np.sum(~np.isnan(s_values), axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sum_x, sum_y = np.nansum(s_values, axis=1), np.nansum(t_values, axis=1)
+        d_s = s_values - (sum_x / n)[:, np.newaxis]
+        d_t = t_values - (sum_y / n)[:, np.newaxis]
+        ln_tan = np.log(t_values / s_values)
+        ln_tan = np.where(np.isfinite(ln_tan), ln_tan, np.nan)
+        count_ln = np.sum(~np.isnan(ln_tan), axis=1)
+        mean_ln = np.nansum(ln_tan, axis=1) / count_ln
+        std_ln = np.sqrt(np.nansum((ln_tan - mean_ln[:, np.newaxis]) ** 2, axis=1) / (count_ln - 1))
+    empty = n == 0
+    return {
+        'n': n, 'sum_x': sum_x, 'sum_y': sum_y,
+        'min_x': np.where(empty, np.nan, np.fmin.reduce(s_values, axis=1, initial=np.inf)),
+        'max_x': np.where(empty, np.nan, np.fmax.reduce(s_values, axis=1, initial=-np.inf)),
+        's_tt': np.nansum(d_s ** 2, axis=1), 's_ty': np.nansum(d_s * t_values, axis=1),
+        's_yy': np.nansum(d_t ** 2, axis=1), 'mean_ln': mean_ln, 'std_ln': std_ln,
+    }
+
+
+def strength_envelope(self: CPhiAnalyse, effective_stresses: Optional[List[str]] = None,
+                      min_samples: int = 3) -> DataFrame:
+    """
+    Berekent de c-phi analyse (of de schematiseringshandleiding-analyse) voor alle rekniveaus tegelijk.
+
+    Alle geselecteerde proevenverzamelingen vormen per rekniveau één dataset, net als in CPhiAnalyse. De instellingen
+    (alpha en materiaalfactoren) komen van de analyse; handmatige parameters worden niet meegenomen, de uitkomst is
+    per rekniveau gelijk aan de eerste benadering van CPhiAnalyse met dat rekniveau en aan analysis_matrix. Monsters
+    zonder S' of T op een rekniveau tellen op dat rekniveau niet mee, net als in get_cphi_data.
+
+    Parameters
+    ----------
+    self: CPhiAnalyse
+        De c-phi analyse; het rekniveau van de analyse zelf speelt geen rol
+    effective_stresses: List, optional
+        Alleen deze rekniveaus (standaard alle rekniveaus uit TEXTUAL_NAMES of TEXTUAL_NAMES_DSS)
+    min_samples: int
+        Rekniveaus met minder (S', T)-paren worden niet berekend
+
+    Returns
+    -------
+    DataFrame
+        Eén rij per rekniveau, in de volgorde van TEXTUAL_NAMES, met de kolommen uit ENVELOPE_COLUMNS
+    """
+    test_type, analysis = self.analysis_type.split('_')
+    levels, s_values, t_values = _envelope_data(self, effective_stresses)
+    stats = DataFrame({'PV_TYPE_PROEF': test_type, 'PV_REK': levels, **level_statistics(s_values, t_values)})
+    stats = stats[stats['n'] >= min_samples].reset_index(drop=True)
+    if stats.empty:
+        return DataFrame(columns=ENVELOPE_COLUMNS)
+    if analysis == 'SH':
+        results = batched_sh_results(stats, self.alpha, self.material_tan_phi)
+    else:
+        results = batched_cphi_results(stats, self.alpha, self.material_cohesie, self.material_tan_phi)
+    envelope = pd.concat([stats[['PV_REK']].assign(PV_ANALYSE=analysis, AANTAL=stats['n']), results], axis=1)
+    return envelope.reindex(columns=ENVELOPE_COLUMNS)
+
+
+def envelope_figure(self: CPhiAnalyse, envelope: DataFrame, effective_stresses: Optional[List[str]] = None,
+                    plot_proefresultaten: bool = True) -> go.Figure:
+    """
+    Figuur met de gemiddelde (doorgetrokken) en karakteristieke (gestreept) lijn van ieder rekniveau.
+
+    Parameters
+    ----------
+    self: CPhiAnalyse
+        De c-phi analyse
+    envelope: DataFrame
+        Uitvoer van strength_envelope
+    effective_stresses: List, optional
+        De rekniveaus van de envelope, voor de proefresultaten in de figuur
+    plot_proefresultaten: bool
+        Of de proefresultaten per rekniveau worden getoond
+    """
+    levels, s_values, t_values = _envelope_data(self, effective_stresses)
+    s_max = np.nanmax(s_values) if np.any(~np.isnan(s_values)) else 100.0
+    x = np.array([0.0, s_max + 5])
+    sh = self.analysis_type.endswith('SH')
+
+    figure = go.Figure()
+    for number, row in envelope.iterrows():
+        color = COLORS[number % len(COLORS)]
+        if plot_proefresultaten and row['PV_REK'] in levels:
+            level = levels.index(row['PV_REK'])
+            valid = ~np.isnan(s_values[level])
+            figure.add_trace(go.Scatter(x=s_values[level][valid], y=t_values[level][valid], mode='markers',
+                                        marker=dict(color=color, size=5),
+                                        name=f"Proefresultaten {row['PV_REK']}", legendgroup=row['PV_REK']))
+        a1_gem, a1_kar = (0.0, 0.0) if sh else (row['A1_GEM'], row['A1_KAR'])
+        figure.add_trace(go.Scatter(x=x, y=a1_gem + row['A2_GEM'] * x, mode='lines', line=dict(color=color),
+                                    name=f"{row['PV_REK']}: gemiddeld (phi = {row['PHI_GEM']:.1f}°)",
+                                    legendgroup=row['PV_REK']))
+        figure.add_trace(go.Scatter(x=x, y=a1_kar + row['A2_KAR'] * x, mode='lines',
+                                    line=dict(color=color, dash='dash'),
+                                    name=f"{row['PV_REK']}: karakteristiek (phi = {row['PHI_KAR']:.1f}°)",
+                                    legendgroup=row['PV_REK']))
+
+    # Zelfde assen en afmetingen als set_layout
+    title = f'{self.analysis_type} sterkte-omhullende over alle rekniveaus op {self.investigation_groups[0]}'
+    dss = self.analysis_type.startswith('DSS')
+    figure.update_layout(
+        width=1152,
+        height=648,
+        title=title if self.show_title else None,
+        xaxis_title='\u03C3 \' [kPa]' if dss else 's\' [kPa]',
+        yaxis_title='\u03C4 [kPa]' if dss else 't [kPa]',
+        legend_title='Legenda',
+        margin=dict(t=100, r=50, b=100, l=50)
+    )
+    return figure
@@ -3,41 +3,155 @@ from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
     from pv_tool.cphi_analysis.c_phi_analysis import CPhiAnalyse
+import pandas as pd
 from pv_tool.cphi_analysis.variables import *
 
 
+def add_columns(self: CPhiAnalyse, columns: dict):
+    """Voegt berekende kolommen in één keer toe aan de analyse-DataFrame (één concat i.p.v. een insert per kolom)."""
+    df = self.cphi_analyses_data_df
+    existing = [col for col in columns if col in df.columns]
+    if existing:
+        df = df.drop(columns=existing)
+    self.cphi_analyses_data_df = pd.concat([df, pd.DataFrame(columns, index=df.index)], axis=1)
+
+
+def _values(self: CPhiAnalyse, column: str) -> np.ndarray:
+    return self.cphi_analyses_data_df[column].to_numpy(dtype=float)
+
+
+def _grid(self: CPhiAnalyse) -> np.ndarray:
+    """
+    s' waarden met gelijke intervallen tussen de minimale en maximale S', één per rij van de analyse.
+
+    Dit raster bepaalt de karakteristieke waarden (de regressie op de 5% ondergrens) en blijft daarom aan het aantal
+    monsters gekoppeld. De stappen worden cumulatief opgeteld, net als in de oorspronkelijke lus, zodat de waarden
+    bit-voor-bit gelijk blijven; voor de figuren is er confidence_band met een vast aantal punten.
+    """
+    aantal_waarden = len(self.cphi_analyses_data_df)
+    steps = np.full(aantal_waarden, (s_max(self) - s_min(self)) / (count_s(self) - 1), dtype=float)
+    steps[:1] = s_min(self)
+    return np.cumsum(steps)
+
+
+def _band(self: CPhiAnalyse, s_values: np.ndarray, sign: int, intercept: float, slope: float, sigma_1: float,
+          sigma_2: float, kappa_2: float) -> np.ndarray:
+    """Onder- (sign=-1) of bovengrens (sign=1) van het betrouwbaarheidsinterval rond de lijn intercept + slope·s'."""
+    return (intercept + slope * s_values + sign * t_n_2(self) *
+            (sigma_1 ** 2 + s_values ** 2 * sigma_2 ** 2 + 2 * rho_a1_a2(self) * s_values * sigma_1 * sigma_2 +
+             (1.0 - self.alpha) * (kappa_2 / (count_s(self) - 2))) ** 0.5)
+
+
+def _band_ondergrens(self: CPhiAnalyse, s_values: np.ndarray, sign: int = -1) -> np.ndarray:
+    return _band(self, s_values, sign, e_a1(self), e_a2(self), sigma_a1(self), sigma_a2(self), sum_kappa_2(self))
+
+
+def _band_gecorrigeerd(self: CPhiAnalyse, s_values: np.ndarray, sign: int = -1) -> np.ndarray:
+    return _band(self, s_values, sign, coh_gem(self), helling_gecor(self), sigma_a1_gecorrigeerd(self),
+                 sigma_a2_gecorrigeerd(self), sum_kappa_2_2pr_gecorrigeerd(self))
+
+
+def confidence_band(self: CPhiAnalyse, s_values=None, resolution: int = 200) -> pd.DataFrame:
+    """
+    Het 5% betrouwbaarheidsinterval (eerste benadering en gecorrigeerd) op een raster dat los staat van het aantal
+    monsters, voor gladde lijnen in de figuren.
+
+    Parameters
+    ----------
+    self: CPhiAnalyse
+        Uitgevoerde c-phi analyse
+    s_values: array-like, optional
+        Expliciete s' waarden; standaard een raster van resolution punten tussen de minimale en maximale S'
+    resolution: int
+        Aantal punten van het standaardraster
+
+    Returns
+    -------
+    DataFrame
+        De kolommen s', 5_pr_ondergrens, 5_pr_bovengrens, 5pr_ondergrens_cor en 5pr_bovengrens_cor. Op de s' van
+        de analyse zijn de waarden gelijk aan de gelijknamige kolommen van cphi_analyses_data_df.
+    """
+    if s_values is None:
+        if resolution < 2:
+            raise ValueError(f"Het raster voor het betrouwbaarheidsinterval heeft minstens 2 punten nodig, "
+                             f"niet {resolution}.")
+        s_values = np.linspace(s_min(self), s_max(self), int(resolution))
+    s_values = np.asarray(s_values, dtype=float)
+    return pd.DataFrame({
+        's\'': s_values,
+        '5_pr_ondergrens': _band_ondergrens(self, s_values, sign=-1),
+        '5_pr_bovengrens': _band_ondergrens(self, s_values, sign=1),
+        '5pr_ondergrens_cor': _band_gecorrigeerd(self, s_values, sign=-1),
+        '5pr_bovengrens_cor': _band_gecorrigeerd(self, s_values, sign=1),
+    })
+
+
+def expand_columns(self: CPhiAnalyse):
+    """
+    Berekent alle kolommen van de eerste stap van de c-phi analyse (s_tt t/m kappa_2_ondergrens) uit de sufficient
+    statistics en voegt ze in één keer toe.
+    """
+    s_eff, t_values = _values(self, 'S\''), _values(self, 'T')
+    s_values = _grid(self)
+    ondergrens = _band_ondergrens(self, s_values, sign=-1)
+    self.statistics_ondergrens = SufficientStatistics(s_values, ondergrens)
+    mean_s2 = sum_s2(self) / count_s2(self)
+    add_columns(self, {
+        's_tt': (s_eff - sum_s(self) / count_s(self)) ** 2,
+        's_ty': (s_eff - sum_s(self) / count_s(self)) * t_values,
+        'kappa_2': (t_values - e_a1(self) - e_a2(self) * s_eff) ** 2,
+        's\'': s_values,
+        '5_pr_ondergrens': ondergrens,
+        '5_pr_bovengrens': _band_ondergrens(self, s_values, sign=1),
+        's_tt_ondergrens': (s_values - mean_s2) ** 2,
+        's_ty_ondergrens': (s_values - mean_s2) * ondergrens,
+        'kappa_2_ondergrens': (ondergrens - a1_kar(self) - a2_kar(self) * s_values) ** 2,
+    })
+
+
+def expand_columns_corrected(self: CPhiAnalyse):
+    """
+    Berekent alle gecorrigeerde kolommen (correctie_t t/m kappa_2_ondergrens_cor) uit de sufficient statistics en
+    voegt ze in één keer toe.
+    """
+    s_eff, t_values, s_values = _values(self, 'S\''), _values(self, 'T'), _values(self, 's\'')
+    ondergrens_cor = _band_gecorrigeerd(self, s_values, sign=-1)
+    self.statistics_ondergrens_cor = SufficientStatistics(s_values, ondergrens_cor)
+    add_columns(self, {
+        'correctie_t': - coh_gem(self) + t_values,
+        'kappa_2_2pr_cor': (t_values - coh_gem(self) - helling_gecor(self) * s_eff) ** 2,
+        '5pr_ondergrens_cor': ondergrens_cor,
+        '5pr_bovengrens_cor': _band_gecorrigeerd(self, s_values, sign=1),
+        's_ty_ondergrens_cor': (s_values - sum_s2(self) / count_s2(self)) * ondergrens_cor,
+        'kappa_2_ondergrens_cor': (ondergrens_cor - a1_kar(self) - a2_kar(self) * s_values) ** 2,
+    })
+
+
 def calculate_tan_a(self: CPhiAnalyse):
     """Berekent de tangens van hoek a voor alle rijen in de DataFrame."""
-    df = self.cphi_analyses_data_df.copy()
-    df.loc[:, 'tan(a)'] = df['T'] / df['S\'']
-    self.cphi_analyses_data_df = df
+    add_columns(self, {'tan(a)': self.cphi_analyses_data_df['T'] / self.cphi_analyses_data_df['S\'']})
 
 
 def calculate_ln_tan_a(self: CPhiAnalyse):
     """Berekent de natuurlijke logaritme van tan(a) voor alle rijen in de DataFrame."""
-    df = self.cphi_analyses_data_df.copy()
-    df.loc[:, 'LN(tan(a))'] = df['tan(a)'].apply(lambda x: np.log(x) if x is not None and x > 0 else "")
-    self.cphi_analyses_data_df = df
+    add_columns(self, {'LN(tan(a))': self.cphi_analyses_data_df['tan(a)'].apply(
+        lambda x: np.log(x) if x is not None and x > 0 else "")})
 
 
 def calculate_s_tt(self: CPhiAnalyse):
     """Berekent de s_tt waarden voor de statistische analyse."""
-    df = self.cphi_analyses_data_df.copy()
-    df['s_tt'] = (df['S\''] - sum_s(self) / count_s(self)) ** 2
-    self.cphi_analyses_data_df = df
+    self.cphi_analyses_data_df['s_tt'] = (_values(self, 'S\'') - sum_s(self) / count_s(self)) ** 2
 
 
 def calculate_s_ty(self: CPhiAnalyse):
     """Berekent de s_ty waarden voor de statistische analyse."""
-    df = self.cphi_analyses_data_df.copy()
     mean_s = sum_s(self) / count_s(self)
-    df['s_ty'] = (df['S\''] - mean_s) * df['T']
-    self.cphi_analyses_data_df = df
+    self.cphi_analyses_data_df['s_ty'] = (_values(self, 'S\'') - mean_s) * _values(self, 'T')
 
 
 def calculate_kappa_2(self: CPhiAnalyse):
     """Berekent kappa_2 waarden voor de statistische analyse."""
-    formule = (self.cphi_analyses_data_df['T'] - e_a1(self) - e_a2(self) * self.cphi_analyses_data_df['S\'']) ** 2
+    formule = (_values(self, 'T') - e_a1(self) - e_a2(self) * _values(self, 'S\'')) ** 2
     self.cphi_analyses_data_df['kappa_2'] = formule
 
 
@@ -53,119 +167,67 @@ def s_max(self: CPhiAnalyse):
 
 def calculate_s(self: CPhiAnalyse):
     """Berekent s' waarden met gelijke intervallen tussen min en max."""
-    lijst = [s_min(self)]
-    formule = (s_max(self) - s_min(self)) / (count_s(self) - 1)
-    aantal_waarden = len(self.cphi_analyses_data_df)
-    for i in range(1, aantal_waarden):
-        nieuwe_waarde = lijst[i - 1] + formule
-        lijst.append(nieuwe_waarde)
-    self.cphi_analyses_data_df['s\''] = lijst
+    self.cphi_analyses_data_df['s\''] = _grid(self)
 
 
 def calculate_5pr_ondergrens(self: CPhiAnalyse):
     """Berekent de 5% ondergrens van het betrouwbaarheidsinterval."""
-    formule = (
-            e_a1(self) +
-            e_a2(self) * self.cphi_analyses_data_df['s\''] - t_n_2(self) *
-            (sigma_a1(self) ** 2 + self.cphi_analyses_data_df['s\''] ** 2 * sigma_a2(self) ** 2 +
-             2 * rho_a1_a2(self) * self.cphi_analyses_data_df['s\''] * sigma_a1(self) * sigma_a2(self) +
-             (1.0 - self.alpha) * (sum_kappa_2(self) / (count_s(self) - 2))) ** 0.5
-    )
-    self.cphi_analyses_data_df['5_pr_ondergrens'] = formule
+    self.cphi_analyses_data_df['5_pr_ondergrens'] = _band_ondergrens(self, _values(self, 's\''), sign=-1)
+    self.statistics_ondergrens = None
 
 
 def calculate_5pr_bovengrens(self: CPhiAnalyse):
     """Berekent de 5% bovengrens van het betrouwbaarheidsinterval."""
-    formule = (
-            e_a1(self) +
-            e_a2(self) * self.cphi_analyses_data_df['s\''] + t_n_2(self) *
-            (sigma_a1(self) ** 2 + self.cphi_analyses_data_df['s\''] ** 2 * sigma_a2(self) ** 2 +
-             2 * rho_a1_a2(self) * self.cphi_analyses_data_df['s\''] * sigma_a1(self) * sigma_a2(self) +
-             (1 - self.alpha) * (sum_kappa_2(self) / (count_s(self) - 2))) ** 0.5
-    )
-    self.cphi_analyses_data_df['5_pr_bovengrens'] = formule
+    self.cphi_analyses_data_df['5_pr_bovengrens'] = _band_ondergrens(self, _values(self, 's\''), sign=1)
 
 
 def calculate_s_tt_ondergrens(self: CPhiAnalyse):
     """Berekent de s_tt waarden voor de ondergrens analyse."""
-    formule = (self.cphi_analyses_data_df['s\''] - sum_s2(self) / count_s2(self)) ** 2
+    formule = (_values(self, 's\'') - sum_s2(self) / count_s2(self)) ** 2
     self.cphi_analyses_data_df['s_tt_ondergrens'] = formule
 
 
 def calculate_s_ty_ondergrens(self: CPhiAnalyse):
     """Berekent de s_ty waarden voor de ondergrens analyse."""
-    formule = (self.cphi_analyses_data_df['s\''] - sum_s2(self) /
-               count_s2(self)) * self.cphi_analyses_data_df['5_pr_ondergrens']
+    formule = (_values(self, 's\'') - sum_s2(self) / count_s2(self)) * _values(self, '5_pr_ondergrens')
     self.cphi_analyses_data_df['s_ty_ondergrens'] = formule
 
 
 def calculate_kappa_2_ondergrens(self: CPhiAnalyse):
     """Berekent kappa_2 waarden voor de ondergrens analyse."""
-    formule = (self.cphi_analyses_data_df['5_pr_ondergrens'] - a1_kar(self) -
-               a2_kar(self) * self.cphi_analyses_data_df['s\'']) ** 2
+    formule = (_values(self, '5_pr_ondergrens') - a1_kar(self) - a2_kar(self) * _values(self, 's\'')) ** 2
     self.cphi_analyses_data_df['kappa_2_ondergrens'] = formule
 
 
 def calculate_correctie_t(self: CPhiAnalyse):
     """Berekent de T-correctie op basis van gemiddelde cohesie."""
-    if self.cohesie_gem_handmatig is not None:
-        coh_gem = self.cohesie_gem_handmatig
-    else:
-        coh_gem = self.eerste_benadering_a1_gem
-    self.cphi_analyses_data_df['correctie_t'] = (- coh_gem + self.cphi_analyses_data_df['T'])
+    self.cphi_analyses_data_df['correctie_t'] = - coh_gem(self) + _values(self, 'T')
 
 
 def kappa_2_2pr_cor(self: CPhiAnalyse):
     """Berekent gecorrigeerde kappa_2 waarden voor 2-parameter analyse."""
-    if self.cohesie_gem_handmatig is not None:
-        coh_gem = self.cohesie_gem_handmatig
-    else:
-        coh_gem = self.eerste_benadering_a1_gem
-    formule = (self.cphi_analyses_data_df['T'] - coh_gem -
-               helling_gecor(self) * self.cphi_analyses_data_df['S\'']) ** 2
+    formule = (_values(self, 'T') - coh_gem(self) - helling_gecor(self) * _values(self, 'S\'')) ** 2
     self.cphi_analyses_data_df['kappa_2_2pr_cor'] = formule
 
 
 def calculate_5pr_ondergrens_correctie_c(self: CPhiAnalyse):
     """Berekent gecorrigeerde 5% ondergrens voor cohesie."""
-    if self.cohesie_gem_handmatig is not None:
-        coh_gem = self.cohesie_gem_handmatig
-    else:
-        coh_gem = self.eerste_benadering_a1_gem
-    formule = (coh_gem + helling_gecor(self) *
-               self.cphi_analyses_data_df['s\''] - t_n_2(self) *
-               (sigma_a1_gecorrigeerd(self) ** 2 + self.cphi_analyses_data_df['s\''] ** 2 * sigma_a2_gecorrigeerd(
-                   self) ** 2 +
-                2 * rho_a1_a2(self) * self.cphi_analyses_data_df['s\''] * sigma_a1_gecorrigeerd(self) *
-                sigma_a2_gecorrigeerd(self) + (1 - self.alpha) *
-                (sum_kappa_2_2pr_gecorrigeerd(self) / (count_s(self) - 2))) ** 0.5)
-    self.cphi_analyses_data_df['5pr_ondergrens_cor'] = formule
+    self.cphi_analyses_data_df['5pr_ondergrens_cor'] = _band_gecorrigeerd(self, _values(self, 's\''), sign=-1)
+    self.statistics_ondergrens_cor = None
 
 
 def calculate_5pr_bovengrens_correctie_c(self: CPhiAnalyse):
     """Berekent gecorrigeerde 5% bovengrens voor cohesie."""
-    if self.cohesie_gem_handmatig is not None:
-        coh_gem = self.cohesie_gem_handmatig
-    else:
-        coh_gem = self.eerste_benadering_a1_gem
-    formule = (coh_gem + helling_gecor(self) * self.cphi_analyses_data_df['s\''] + t_n_2(self) *
-               (sigma_a1_gecorrigeerd(self) ** 2 + self.cphi_analyses_data_df['s\''] ** 2 * sigma_a2_gecorrigeerd(
-                   self) ** 2 +
-                2 * rho_a1_a2(self) * self.cphi_analyses_data_df['s\''] * sigma_a1_gecorrigeerd(self) *
-                sigma_a2_gecorrigeerd(self) + (1 - self.alpha) *
-                (sum_kappa_2_2pr_gecorrigeerd(self) / (count_s(self) - 2))) ** 0.5)
-    self.cphi_analyses_data_df['5pr_bovengrens_cor'] = formule
+    self.cphi_analyses_data_df['5pr_bovengrens_cor'] = _band_gecorrigeerd(self, _values(self, 's\''), sign=1)
 
 
 def calculate_s_ty_ondergrens_correctie_c(self: CPhiAnalyse):
     """Berekent de gecorrigeerde s_ty waarden voor de ondergrens analyse."""
-    formule = ((self.cphi_analyses_data_df['s\''] - sum_s2(self) / count_s2(self)) *
-               self.cphi_analyses_data_df['5pr_ondergrens_cor'])
+    formule = (_values(self, 's\'') - sum_s2(self) / count_s2(self)) * _values(self, '5pr_ondergrens_cor')
     self.cphi_analyses_data_df['s_ty_ondergrens_cor'] = formule
 
 
 def calculate_kappa_2_ondergrens_correctie_c(self: CPhiAnalyse):
     """Berekent de gecorrigeerde kappa_2 waarden voor de ondergrens analyse."""
-    formule = (self.cphi_analyses_data_df['5pr_ondergrens_cor'] - a1_kar(self) -
-               a2_kar(self) * self.cphi_analyses_data_df['s\'']) ** 2
+    formule = (_values(self, '5pr_ondergrens_cor') - a1_kar(self) - a2_kar(self) * _values(self, 's\'')) ** 2
     self.cphi_analyses_data_df['kappa_2_ondergrens_cor'] = formule
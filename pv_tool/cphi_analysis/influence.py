@@ -0,0 +1,102 @@
+"""
+Invloedsdiagnostiek per monster voor de lineaire fits van de c-phi, SHANSEP en su-tabel analyses.
+
+Voor iedere proef worden de leverage, het (gestudentiseerde) residu, Cook's distance en de regressieparameters
+zonder dat monster (leave-one-out) berekend. Alles volgt in gesloten vorm uit de sufficient statistics van de fit,
+zodat de diagnostiek ongeveer evenveel kost als één fit in plaats van n nieuwe fits.
+"""
+
+from __future__ import annotations
+
+from typing import Optional
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+import plotly.graph_objects as go
+
+from pv_tool.cphi_analysis.sufficient_statistics import SufficientStatistics
+
+INFLUENCE_COLUMNS = ['x', 'y', 'leverage', 'residu', 'residu_gestudentiseerd', 'cooks_distance',
+                     'a1_zonder_monster', 'a2_zonder_monster', 'invloedrijk']
+
+
+def influence_diagnostics(x, y, index: Optional[pd.Index] = None, threshold: Optional[float] = None) -> DataFrame:
+    """
+    Invloedsdiagnostiek van de kleinste-kwadratenlijn y = a1 + a2 * x voor ieder datapunt.
+
+    Parameters
+    ----------
+    x, y: array-like
+        De onafhankelijke en afhankelijke variabele van de fit; paren met een ontbrekende waarde doen niet mee
+        en krijgen lege diagnostiek
+    index: pandas.Index, optional
+        Index van de uitvoer, bijvoorbeeld de monsternummers
+    threshold: float, optional
+        Grens voor Cook's distance waarboven een monster invloedrijk heet (standaard 4 / n)
+
+    Returns
+    -------
+    DataFrame
+        Per monster de kolommen uit INFLUENCE_COLUMNS. De leave-one-out parameters zijn a1 en a2 van de fit zonder
+        dat monster; het gestudentiseerde residu is extern (met de spreiding van de fit zonder dat monster).
+    """
+    x = pd.to_numeric(pd.Series(np.asarray(x, dtype=object)), errors='coerce').to_numpy(dtype=float)
+    y = pd.to_numeric(pd.Series(np.asarray(y, dtype=object)), errors='coerce').to_numpy(dtype=float)
+    stats = SufficientStatistics(x, y)
+    n = stats.n
+    if n < 3:
+        raise ValueError(f"Voor invloedsdiagnostiek zijn minstens 3 datapunten nodig, er zijn er {n}.")
+
+    a1, a2 = stats.intercept, stats.slope
+    dx = x - stats.mean_x
+    residual = y - a1 - a2 * x
+    leverage = 1 / n + dx ** 2 / stats.s_tt
+    sse = stats.sum_residuals_2(a1, a2)
+    s2 = sse / (n - 2)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        scaled = residual / (1 - leverage)
+        # (X'X)^-1 x_i e_i / (1 - h_i): de verandering van (a1, a2) als monster i wordt weggelaten
+        a2_loo = a2 - dx / stats.s_tt * scaled
+        a1_loo = a1 - (1 / n - stats.mean_x * dx / stats.s_tt) * scaled
+        s2_loo = (sse - residual * scaled) / (n - 3) if n > 3 else np.full_like(x, np.nan)
+        studentized = residual / np.sqrt(s2_loo * (1 - leverage))
+        cooks = residual ** 2 * leverage / (2 * s2 * (1 - leverage) ** 2)
+
+    threshold = 4 / n if threshold is None else threshold
+    return DataFrame({
+        'x': x, 'y': y, 'leverage': leverage, 'residu': residual, 'residu_gestudentiseerd': studentized,
+        'cooks_distance': cooks, 'a1_zonder_monster': a1_loo, 'a2_zonder_monster': a2_loo,
+        'invloedrijk': cooks > threshold,
+    }, index=index)
+
+
+def influence_trace(diagnostics: DataFrame, x: Optional[pd.Series] = None, y: Optional[pd.Series] = None,
+                    name: str = "Invloedrijk monster (Cook's distance)") -> go.Scatter:
+    """
+    Plotly-trace die de invloedrijke monsters omcirkelt.
+
+    Parameters
+    ----------
+    diagnostics: DataFrame
+        Uitvoer van influence_diagnostics
+    x, y: Series, optional
+        Coördinaten in de figuur als die afwijken van de x en y van de fit (bijvoorbeeld s'v en su bij een
+        fit op ln-waarden); standaard de x en y van de fit
+    name: str
+        Naam in de legenda
+    """
+    selection = diagnostics[diagnostics['invloedrijk']]
+    x_values = selection['x'] if x is None else x.loc[selection.index]
+    y_values = selection['y'] if y is None else y.loc[selection.index]
+    text = [f"{idx}<br>Cook's distance: {cooks:.2f}<br>leverage: {leverage:.2f}"
+            for idx, cooks, leverage in zip(selection.index, selection['cooks_distance'], selection['leverage'])]
+    return go.Scatter(
+        x=x_values,
+        y=y_values,
+        mode='markers',
+        marker=dict(size=16, color='rgba(0,0,0,0)', line=dict(color='red', width=2)),
+        name=name,
+        text=text,
+        hoverinfo='text'
+    )
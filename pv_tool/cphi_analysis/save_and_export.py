@@ -1,5 +1,8 @@
+import os
+import tempfile
 from typing import TYPE_CHECKING, List
 from pandas import ExcelWriter, concat
+from pv_tool.imports.excel_utils import write_formatted_sheet
 from reportlab.lib.pagesizes import A4, landscape
 from reportlab.lib import colors
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
@@ -35,14 +38,14 @@ def save_total_to_excel(self: "CPhiAnalyse", path: str):
     file_name = f"c_phi_export_test_{self.investigation_groups[0]}_{self.analysis_type}_{effective_stress}.xlsx"
     file_path = f"{path}/{file_name}"
 
-    # Hernoem de kolommen voor een ander analyse type
+    # Hernoem de kolommen voor een ander analyse type (alleen in de export, de analyse blijft S' en T gebruiken)
+    df_totaal = self.cphi_analyses_data_df
     if self.analysis_type in ['DSS_CPhi', 'DSS_SH']:
-        self.cphi_analyses_data_df = self.cphi_analyses_data_df.rename(columns={'S\'': '\u03C3 \'', 'T': '\u03C4'})
+        df_totaal = df_totaal.rename(columns={'S\'': '\u03C3 \'', 'T': '\u03C4'})
 
     # schrijf het totaal weg
-    df_totaal = self.cphi_analyses_data_df
-    with ExcelWriter(file_path, engine='openpyxl') as writer:
-        df_totaal.to_excel(writer)
+    with ExcelWriter(file_path, engine='xlsxwriter') as writer:
+        write_formatted_sheet(writer, df_totaal, sheet_name='Sheet1', table_name='CPhiTotaalTable', index=True)
 
 
 def _df_to_table_with_index(df, index_name='Index'):
@@ -214,6 +217,15 @@ def _get_manual_values_paragraphs(self: "CPhiAnalyse", styles) -> list:
     return paragraphs
 
 
+def _remove_temp_file(fig_path: str):
+    """Verwijdert een tijdelijk plotbestand; een mislukte verwijdering geeft alleen een waarschuwing."""
+    try:
+        if os.path.exists(fig_path):
+            os.remove(fig_path)
+    except Exception as e:
+        print(f"Waarschuwing: Kon tijdelijk plot bestand niet verwijderen {fig_path}: {e}")
+
+
 def save_to_pdf(self: "CPhiAnalyse", path: str) -> str:
     """
     Slaat de analyseresultaten op in een PDF-document, inclusief figuren, datatabellen en numerieke resultaten.
@@ -246,8 +258,10 @@ def save_to_pdf(self: "CPhiAnalyse", path: str) -> str:
                  f"{str(self.effective_stress).replace('%', 'procent_').replace(' ', '')}.pdf")
     file_path = f"{path}/{file_name}"
 
-    # Maak en bewaar de figuur alleen als deze nog niet bestaat
-    fig_path = f"{path}/temp_plot.png"
+    # Maak en bewaar de figuur alleen als deze nog niet bestaat. Het tijdelijke figuurbestand krijgt een unieke naam,
+    # zodat gelijktijdige exports naar dezelfde map (bijvoorbeeld in run_batch) elkaar niet overschrijven.
+    handle, fig_path = tempfile.mkstemp(prefix='temp_plot_', suffix='.png', dir=path)
+    os.close(handle)
     if not hasattr(self, 'figure') or len(self.figure.data) == 0:
         self.show_title = False
         self.figure = go.Figure()
@@ -256,7 +270,11 @@ def save_to_pdf(self: "CPhiAnalyse", path: str) -> str:
     self.show_title = True
     fig_width = 1280
     fig_height = 720
-    self.figure.write_image(fig_path, width=fig_width, height=fig_height, scale=4, format="png")
+    try:
+        self.figure.write_image(fig_path, width=fig_width, height=fig_height, scale=4, format="png")
+    except Exception:
+        _remove_temp_file(fig_path)
+        raise
 
     # Maak het PDF-document
     doc = SimpleDocTemplate(file_path, pagesize=landscape(A4))
@@ -266,8 +284,6 @@ def save_to_pdf(self: "CPhiAnalyse", path: str) -> str:
     story = [Paragraph(title, styles['TitleLeft']), Spacer(width=1, height=12)]
 
     # Voeg figuur toe met aangepaste grootte
-    fig_path = f"{path}/temp_plot.png"
-
     # Laad PNG en bepaal pixelafmetingen
     with PILImage.open(fig_path) as im:
         img_width_px, img_height_px = im.size
@@ -309,12 +325,7 @@ def save_to_pdf(self: "CPhiAnalyse", path: str) -> str:
     doc.build(story)
 
     # Ruim tijdelijke plot bestanden op
-    import os
-    try:
-        if os.path.exists(fig_path):
-            os.remove(fig_path)
-    except Exception as e:
-        print(f"Waarschuwing: Kon tijdelijk plot bestand niet verwijderen {fig_path}: {e}")
+    _remove_temp_file(fig_path)
 
     print(f"PDF succesvol opgeslagen op: {file_path}")
     return file_path
@@ -0,0 +1,134 @@
+"""
+Gevoeligheidsanalyse van de karakteristieke waarden en rekenwaarden voor het type verzameling (alpha) en de
+materiaalfactoren.
+
+De sufficient statistics van de (S', T)-paren worden één keer berekend; daarna wordt de regressie voor alle
+combinaties van instellingen tegelijk geëvalueerd (batched_cphi_results en batched_sh_results met een array alpha
+en materiaalfactoren). Een sweep over honderd waarden kost daardoor ongeveer evenveel als één analyse.
+"""
+
+from __future__ import annotations
+
+from typing import Optional, List, TYPE_CHECKING
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+import plotly.graph_objects as go
+from plotly.colors import qualitative
+from plotly.subplots import make_subplots
+
+from pv_tool.cphi_analysis.analysis_matrix import batched_cphi_results, batched_sh_results
+from pv_tool.cphi_analysis.bootstrap import batched_statistics
+
+if TYPE_CHECKING:
+    from pv_tool.cphi_analysis.c_phi_analysis import CPhiAnalyse
+
+SETTING_COLUMNS = ['ALPHA', 'MATERIAAL_COHESIE', 'MATERIAAL_TAN_PHI']
+COLORS = qualitative.Plotly
+
+# Parameters die standaard in de figuur van de sweep komen, per analyse
+SENSITIVITY_PARAMETERS = {
+    'CPhi': ['C_KAR', 'PHI_KAR', 'C_D', 'PHI_D'],
+    'SH': ['PHI_KAR', 'PHI_D'],
+}
+
+
+def settings_grid(**settings) -> DataFrame:
+    """
+    Alle combinaties van de opgegeven instellingen, één rij per combinatie.
+
+    Parameters
+    ----------
+    settings: float of array-like
+        Per kolom (bijvoorbeeld ALPHA) één waarde of een reeks waarden
+    """
+    values = [np.atleast_1d(np.asarray(value, dtype=float)) for value in settings.values()]
+    empty = [column for column, value in zip(settings, values) if value.size == 0]
+    if empty:
+        raise ValueError(f"Geen waarden opgegeven voor {empty}.")
+    mesh = np.meshgrid(*values, indexing='ij')
+    return DataFrame({column: grid.ravel() for column, grid in zip(settings, mesh)})
+
+
+def sensitivity_sweep(self: CPhiAnalyse, alpha=None, material_factor_cohesion=None,
+                      material_factor_tan_phi=None) -> DataFrame:
+    """
+    Berekent de resultaten van de c-phi analyse voor alle combinaties van alpha en materiaalfactoren.
+
+    Net als de bootstrap gebruikt de sweep de eerste benadering van de regressie; handmatig opgegeven waarden
+    (apply_parameters) worden niet meegenomen.
+
+    Parameters
+    ----------
+    self: CPhiAnalyse
+        Uitgevoerde c-phi analyse
+    alpha: float of array-like, optional
+        Waarde(n) voor het type verzameling (lokaal = 1.0; regionaal = 0.75); standaard de huidige instelling
+    material_factor_cohesion, material_factor_tan_phi: float of array-like, optional
+        Waarde(n) voor de materiaalfactoren; standaard de huidige instelling
+
+    Returns
+    -------
+    DataFrame
+        Eén rij per combinatie met de kolommen ALPHA, MATERIAAL_COHESIE en MATERIAAL_TAN_PHI en daarnaast dezelfde
+        resultaatkolommen als analysis_matrix (A1_KAR, PHI_KAR, C_KAR, PHI_D, ...)
+    """
+    grid = settings_grid(
+        ALPHA=self.alpha if alpha is None else alpha,
+        MATERIAAL_COHESIE=self.material_cohesie if material_factor_cohesion is None else material_factor_cohesion,
+        MATERIAAL_TAN_PHI=self.material_tan_phi if material_factor_tan_phi is None else material_factor_tan_phi,
+    )
+    data = self.cphi_analyses_data_df[['S\'', 'T']].astype(float).dropna()
+    if len(data) < 3:
+        raise ValueError(f"Voor een gevoeligheidsanalyse zijn minstens 3 (S', T)-paren nodig, "
+                         f"er zijn er {len(data)}.")
+    test_type, analysis = self.analysis_type.split('_')
+    stats = batched_statistics(data['S\''].to_numpy()[np.newaxis, :], data['T'].to_numpy()[np.newaxis, :], test_type)
+    stats = stats.iloc[np.zeros(len(grid), dtype=int)].reset_index(drop=True)
+
+    if analysis == 'SH':
+        results = batched_sh_results(stats, grid['ALPHA'].to_numpy(), grid['MATERIAAL_TAN_PHI'].to_numpy())
+    else:
+        results = batched_cphi_results(stats, grid['ALPHA'].to_numpy(), grid['MATERIAAL_COHESIE'].to_numpy(),
+                                       grid['MATERIAAL_TAN_PHI'].to_numpy())
+    return pd.concat([grid, results], axis=1)
+
+
+def sensitivity_figure(sweep: DataFrame, parameters: List[str], x: Optional[str] = None,
+                       title: Optional[str] = None) -> go.Figure:
+    """
+    Small multiples van een sweep: per parameter een deelfiguur met de parameter tegen de gevarieerde instelling.
+
+    Parameters
+    ----------
+    sweep: DataFrame
+        Uitvoer van een sensitivity_sweep
+    parameters: List
+        Resultaatkolommen die worden getoond, één deelfiguur per kolom
+    x: str, optional
+        Instelling op de x-as; standaard de eerste instelling met meer dan één waarde. Overige gevarieerde
+        instellingen worden als aparte lijnen getoond.
+    title: str, optional
+        Titel van de figuur
+    """
+    settings = [column for column in sweep.columns if column in SETTING_COLUMNS]
+    varied = [column for column in settings if sweep[column].nunique() > 1]
+    x = x if x is not None else (varied[0] if varied else settings[0])
+    line_columns = [column for column in varied if column != x]
+
+    columns = min(len(parameters), 2)
+    rows = int(np.ceil(len(parameters) / columns))
+    figure = make_subplots(rows=rows, cols=columns, subplot_titles=parameters)
+    groups = sweep.groupby(line_columns, sort=True) if line_columns else [((), sweep)]
+    for group_number, (key, group) in enumerate(groups):
+        key = key if isinstance(key, tuple) else (key,)
+        name = ', '.join(f"{column} = {value:g}" for column, value in zip(line_columns, key)) or x
+        group = group.sort_values(x)
+        for number, parameter in enumerate(parameters):
+            figure.add_trace(go.Scatter(
+                x=group[x], y=group[parameter], mode='lines+markers', name=name, legendgroup=name,
+                showlegend=number == 0, line=dict(color=COLORS[group_number % len(COLORS)])
+            ), row=number // columns + 1, col=number % columns + 1)
+    figure.update_xaxes(title_text=x)
+    figure.update_layout(title=title, template='plotly_white', height=350 * rows)
+    return figure
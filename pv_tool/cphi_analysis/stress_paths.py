@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+from typing import List
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+from pv_tool.cphi_analysis.globals import ALL_TEXTUAL_NAMES, ALL_TEXTUAL_NAMES_DSS
+
+# Proeftype -> (ALG-vlag in de Dbase, kolommen per spanningsstap, rek bij piek- en eindsterkte)
+STRESS_PATH_TYPES = {
+    'TXT': ('ALG__TRIAXIAAL', ALL_TEXTUAL_NAMES, 'TXT_SS_REK_BIJ_T_PIEK', 'TXT_SS_REK_BIJ_T_EIND'),
+    'DSS': ('ALG__DSS', ALL_TEXTUAL_NAMES_DSS, 'DSS_REK_BIJ_T_MAX', 'DSS_REK_BIJ_T_EIND'),
+}
+STRESS_PATH_COLUMNS = ['monster', 'stress_state', 'S\'', 'T']
+
+
+def _numeric_column(df: DataFrame, column: str) -> np.ndarray:
+    if column not in df.columns:
+        return np.full(len(df), np.nan)
+    return pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=float)
+
+
+def stress_paths(dbase_df: DataFrame, test_type: str, groups: List[str]) -> DataFrame:
+    """
+    Zet de spanningspaden van alle monsters van de proevenverzamelingen onder elkaar, in volgorde van het pad.
+
+    Alle spanningsstappen worden als één (monsters x stappen) matrix uit de Dbase gelezen. De volgorde binnen een
+    pad is consolidatie, de rekniveaus en eindsterkte; de pieksterkte wordt met de rek bij de piek tussen de
+    rekniveaus geplaatst (searchsorted) en komt voor de eindsterkte als die bij een grotere rek ligt. Stappen zonder
+    S' of T vallen weg. De Dbase wordt niet aangepast.
+
+    Parameters
+    ----------
+    dbase_df: DataFrame
+        De dbase_df van een Dbase
+    test_type: str
+        'TXT' of 'DSS'
+    groups: List
+        De proevenverzamelingen (PV_NAAM)
+
+    Returns
+    -------
+    DataFrame
+        De kolommen monster, stress_state, S' en T, één rij per punt van een spanningspad
+    """
+    flag, columns_per_state, rek_piek_column, rek_eind_column = STRESS_PATH_TYPES[test_type]
+    selection = dbase_df[dbase_df[flag].fillna(False).astype(bool)] if flag in dbase_df.columns else dbase_df[[]]
+    selection = selection[selection['PV_NAAM'].isin(groups)] if 'PV_NAAM' in selection.columns else selection
+
+    states = list(columns_per_state)
+    s_values = np.column_stack([_numeric_column(selection, columns_per_state[state][1]) for state in states])
+    t_values = np.column_stack([_numeric_column(selection, columns_per_state[state][2]) for state in states])
+    if test_type == 'DSS':
+        # Bij de DSS is er aan het einde van de consolidatie geen schuifspanning
+        t_values[:, states.index('consolidatie')] = 0.0
+
+    # Volgorde binnen een pad: consolidatie 0, rekniveaus 1..L, eindsterkte L + 1; de piek ligt daartussen
+    levels = [state for state in states if state.endswith('% rek')]
+    level_strains = np.array([float(state.split('%')[0]) for state in levels])
+    order = np.zeros(len(states))
+    for position, level in enumerate(levels, start=1):
+        order[states.index(level)] = position
+    order[states.index('eindsterkte')] = len(levels) + 1
+    order = np.broadcast_to(order, s_values.shape).copy()
+
+    rek_piek = _numeric_column(selection, rek_piek_column)
+    rek_eind = _numeric_column(selection, rek_eind_column)
+    piek_order = np.searchsorted(level_strains, rek_piek, side='right') + 0.5
+    with np.errstate(invalid='ignore'):
+        after_eind = (piek_order > len(levels)) & ~(rek_eind > rek_piek)
+    piek_order = np.where(after_eind, len(levels) + 1.5, piek_order)
+    # Zonder rek bij de piek blijft de piek op zijn plaats tussen het laatste rekniveau en de eindsterkte
+    order[:, states.index('pieksterkte')] = np.where(np.isnan(rek_piek), len(levels) + 0.5, piek_order)
+
+    valid = ~np.isnan(s_values) & ~np.isnan(t_values)
+    sample_number, state_number = np.nonzero(valid)
+    path_order = np.lexsort((order[valid], sample_number))
+    sample_number, state_number = sample_number[path_order], state_number[path_order]
+    return DataFrame({
+        'monster': selection.index.to_numpy()[sample_number],
+        'stress_state': np.asarray(states, dtype=object)[state_number],
+        'S\'': s_values[sample_number, state_number],
+        'T': t_values[sample_number, state_number],
+    }, columns=STRESS_PATH_COLUMNS)
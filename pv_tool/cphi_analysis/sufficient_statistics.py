@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+from functools import lru_cache
+import numpy as np
+from scipy.stats import t
+
+
+@lru_cache(maxsize=None)
+def t_quantile(q: float, degrees_of_freedom: float) -> float:
+    """Kwantiel van de Student-t-verdeling; per (kans, vrijheidsgraden) één keer berekend."""
+    return float(t.ppf(q, degrees_of_freedom))
+
+
+class SufficientStatistics:
+    """
+    Sufficient statistics van een lineaire regressie y = a1 + a2 * x.
+
+    Bij het aanmaken worden n, Σx, Σy en de (gecentreerde) kwadraatsommen Σ(x - x̄)², Σ(x - x̄)·y en Σ(y - ȳ)² in één
+    keer uit de data berekend. Alle regressie-, variantie- en betrouwbaarheidsgrootheden van de c-phi analyse volgen
+    daarna uit deze getallen, zonder de DataFrame opnieuw te doorlopen. Paren waarvan x of y ontbreekt, tellen niet
+    mee.
+    """
+
+    __slots__ = ('n', 'sum_x', 'sum_y', 'sum_xx', 'sum_xy', 's_tt', 's_ty', 's_yy')
+
+    def __init__(self, x, y):
+        """
+        Parameters
+        ----------
+        x: array-like
+            Onafhankelijke variabele, bijvoorbeeld S'
+        y: array-like
+            Afhankelijke variabele, bijvoorbeeld T
+        """
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        valid = ~np.isnan(x) & ~np.isnan(y)
+        if not valid.all():
+            x, y = x[valid], y[valid]
+
+        self.n = len(x)
+        self.sum_x = np.sum(x)
+        self.sum_y = np.sum(y)
+        self.sum_xx = np.sum(x * x)
+        self.sum_xy = np.sum(x * y)
+        mean_x = self.sum_x / self.n if self.n else np.nan
+        mean_y = self.sum_y / self.n if self.n else np.nan
+        self.s_tt = np.sum((x - mean_x) ** 2)
+        self.s_ty = np.sum((x - mean_x) * y)
+        self.s_yy = np.sum((y - mean_y) ** 2)
+
+    @property
+    def mean_x(self) -> float:
+        return self.sum_x / self.n
+
+    @property
+    def mean_y(self) -> float:
+        return self.sum_y / self.n
+
+    @property
+    def slope(self) -> float:
+        """Helling a2 van de kleinste-kwadratenlijn."""
+        return self.s_ty / self.s_tt
+
+    @property
+    def intercept(self) -> float:
+        """Snijpunt a1 van de kleinste-kwadratenlijn."""
+        return (self.sum_y - self.sum_x * self.slope) / self.n
+
+    def sum_residuals_2(self, intercept: float, slope: float) -> float:
+        """Σ(y - intercept - slope·x)² voor een willekeurige lijn."""
+        offset = self.mean_y - intercept - slope * self.mean_x
+        return self.s_yy - 2 * slope * self.s_ty + slope ** 2 * self.s_tt + self.n * offset ** 2
+
+    def slope_through_point(self, intercept: float) -> float:
+        """Helling van de kleinste-kwadratenlijn met een vast snijpunt: Σx(y - intercept) / Σx²."""
+        return (self.sum_xy - intercept * self.sum_x) / self.sum_xx
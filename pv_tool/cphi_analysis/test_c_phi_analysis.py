@@ -1,4 +1,5 @@
 import os.path
+import tempfile
 import unittest
 from typing import Literal
 
@@ -6,6 +7,19 @@ from pv_tool.imports.import_data import Dbase
 from pv_tool.utilities.utils import get_repo_root, make_temp_folder
 from pathlib import Path
 from pv_tool.cphi_analysis.c_phi_analysis import CPhiAnalyse
+from pv_tool.cphi_analysis.sufficient_statistics import SufficientStatistics, t_quantile
+from pv_tool.cphi_analysis.analysis_matrix import analysis_matrix
+from pv_tool.cphi_analysis.batch_runner import run_batch
+from pv_tool.cphi_analysis.bootstrap import bootstrap_samples
+from pv_tool.cphi_analysis.sensitivity import sensitivity_figure
+from pv_tool.cphi_analysis.expand_analysis_df import confidence_band
+from pv_tool.cphi_analysis.envelope import envelope_figure
+from pv_tool.imports.results_store import get_results_store
+from pv_tool.imports.results_journal import read_results_sheet
+from pv_tool.utilities.resources import copy_template
+import numpy as np
+import pandas as pd
+from scipy.stats import t
 
 FILE_PATH = os.path.join(get_repo_root(), "test_files")
 repo_root = get_repo_root()
@@ -49,11 +63,404 @@ def test_cphi_analyse():
     assert True
 
 
+def _make_cphi_dbase(n: int = 25, seed: int = 1) -> Dbase:
+    rng = np.random.default_rng(seed)
+    s_eff = rng.uniform(20, 200, n)
+    dbase = Dbase()
+    dbase.dbase_df = pd.DataFrame({
+        'ALG__TRIAXIAAL': True, 'ALG__DSS': True, 'PV_NAAM': 'klei',
+        'TXT_SS_S\'_15%': s_eff, 'TXT_SS_T_15%': 15 + 0.5 * s_eff + rng.normal(0, 3, n),
+        'TXT_SS_WATERGEHALTE_VOOR': rng.uniform(20, 60, n), 'TXT_SS_VOLUMEGEWICHT_NAT': rng.uniform(14, 18, n),
+    }, index=pd.Index([f'{i}_B1_1' for i in range(n)], name='ALG__BORING_MONSTERNR_ID'))
+    return dbase
+
+
+def test_sufficient_statistics():
+    rng = np.random.default_rng(0)
+    x = rng.uniform(10, 100, 40)
+    y = 3 + 0.4 * x + rng.normal(0, 2, 40)
+    x[5] = np.nan
+    stats = SufficientStatistics(x, y)
+    valid = ~np.isnan(x)
+    slope, intercept = np.polyfit(x[valid], y[valid], 1)
+    assert stats.n == 39
+    assert np.isclose(stats.slope, slope, rtol=1e-12) and np.isclose(stats.intercept, intercept, rtol=1e-12)
+    assert np.isclose(stats.sum_residuals_2(2.0, 0.45), np.sum((y[valid] - 2.0 - 0.45 * x[valid]) ** 2), rtol=1e-12)
+    origin_slope = np.linalg.lstsq(x[valid][:, np.newaxis], y[valid] - 2.0, rcond=None)[0][0]
+    assert np.isclose(stats.slope_through_point(2.0), origin_slope, rtol=1e-12)
+
+    t_quantile.cache_clear()
+    assert t_quantile(0.95, 10) == t.ppf(0.95, 10)
+    t_quantile(0.95, 10)
+    assert t_quantile.cache_info().hits == 1
+
+    # De kolommen en resultaten van de analyse volgen uit de sufficient statistics
+    analyse = CPhiAnalyse(dbase=_make_cphi_dbase(), analysis_type='TXT_CPhi', investigation_groups=['klei'],
+                          effective_stress='15% rek')
+    analyse.apply_parameters(cohesie_gem=8.0)
+    df = analyse.cphi_analyses_data_df
+    s_eff, t_values = df['S\''], df['T']
+    a2 = ((s_eff - s_eff.mean()) * t_values).sum() / ((s_eff - s_eff.mean()) ** 2).sum()
+    a1 = (t_values.sum() - s_eff.sum() * a2) / len(df)
+    assert np.isclose(analyse.gem_a2, a2, rtol=1e-12)
+    assert np.isclose(df['kappa_2'].sum(), ((t_values - a1 - a2 * s_eff) ** 2).sum(), rtol=1e-12)
+    assert np.isclose(analyse.statistics.sum_residuals_2(a1, a2), df['kappa_2'].sum(), rtol=1e-12)
+    assert np.isclose(analyse.helling_gecorrigeerd, (s_eff * (t_values - 8.0)).sum() / (s_eff ** 2).sum(),
+                      rtol=1e-12)
+    assert (df['5_pr_ondergrens'] < df['5_pr_bovengrens']).all()
+    assert np.isclose(analyse.eerste_benadering_a2_kar, analyse.statistics_ondergrens_cor.slope, rtol=1e-12)
+
+
+def test_incremental_update():
+    dbase = _make_cphi_dbase()
+    analyse = CPhiAnalyse(dbase=dbase, analysis_type='TXT_CPhi', investigation_groups=['klei'],
+                          effective_stress='15% rek')
+    # Zonder eerdere berekening past apply_settings alleen de instellingen aan
+    analyse.apply_settings(alpha=0.75)
+    assert analyse.phi_kar is None
+    assert len(analyse.update()) == 6 and analyse.update() == []
+
+    analyse.apply_settings(alpha=0.9)
+    assert analyse.phi_kar is not None
+    analyse.apply_settings(alpha=0.8)
+    assert analyse.update() == []
+    analyse.alpha = 0.85
+    assert analyse.update() == ['expand_analysis_df', 'expand_analysis_df_corrected', 'eerste_benadering_deel2',
+                                'result_values']
+    analyse.phi_kar_handmatig = 0.45
+    assert analyse.update() == ['result_values']
+    analyse.cohesie_gem_handmatig = 6.0
+    assert analyse.update() == ['expand_analysis_df_corrected', 'eerste_benadering_deel2', 'result_values']
+
+    # Incrementeel bijwerken geeft dezelfde uitkomst als de volledige analyse
+    analyse.apply_settings(alpha=0.7, material_factor_tan_phi=1.1)
+    analyse.apply_parameters(cohesie_gem=7.0)
+    incremental = analyse.get_short_results()
+    full = CPhiAnalyse(dbase=dbase, analysis_type='TXT_CPhi', investigation_groups=['klei'],
+                       effective_stress='15% rek')
+    full.apply_settings(alpha=0.7, material_factor_tan_phi=1.1)
+    full.apply_parameters(cohesie_gem=7.0, phi_kar=0.45)
+    pd.testing.assert_frame_equal(incremental, full.get_short_results())
+    pd.testing.assert_frame_equal(analyse.cphi_analyses_data_df, full.cphi_analyses_data_df)
+
+    # Een aanpassing ter plekke van de gebruikte kolommen haalt de data opnieuw op, ook zonder refresh_rows
+    phi_gem = analyse.phi_gem
+    dbase.dbase_df.loc[dbase.dbase_df.index[0], 'TXT_SS_T_15%'] = 500.0
+    analyse.apply_parameters(cohesie_gem=7.0)
+    assert analyse.phi_gem != phi_gem
+    full = CPhiAnalyse(dbase=dbase, analysis_type='TXT_CPhi', investigation_groups=['klei'],
+                       effective_stress='15% rek')
+    full.apply_settings(alpha=0.7, material_factor_tan_phi=1.1)
+    full.apply_parameters(cohesie_gem=7.0, phi_kar=0.45)
+    pd.testing.assert_frame_equal(analyse.get_short_results(), full.get_short_results())
+    dbase.dbase_df.loc[dbase.dbase_df.index[1], 'TXT_SS_WATERGEHALTE_VOOR'] = 99.0
+    assert analyse.update()[0] == 'get_cphi_data'
+    # Andere kolommen en andere proevenverzamelingen van de dbase_df laten de analyse ongemoeid
+    dbase.dbase_df.loc[dbase.dbase_df.index[1], 'TXT_SS_T_5%'] = 1.0
+    assert analyse.update() == []
+    dbase.dbase_df.loc[dbase.dbase_df.index[2], 'PV_NAAM'] = 'veen'
+    assert analyse.update()[0] == 'get_cphi_data'
+    dbase.dbase_df.loc[dbase.dbase_df.index[2], 'TXT_SS_T_15%'] = 1.0
+    assert analyse.update() == []
+    dbase.dbase_df.loc[dbase.dbase_df.index[2], 'PV_NAAM'] = 'klei'
+    assert analyse.update()[0] == 'get_cphi_data'
+
+    # Een andere proevenverzameling of analysetype haalt de data opnieuw op
+    analyse.analysis_type = 'TXT_SH'
+    assert analyse.update() == ['get_cphi_data', 'expand_analysis_df_sh', 'result_values_sh']
+    analyse.apply_settings(alpha=0.75)
+    assert analyse.update() == []
+
+
+def test_analysis_matrix():
+    dbase = _make_cphi_dbase()
+    matrix = analysis_matrix(dbase, test_types=['TXT'])
+    assert list(matrix['PV_ANALYSE']) == ['CPhi', 'SH'] and (matrix['PV_REK'] == '15% rek').all()
+    for analysis_type, row in zip(['TXT_CPhi', 'TXT_SH'], matrix.itertuples()):
+        analyse = CPhiAnalyse(dbase=dbase, analysis_type=analysis_type, investigation_groups=['klei'],
+                              effective_stress='15% rek')
+        analyse._run_sh() if analysis_type == 'TXT_SH' else analyse._run()
+        assert np.isclose(row.PHI_KAR, analyse.phi_kar, rtol=1e-9)
+        assert np.isclose(row.PHI_SD_DSTAB, analyse.st_dev_phi, rtol=1e-9)
+        if analysis_type == 'TXT_CPhi':
+            assert np.isclose(row.A1_KAR, analyse.kar_a1, rtol=1e-9)
+            assert np.isclose(row.C_KAR, analyse.c_kar, rtol=1e-9)
+            assert np.isclose(row.COH_SD_DSTAB, analyse.st_dev_c, rtol=1e-9)
+    assert analysis_matrix(dbase, test_types=['DSS']).empty
+
+
+def test_run_batch():
+    dbase = _make_cphi_dbase()
+    jobs = [('TXT_CPhi', 'klei', {'effective_stress': '15% rek', 'alpha': 0.75}),
+            ('TXT_SH', 'klei', {'effective_stress': '15% rek', 'alpha': 0.75}),
+            ('TXT_CPhi', 'onbekend', {'effective_stress': '15% rek'})]
+    with tempfile.TemporaryDirectory() as batch_dir:
+        template_path = copy_template(Path(batch_dir) / 'Template_PVtool5_0.xlsx')
+        results = run_batch(dbase, jobs, batch_dir, max_workers=2, exports=['template', 'html'])
+        assert list(results['STATUS']) == ['ok', 'ok', 'fout']
+        assert results.loc['onbekend_15% rek_TXT_CPhi', 'FOUT'].startswith('ValueError')
+        assert all(Path(html).exists() for html in results['HTML'].iloc[:2])
+
+        analyse = CPhiAnalyse(dbase=dbase, analysis_type='TXT_CPhi', investigation_groups=['klei'],
+                              effective_stress='15% rek')
+        analyse.apply_settings(alpha=0.75)
+        analyse._run()
+        stored = get_results_store(template_path).latest(
+            'Resultaten c-phi', group='klei', analysis_type='TXT_CPhi', effective_stress='15% rek')
+        assert np.isclose(stored.filter(like='PV_PHI_KAR').iloc[0], round(analyse.phi_kar, 3))
+        assert np.isclose(results.loc['klei_15% rek_TXT_CPhi', 'PV_PHI_KAR'], round(analyse.phi_kar, 3))
+
+        # Dezelfde batch opnieuw in dezelfde template vervangt de rijen in plaats van ze toe te voegen
+        run_batch(dbase, jobs, batch_dir, max_workers=1, exports=['template'])
+        assert read_results_sheet(template_path, 'Resultaten c-phi')['PV_RESULTAAT_ID'].tolist() == [
+            'klei_15% rek_TXT_CPhi', 'klei_15% rek_TXT_SH']
+
+        with np.testing.assert_raises(ValueError):
+            run_batch(dbase, jobs[:1] * 2, batch_dir, max_workers=1)
+
+    # Handmatige parameters worden bij een SH analyse niet gebruikt
+    with np.testing.assert_raises(ValueError):
+        run_batch(dbase, [('TXT_SH', 'klei', {'effective_stress': '15% rek', 'phi_kar': 0.5})], '.',
+                  max_workers=1)
+
+
+def test_bootstrap():
+    analyse = CPhiAnalyse(dbase=_make_cphi_dbase(), analysis_type='TXT_CPhi', investigation_groups=['klei'],
+                          effective_stress='15% rek')
+    intervals = analyse.bootstrap(n_resamples=2000, seed=3)
+    pd.testing.assert_frame_equal(intervals, analyse.bootstrap(n_resamples=2000, seed=3))
+    assert np.isclose(intervals.loc['PHI_KAR', 'analytisch'], analyse.phi_kar, rtol=1e-9)
+    assert np.isclose(intervals.loc['C_KAR', 'analytisch'], analyse.c_kar, rtol=1e-9)
+    assert (intervals['ondergrens'] <= intervals['bovengrens']).all()
+    assert intervals.loc['PHI_GEM', 'ondergrens'] < analyse.phi_gem < intervals.loc['PHI_GEM', 'bovengrens']
+
+    # De eerste resample is gelijk aan een losse regressie op dezelfde getrokken paren
+    samples = bootstrap_samples(analyse, n_resamples=5, seed=3)
+    index = np.random.default_rng(3).integers(0, 25, size=(5, 25))[0]
+    s_eff = analyse.cphi_analyses_data_df['S\''].to_numpy()[index]
+    t_values = analyse.cphi_analyses_data_df['T'].to_numpy()[index]
+    slope, intercept = np.polyfit(s_eff, t_values, 1)
+    assert np.isclose(samples.loc[0, 'A2_GEM'], slope) and np.isclose(samples.loc[0, 'A1_GEM'], intercept)
+
+
+def test_influence_diagnostics():
+    analyse = CPhiAnalyse(dbase=_make_cphi_dbase(), analysis_type='TXT_CPhi', investigation_groups=['klei'],
+                          effective_stress='15% rek')
+    diagnostics = analyse.influence_diagnostics()
+    s_eff = analyse.cphi_analyses_data_df['S\''].to_numpy(dtype=float)
+    t_values = analyse.cphi_analyses_data_df['T'].to_numpy(dtype=float)
+
+    # Gesloten vorm gelijk aan n losse fits zonder het betreffende monster
+    for i in range(len(s_eff)):
+        keep = np.arange(len(s_eff)) != i
+        slope, intercept = np.polyfit(s_eff[keep], t_values[keep], 1)
+        assert np.isclose(diagnostics['a2_zonder_monster'].iloc[i], slope, rtol=1e-9)
+        assert np.isclose(diagnostics['a1_zonder_monster'].iloc[i], intercept, rtol=1e-9)
+        assert np.isclose(diagnostics['phi_gem_zonder_monster'].iloc[i], np.degrees(np.arcsin(slope)), rtol=1e-9)
+    assert np.isclose(diagnostics['leverage'].sum(), 2)
+
+    analyse.set_figure(plot_invloed=True)
+    assert any(trace.name.startswith('Invloedrijk') for trace in analyse.figure.data)
+
+    sh_analyse = CPhiAnalyse(dbase=_make_cphi_dbase(), analysis_type='TXT_SH', investigation_groups=['klei'],
+                             effective_stress='15% rek')
+    try:
+        sh_analyse.influence_diagnostics()
+        raise AssertionError("Verwacht een ValueError voor een SH analyse")
+    except ValueError:
+        pass
+
+
+def test_sensitivity_sweep():
+    analyse = CPhiAnalyse(dbase=_make_cphi_dbase(), analysis_type='TXT_CPhi', investigation_groups=['klei'],
+                          effective_stress='15% rek')
+    sweep = analyse.sensitivity_sweep(alpha=np.linspace(0.75, 1.0, 100), material_factor_cohesion=[1.0, 1.25])
+    assert len(sweep) == 200
+
+    # Iedere rij is gelijk aan een volledige analyse met die instellingen
+    for alpha, material_factor_cohesion in [(0.75, 1.0), (1.0, 1.25)]:
+        single = CPhiAnalyse(dbase=_make_cphi_dbase(), analysis_type='TXT_CPhi', investigation_groups=['klei'],
+                             effective_stress='15% rek')
+        single.apply_settings(alpha=alpha, material_factor_cohesion=material_factor_cohesion)
+        single.update()
+        row = sweep[np.isclose(sweep['ALPHA'], alpha) &
+                    (sweep['MATERIAAL_COHESIE'] == material_factor_cohesion)].iloc[0]
+        assert np.isclose(row['PHI_KAR'], single.phi_kar, rtol=1e-9)
+        assert np.isclose(row['C_KAR'], single.c_kar, rtol=1e-9)
+        assert np.isclose(row['C_D'], single.c_d, rtol=1e-9)
+
+    figure = sensitivity_figure(sweep, ['C_KAR', 'PHI_KAR', 'C_D'])
+    assert len(figure.data) == 2 * 3
+
+
+def test_missing_pairs():
+    dbase = _make_cphi_dbase(n=25)
+    dbase.dbase_df.loc[dbase.dbase_df.index[[2, 9, 17]], 'TXT_SS_T_15%'] = np.nan
+    complete = Dbase()
+    complete.dbase_df = dbase.dbase_df.dropna(subset=['TXT_SS_T_15%'])
+
+    for analysis_type in ['TXT_CPhi', 'TXT_SH']:
+        analyses = [CPhiAnalyse(dbase=source, analysis_type=analysis_type, investigation_groups=['klei'],
+                                effective_stress='15% rek') for source in (dbase, complete)]
+        for analyse in analyses:
+            analyse.update()
+        # Monsters zonder T doen nergens mee: het s'-raster eindigt bij de grootste S' van de volledige paren
+        assert len(analyses[0].cphi_analyses_data_df) == 22
+        for attribute in ['phi_gem', 'phi_kar', 'phi_d']:
+            assert getattr(analyses[0], attribute) == getattr(analyses[1], attribute), attribute
+        if analysis_type == 'TXT_CPhi':
+            assert np.isclose(analyses[0].cphi_analyses_data_df['s\''].max(),
+                              complete.dbase_df['TXT_SS_S\'_15%'].max())
+            assert analyses[0].c_kar == analyses[1].c_kar
+            matrix = analysis_matrix(dbase, test_types=['TXT'], effective_stresses=['15% rek'], analyses=['CPhi'],
+                                     alpha=analyses[0].alpha)
+            assert np.isclose(matrix['PHI_KAR'].iloc[0], analyses[0].phi_kar, rtol=1e-9)
+            assert np.isclose(matrix['C_KAR'].iloc[0], analyses[0].c_kar, rtol=1e-9)
+
+
+def test_confidence_band():
+    analyse = CPhiAnalyse(dbase=_make_cphi_dbase(n=6), analysis_type='TXT_CPhi', investigation_groups=['klei'],
+                          effective_stress='15% rek')
+    analyse.update()
+    df = analyse.cphi_analyses_data_df
+
+    # Het raster van de analyse is gelijk aan dat van de oorspronkelijke lus
+    s_eff = df['S\''].to_numpy(dtype=float)
+    expected = [s_eff.min()]
+    for _ in range(1, len(df)):
+        expected.append(expected[-1] + (s_eff.max() - s_eff.min()) / (len(s_eff) - 1))
+    assert np.array_equal(df['s\''].to_numpy(), np.asarray(expected))
+
+    # Op de s' van de analyse geeft het interval dezelfde waarden als de kolommen
+    band = confidence_band(analyse, s_values=df['s\''])
+    for column in ['5_pr_ondergrens', '5_pr_bovengrens', '5pr_ondergrens_cor', '5pr_bovengrens_cor']:
+        assert np.array_equal(band[column].to_numpy(), df[column].to_numpy(dtype=float))
+
+    # De figuur gebruikt een vast raster, los van het aantal monsters
+    analyse.apply_settings(band_resolution=150)
+    analyse.set_figure()
+    lines = [trace for trace in analyse.figure.data if trace.name in ['5% ondergrens', '5% bovengrens']]
+    assert [len(trace.x) for trace in lines] == [150, 150]
+    assert np.isclose(lines[0].x[0], s_eff.min()) and np.isclose(lines[0].x[-1], s_eff.max())
+    # Beide grenzen komen uit één betrouwbaarheidsinterval op het figuurraster
+    band = confidence_band(analyse, resolution=150)
+    assert np.array_equal(lines[0].x, lines[1].x)
+    assert np.allclose(lines[0].y, band['5pr_bovengrens_cor']) and np.allclose(lines[1].y, band['5pr_ondergrens_cor'])
+
+
+def test_stress_paths():
+    dbase = _make_cphi_dbase(n=3)
+    df = dbase.dbase_df
+    for s_column, t_column, s_value in [('2%', '2%', 30.0), ('5%', '5%', 40.0), ('BIJ_T_PIEK', 'PIEK', 45.0),
+                                        ('BIJ_T_EIND', 'EIND', 50.0)]:
+        df[f'TXT_SS_S\'_{s_column}'] = s_value
+        df[f'TXT_SS_T_{t_column}'] = s_value / 2
+    df['TXT_SS_S\'_EIND_CONSOLIDATIE'] = 20.0
+    df['TXT_SS_T_EIND_CONSOLIDATIE'] = 5.0
+    df['TXT_SS_REK_BIJ_T_PIEK'] = [1.0, 7.0, 20.0]
+    df['TXT_SS_REK_BIJ_T_EIND'] = [20.0, 20.0, 18.0]
+    df.loc[df.index[0], 'TXT_SS_T_5%'] = np.nan
+    before = df.copy()
+
+    analyse = CPhiAnalyse(dbase=dbase, analysis_type='TXT_CPhi', investigation_groups=['klei'],
+                          effective_stress='15% rek')
+    paths = analyse.get_stress_paths()
+    order = paths.groupby('monster', sort=False)['stress_state'].apply(list)
+    # De piek staat op de plek van de rek bij de piek; stappen zonder T vallen weg
+    assert order.iloc[0] == ['consolidatie', 'pieksterkte', '2% rek', '15% rek', 'eindsterkte']
+    assert order.iloc[1] == ['consolidatie', '2% rek', '5% rek', 'pieksterkte', '15% rek', 'eindsterkte']
+    assert order.iloc[2] == ['consolidatie', '2% rek', '5% rek', '15% rek', 'eindsterkte', 'pieksterkte']
+    pd.testing.assert_frame_equal(dbase.dbase_df, before)
+
+    analyse.update()
+    analyse.plot_spanningspaden()
+    assert [trace.name for trace in analyse.figure.data] == ['s\'-t curve', 'K0']
+    assert len(analyse.figure.data[1].x) == 3
+
+
+def test_strength_envelope():
+    dbase = _make_cphi_dbase(n=30)
+    df = dbase.dbase_df
+    rng = np.random.default_rng(2)
+    for level, slope in [('2%', 0.3), ('5%', 0.4)]:
+        df[f'TXT_SS_S\'_{level}'] = df['TXT_SS_S\'_15%']
+        df[f'TXT_SS_T_{level}'] = 10 + slope * df['TXT_SS_S\'_15%'] + rng.normal(0, 3, len(df))
+    df.loc[df.index[:3], 'TXT_SS_T_2%'] = np.nan
+
+    for analysis_type in ['TXT_CPhi', 'TXT_SH']:
+        analyse = CPhiAnalyse(dbase=dbase, analysis_type=analysis_type, investigation_groups=['klei'],
+                              effective_stress='15% rek')
+        analyse.apply_settings(alpha=0.9, material_factor_cohesion=1.25, material_factor_tan_phi=1.2)
+        envelope = analyse.strength_envelope()
+        assert list(envelope['PV_REK']) == ['2% rek', '5% rek', '15% rek']
+        assert list(envelope['AANTAL']) == [27, 30, 30]
+        # Gelijk aan analysis_matrix en aan een losse analyse per rekniveau, ook met ontbrekende paren (2% rek)
+        matrix = analysis_matrix(dbase, test_types=['TXT'], analyses=[analysis_type.split('_')[1]],
+                                 alpha=0.9, material_cohesie=1.25, material_tan_phi=1.2)
+        pd.testing.assert_frame_equal(envelope.set_index('PV_REK').sort_index(),
+                                      matrix.set_index('PV_REK')[envelope.columns[1:]].sort_index())
+        for _, row in envelope.iterrows():
+            single = CPhiAnalyse(dbase=dbase, analysis_type=analysis_type, investigation_groups=['klei'],
+                                 effective_stress=row['PV_REK'])
+            single.apply_settings(alpha=0.9, material_factor_cohesion=1.25, material_factor_tan_phi=1.2)
+            single.update()
+            assert len(single.cphi_analyses_data_df) == row['AANTAL']
+            columns = [('PHI_GEM', 'phi_gem'), ('PHI_KAR', 'phi_kar'), ('PHI_D', 'phi_d')]
+            if analysis_type == 'TXT_CPhi':
+                columns += [('C_GEM', 'c_gem'), ('C_KAR', 'c_kar'), ('C_D', 'c_d')]
+            for column, attribute in columns:
+                assert np.isclose(row[column], getattr(single, attribute), rtol=1e-9), (row['PV_REK'], column)
+
+        figure = envelope_figure(analyse, envelope)
+        assert len(figure.data) == 3 * len(envelope)
+        assert len(figure.data[0].x) == 27
+
+    assert list(analyse.strength_envelope(['eindsterkte', '5% rek'])['PV_REK']) == ['5% rek']
+    try:
+        analyse.strength_envelope(['3% rek'])
+        assert False, "Een onbekend rekniveau moet een ValueError geven"
+    except ValueError:
+        pass
+
+
 class TestImportAndValidate(unittest.TestCase):
 
     def test_cphi_analyse(self):
         test_cphi_analyse()
 
+    def test_sufficient_statistics(self):
+        test_sufficient_statistics()
+
+    def test_incremental_update(self):
+        test_incremental_update()
+
+    def test_analysis_matrix(self):
+        test_analysis_matrix()
+
+    def test_run_batch(self):
+        test_run_batch()
+
+    def test_bootstrap(self):
+        test_bootstrap()
+
+    def test_influence_diagnostics(self):
+        test_influence_diagnostics()
+
+    def test_sensitivity_sweep(self):
+        test_sensitivity_sweep()
+
+    def test_missing_pairs(self):
+        test_missing_pairs()
+
+    def test_confidence_band(self):
+        test_confidence_band()
+
+    def test_stress_paths(self):
+        test_stress_paths()
+
+    def test_strength_envelope(self):
+        test_strength_envelope()
+
     def test_creating_figures(self):
         """Test het aanmaken van figuren en save_fig_html functionaliteit voor CPhiAnalyse."""
         dbase = Dbase()
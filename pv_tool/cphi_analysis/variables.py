@@ -6,27 +6,51 @@ from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from pv_tool.cphi_analysis.c_phi_analysis import CPhiAnalyse
 import numpy as np
-from scipy.stats import t
+
+from pv_tool.cphi_analysis.sufficient_statistics import SufficientStatistics, t_quantile
+
+
+def statistics(self: CPhiAnalyse) -> SufficientStatistics:
+    """Sufficient statistics van S' en T (één keer per analyse berekend in get_cphi_data)."""
+    if self.statistics is None:
+        self.statistics = SufficientStatistics(self.cphi_analyses_data_df['S\''], self.cphi_analyses_data_df['T'])
+    return self.statistics
+
+
+def statistics_ondergrens(self: CPhiAnalyse) -> SufficientStatistics:
+    """Sufficient statistics van s' en de 5% ondergrens."""
+    if self.statistics_ondergrens is None:
+        self.statistics_ondergrens = SufficientStatistics(self.cphi_analyses_data_df['s\''],
+                                                          self.cphi_analyses_data_df['5_pr_ondergrens'])
+    return self.statistics_ondergrens
+
+
+def statistics_ondergrens_gecorrigeerd(self: CPhiAnalyse) -> SufficientStatistics:
+    """Sufficient statistics van s' en de gecorrigeerde 5% ondergrens."""
+    if self.statistics_ondergrens_cor is None:
+        self.statistics_ondergrens_cor = SufficientStatistics(self.cphi_analyses_data_df['s\''],
+                                                              self.cphi_analyses_data_df['5pr_ondergrens_cor'])
+    return self.statistics_ondergrens_cor
 
 
 def count_s(self: CPhiAnalyse):
-    return self.cphi_analyses_data_df['S\''].count()
+    return statistics(self).n
 
 
 def sum_s(self: CPhiAnalyse):
-    return self.cphi_analyses_data_df['S\''].sum()
+    return statistics(self).sum_x
 
 
 def sum_t(self: CPhiAnalyse):
-    return self.cphi_analyses_data_df['T'].sum()
+    return statistics(self).sum_y
 
 
 def sum_s_tt(self: CPhiAnalyse):
-    return self.cphi_analyses_data_df['s_tt'].sum()
+    return statistics(self).s_tt
 
 
 def sum_s_ty(self: CPhiAnalyse):
-    return self.cphi_analyses_data_df['s_ty'].sum()
+    return statistics(self).s_ty
 
 
 def e_a2(self: CPhiAnalyse):
@@ -38,7 +62,7 @@ def e_a1(self: CPhiAnalyse):
 
 
 def sum_kappa_2(self: CPhiAnalyse):
-    return self.cphi_analyses_data_df['kappa_2'].sum()
+    return statistics(self).sum_residuals_2(e_a1(self), e_a2(self))
 
 
 def var_a2(self: CPhiAnalyse):
@@ -69,13 +93,13 @@ def sigma_a1(self: CPhiAnalyse):
 def t_n_2(self: CPhiAnalyse):
     significantieniveau = 0.1
     degrees_of_freedom = count_s(self) - 2
-    return t.ppf(1 - significantieniveau / 2, degrees_of_freedom)
+    return t_quantile(1 - significantieniveau / 2, degrees_of_freedom)
 
 
 def t_n_2_sh(self: CPhiAnalyse):
     significantieniveau = 0.05
     degrees_of_freedom = count_s(self) - 1
-    return t.ppf(significantieniveau, degrees_of_freedom)
+    return t_quantile(significantieniveau, degrees_of_freedom)
 
 
 def gem_ln_tan_a_sh(self: CPhiAnalyse):
@@ -103,23 +127,23 @@ def var_a2_boven_sh(self: CPhiAnalyse):
 
 
 def sum_s2(self: CPhiAnalyse):
-    return self.cphi_analyses_data_df['s\''].sum()
+    return statistics_ondergrens(self).sum_x
 
 
 def count_s2(self: CPhiAnalyse):
-    return self.cphi_analyses_data_df['s\''].count()
+    return statistics_ondergrens(self).n
 
 
 def sum_5pr_ondergrens(self: CPhiAnalyse):
-    return self.cphi_analyses_data_df['5_pr_ondergrens'].sum()
+    return statistics_ondergrens(self).sum_y
 
 
 def sum_s_tt_ondergrens(self: CPhiAnalyse):
-    return self.cphi_analyses_data_df['s_tt_ondergrens'].sum()
+    return statistics_ondergrens(self).s_tt
 
 
 def sum_s_ty_ondergrens(self: CPhiAnalyse):
-    return self.cphi_analyses_data_df['s_ty_ondergrens'].sum()
+    return statistics_ondergrens(self).s_ty
 
 
 def a2_kar(self: CPhiAnalyse):
@@ -132,11 +156,11 @@ def a1_kar(self: CPhiAnalyse):
 
 
 def sum_5_pr_ondergrens_gecorrigeerd(self: CPhiAnalyse):
-    return self.cphi_analyses_data_df['5pr_ondergrens_cor'].sum()
+    return statistics_ondergrens_gecorrigeerd(self).sum_y
 
 
 def sum_s_ty_ondergrens_gecorrigeerd(self: CPhiAnalyse):
-    return self.cphi_analyses_data_df['s_ty_ondergrens_cor'].sum()
+    return statistics_ondergrens_gecorrigeerd(self).s_ty
 
 
 def a2_kar_gecorrigeerd(self: CPhiAnalyse):
@@ -148,7 +172,7 @@ def a1_kar_gecorrigeerd(self: CPhiAnalyse):
 
 
 def sum_kappa_2_2pr_gecorrigeerd(self: CPhiAnalyse):
-    return self.cphi_analyses_data_df['kappa_2_2pr_cor'].sum()
+    return statistics(self).sum_residuals_2(coh_gem(self), helling_gecor(self))
 
 
 def var_a2_gecorrigeerd(self: CPhiAnalyse):
@@ -169,39 +193,25 @@ def sigma_a1_gecorrigeerd(self: CPhiAnalyse):
     return np.sqrt(var_a1_gecorrigeerd(self))
 
 
+def coh_gem(self: CPhiAnalyse):
+    """Gemiddelde cohesie: de handmatige waarde, of anders de eerste benadering."""
+    if self.cohesie_gem_handmatig is not None:
+        return self.cohesie_gem_handmatig
+    return self.eerste_benadering_a1_gem
+
+
 def helling_gecor(self: CPhiAnalyse):
     """Berekent de gecorrigeerde helling."""
     if self.cohesie_gem_handmatig is not None:
-        x_values = self.cphi_analyses_data_df['S\'']
-        y_values = self.cphi_analyses_data_df['correctie_t']
-
         # Valideer of er voldoende data is
-        if len(x_values) == 0 or len(y_values) == 0:
-            raise ValueError(f"Onvoldoende data voor helling berekening. Aantal datapunten: {len(x_values)}")
-
-        if len(x_values) != len(y_values):
-            raise ValueError(
-                f"Dimensie mismatch: x_values heeft {len(x_values)} elementen, "
-                f"y_values heeft {len(y_values)} elementen")
-
-        # Controleer op NaN waarden
-        x_clean = x_values.dropna()
-        y_clean = y_values.dropna()
-
-        if len(x_clean) < 2 or len(y_clean) < 2:
-            raise ValueError(
-                f"Onvoldoende geldige datapunten voor regressie. Geldige x: {len(x_clean)}, geldige y: {len(y_clean)}")
-
-        # Zorg ervoor dat we de juiste indices gebruiken
-        valid_indices = x_values.notna() & y_values.notna()
-        if valid_indices.sum() < 2:
-            raise ValueError(f"Onvoldoende geldige datapunt paren voor regressie: {valid_indices.sum()}")
-
-        x_array = np.array(x_values[valid_indices])[:, np.newaxis]
-        y_array = np.array(y_values[valid_indices])
-
-        helling, residuals, rank, singular_values = np.linalg.lstsq(x_array, y_array, rcond=None)
-        return float(helling[0])
+        if len(self.cphi_analyses_data_df) == 0:
+            raise ValueError("Onvoldoende data voor helling berekening. Aantal datapunten: 0")
+
+        # Regressie door het punt (0, cohesie_gem), alleen over paren zonder NaN
+        stats = statistics(self)
+        if stats.n < 2:
+            raise ValueError(f"Onvoldoende geldige datapunt paren voor regressie: {stats.n}")
+        return float(stats.slope_through_point(self.cohesie_gem_handmatig))
     else:
         helling = sum_s_ty(self) / sum_s_tt(self)
         return float(helling)
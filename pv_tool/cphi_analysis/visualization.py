@@ -9,6 +9,12 @@ from typing import Optional, List
 from pv_tool.cphi_analysis.globals import (TEXTUAL_NAMES, TEXTUAL_NAMES_DSS, NEW_COLUMN_NAMES)
 from pandas import DataFrame
 import numpy as np
+from pv_tool.cphi_analysis.expand_analysis_df import confidence_band
+
+
+def figure_band(self: CPhiAnalyse) -> DataFrame:
+    """Het betrouwbaarheidsinterval op het raster voor de figuren (zie apply_settings: band_resolution)."""
+    return confidence_band(self, s_values=self.band_s_values, resolution=self.band_resolution)
 
 
 def add_proefresultaten(self: CPhiAnalyse):
@@ -75,10 +81,10 @@ def add_extra_proefresultaten(self: CPhiAnalyse, extra_groepen: Optional[List]):
         n += 1
 
 
-def add_5pr_bovengrens(self: CPhiAnalyse):
-    """Deze functie voegt de 5% bovengrens toe aan de figuur."""
-    x_5pr = self.cphi_analyses_data_df['s\'']
-    y_5pr = self.cphi_analyses_data_df['5pr_bovengrens_cor']
+def add_5pr_bovengrens(self: CPhiAnalyse, band: DataFrame):
+    """Deze functie voegt de 5% bovengrens uit het betrouwbaarheidsinterval band (zie figure_band) toe aan de figuur."""
+    x_5pr = band['s\'']
+    y_5pr = band['5pr_bovengrens_cor']
 
     self.figure.add_trace(
         go.Scatter(
@@ -120,10 +126,10 @@ def add_raaklijn_kar_boven(self: CPhiAnalyse):
     )
 
 
-def add_5pr_ondergrens(self: CPhiAnalyse):
-    """Deze functie voegt de 5% bovengrens toe aan de figuur."""
-    x_5pr = self.cphi_analyses_data_df['s\'']
-    y_5pr = self.cphi_analyses_data_df['5pr_ondergrens_cor']
+def add_5pr_ondergrens(self: CPhiAnalyse, band: DataFrame):
+    """Deze functie voegt de 5% ondergrens uit het betrouwbaarheidsinterval band (zie figure_band) toe aan de figuur."""
+    x_5pr = band['s\'']
+    y_5pr = band['5pr_ondergrens_cor']
 
     self.figure.add_trace(
         go.Scatter(
@@ -262,89 +268,90 @@ def add_gemiddelde_sh(self: CPhiAnalyse):
     )
 
 
-def _get_marker_direction(stress_df):
+def _marker_directions(dx: np.ndarray, dy: np.ndarray) -> np.ndarray:
     """
-        Bepaalt de richting van de marker op basis van het eerste segment van het spanningspad.
-
-        Parameters
-        ----------
-        stress_df : DataFrame
-            DataFrame met kolommen 'S\'' en 'T' voor de spanningswaarden
-
-        Returns
-        -------
-        str
-            Symbol naam voor de marker ('triangle-up', 'triangle-down', 'triangle-left', of 'triangle-right')
-        """
-    if len(stress_df) < 2:
-        return 'triangle-up'
-
-    dx = stress_df['S\''].iloc[1] - stress_df['S\''].iloc[0]
-    dy = stress_df['T'].iloc[1] - stress_df['T'].iloc[0]
-
-    # Bepaal dominante richting
-    if abs(dx) > abs(dy):
-        return 'triangle-right' if dx > 0 else 'triangle-left'
-    else:
-        return 'triangle-up' if dy > 0 else 'triangle-down'
+    Bepaalt de richting van de marker op basis van het eerste segment van ieder spanningspad.
 
+    Parameters
+    ----------
+    dx, dy : np.ndarray
+        Verandering van S' en T over het eerste segment (NaN als het pad maar één punt heeft)
 
-def add_stress_paths(self: CPhiAnalyse, sample_stress_paths: dict) -> None:
+    Returns
+    -------
+    np.ndarray
+        Symbol naam per pad ('triangle-up', 'triangle-down', 'triangle-left', of 'triangle-right')
+    """
+    horizontal = np.abs(dx) > np.abs(dy)
+    symbols = np.where(horizontal, np.where(dx > 0, 'triangle-right', 'triangle-left'),
+                       np.where(dy > 0, 'triangle-up', 'triangle-down'))
+    return np.where(np.isnan(dx) | np.isnan(dy), 'triangle-up', symbols)
+
+
+def add_stress_paths(self: CPhiAnalyse, paths: DataFrame) -> None:
     """
     Plot de spanningspaden voor alle beschikbare effective stress waarden.
     Verbindt de punten van verschillende rekpercentages voor hetzelfde monster.
 
+    Alle paden komen in één lijn-trace (gescheiden door lege punten) en alle startpunten in één marker-trace, zodat
+    ook een verzameling met honderden proeven direct getekend wordt.
+
     Parameters
     ----------
     self : CPhiAnalyse
         De CPhi-class wordt gebruikt als imput voor deze functie.
-    sample_stress_paths : dict
-        Dictionary met als key de monsternaam en als value een DataFrame met kolommen
-        'S\'', 'T' en 'stress_state' voor de spanningswaarden
+    paths : DataFrame
+        Uitvoer van stress_paths: de kolommen 'monster', 'stress_state', 'S\'' en 'T', per monster in de volgorde
+        van het pad
     """
-    first_sample = True
-    for sample_name, stress_df in sample_stress_paths.items():
-        # Bepaal de richting van de marker
-        marker_symbol = _get_marker_direction(stress_df=stress_df)
+    samples = paths['monster'].to_numpy()
+    s_values, t_values = paths['S\''].to_numpy(dtype=float), paths['T'].to_numpy(dtype=float)
+    first = np.r_[True, samples[1:] != samples[:-1]]
+    starts = np.flatnonzero(first)
+    text = [f"{sample} - {state}<br>S\':{s:.1f}, T:{t:.1f}"
+            for sample, state, s, t in zip(samples, paths['stress_state'], s_values, t_values)]
+
+    # Een leeg punt voor ieder nieuw monster onderbreekt de lijn
+    gaps = starts[1:]
+    x_line = np.insert(s_values, gaps, np.nan)
+    y_line = np.insert(t_values, gaps, np.nan)
+    text_line = np.insert(np.asarray(text, dtype=object), gaps, None)
 
-        # Voeg de spanningspad lijn toe voor dit monster
-        self.figure.add_trace(
-            go.Scatter(
-                x=stress_df['S\''],
-                y=stress_df['T'],
-                mode='lines+markers',
-                line=dict(color='lightgray', width=1),
-                marker=dict(color='lightgray', size=1),
-                name='s\'-t curve' if first_sample else f'Spanningspad {sample_name}',
-                text=[f"{sample_name} - {state}<br>S\':{s:.1f}, T:{t:.1f}"
-                      for state, s, t in zip(stress_df['stress_state'], stress_df['S\''], stress_df['T'])],
-                hoverinfo='text',
-                showlegend=first_sample,
-                legendgroup='spanningspaden'  # Groepeer alle spanningspad traces
-            )
+    self.figure.add_trace(
+        go.Scatter(
+            x=x_line,
+            y=y_line,
+            mode='lines+markers',
+            line=dict(color='lightgray', width=1),
+            marker=dict(color='lightgray', size=1),
+            name='s\'-t curve',
+            text=text_line,
+            hoverinfo='text',
+            legendgroup='spanningspaden'  # Groepeer alle spanningspaden
         )
+    )
 
-        # Voeg het eerste punt toe met een speciaal symbool
-        self.figure.add_trace(
-            go.Scatter(
-                x=[stress_df['S\''].iloc[0]],
-                y=[stress_df['T'].iloc[0]],
-                mode='markers',
-                marker=dict(
-                    symbol=marker_symbol,
-                    size=7,
-                    color='gray'
-                ),
-                name='K0' if first_sample else f'Start {sample_name}',
-                text=f"""{sample_name} - {stress_df['stress_state'].iloc[0]}<br>S':{stress_df["S'"].iloc[0]:.1f}, 
-                T:{stress_df['T'].iloc[0]:.1f}""",
-                hoverinfo='text',
-                showlegend=first_sample,
-                legendgroup='spanningspaden'  # Zelfde groep als de lijnen
-            )
+    # Het eerste punt van ieder pad met een symbool in de richting van het eerste segment
+    has_second = np.r_[~first[1:], False][starts]
+    second = np.minimum(starts + 1, len(paths) - 1)
+    dx = np.where(has_second, s_values[second] - s_values[starts], np.nan)
+    dy = np.where(has_second, t_values[second] - t_values[starts], np.nan)
+    self.figure.add_trace(
+        go.Scatter(
+            x=s_values[starts],
+            y=t_values[starts],
+            mode='markers',
+            marker=dict(
+                symbol=_marker_directions(dx, dy),
+                size=7,
+                color='gray'
+            ),
+            name='K0',
+            text=[text[start] for start in starts],
+            hoverinfo='text',
+            legendgroup='spanningspaden'  # Zelfde groep als de lijnen
         )
-
-        first_sample = False
+    )
 
 
 def set_layout(self: CPhiAnalyse):
@@ -0,0 +1,144 @@
+"""
+Inlezen van Excel-bestanden met de snelste beschikbare engine.
+
+Alle imports (Dbase, Stowa, oude PV-tool) en het opzoeken van eerdere resultaten lezen via deze module. Als
+python-calamine is geïnstalleerd wordt die (in Rust geschreven) engine gebruikt, anders openpyxl (door pandas
+read-only geopend). Beide engines geven dezelfde DataFrames: dezelfde kolommen, index en dtypes.
+"""
+
+from __future__ import annotations
+import importlib.util
+import time
+from pathlib import Path
+from typing import Optional
+import pandas as pd
+from pandas import DataFrame
+
+# Volgorde waarin de engines worden geprobeerd (snelste eerst), met het package dat ze nodig hebben
+ENGINE_PREFERENCE = ['calamine', 'openpyxl']
+ENGINE_MODULES = {'calamine': 'python_calamine', 'openpyxl': 'openpyxl'}
+# Aantal rijen waarin eerst naar de kopregel wordt gezocht, voordat het hele tabblad wordt ingelezen
+HEADER_SCAN_ROWS = 50
+
+_selected_engine: Optional[str] = None
+
+
+def available_engines() -> list[str]:
+    """Geeft de geïnstalleerde engines, snelste eerst."""
+    return [engine for engine in ENGINE_PREFERENCE if importlib.util.find_spec(ENGINE_MODULES[engine]) is not None]
+
+
+def set_excel_engine(engine: Optional[str] = None):
+    """
+    Legt de engine vast voor alle imports.
+
+    Parameters
+    ----------
+    engine: str, optional
+        'calamine' of 'openpyxl'; None kiest weer automatisch de snelste geïnstalleerde engine
+    """
+    global _selected_engine
+    if engine is not None and engine not in ENGINE_MODULES:
+        raise ValueError(f"Onbekende engine '{engine}'. Kies uit: {', '.join(ENGINE_PREFERENCE)}.")
+    if engine is not None and engine not in available_engines():
+        raise ImportError(f"Voor de engine '{engine}' is het package '{ENGINE_MODULES[engine]}' nodig.")
+    _selected_engine = engine
+
+
+def get_excel_engine() -> str:
+    """Geeft de engine die wordt gebruikt: de vastgelegde engine, of anders de snelste geïnstalleerde."""
+    if _selected_engine is not None:
+        return _selected_engine
+    engines = available_engines()
+    if not engines:
+        raise ImportError("Er is geen engine geïnstalleerd om Excel-bestanden te lezen (python-calamine of openpyxl).")
+    return engines[0]
+
+
+def read_excel(io, sheet_name=0, engine: Optional[str] = None, **kwargs) -> DataFrame | dict[str, DataFrame]:
+    """
+    pandas.read_excel met de snelste beschikbare engine.
+
+    Parameters
+    ----------
+    io: str, Path of pandas.ExcelFile
+        Het Excel-bestand; bij een ExcelFile wordt de engine van dat object gebruikt
+    sheet_name: str, int of list
+        Zie pandas.read_excel
+    engine: str, optional
+        Forceert een engine voor deze aanroep
+    **kwargs
+        Worden doorgegeven aan pandas.read_excel
+    """
+    if isinstance(io, pd.ExcelFile):
+        return pd.read_excel(io, sheet_name=sheet_name, **kwargs)
+    return pd.read_excel(io, sheet_name=sheet_name, engine=engine or get_excel_engine(), **kwargs)
+
+
+def excel_file(path: str | Path, engine: Optional[str] = None) -> pd.ExcelFile:
+    """Opent een Excel-bestand (om meerdere tabbladen te lezen) met de snelste beschikbare engine."""
+    return pd.ExcelFile(path, engine=engine or get_excel_engine())
+
+
+def find_header_row(io, sheet_name, column: str, engine: Optional[str] = None,
+                    scan_rows: int = HEADER_SCAN_ROWS) -> Optional[int]:
+    """
+    Zoekt de (0-based) rij waarin een kolomnaam staat.
+
+    Eerst worden alleen de eerste scan_rows rijen gelezen; pas als de kolomnaam daar niet in staat, wordt het hele
+    tabblad doorzocht. Geeft None als de kolomnaam niet voorkomt.
+    """
+    for nrows in (scan_rows, None):
+        raw = read_excel(io, sheet_name=sheet_name, header=None, nrows=nrows, engine=engine)
+        matches = (raw == column).any(axis=1).to_numpy().nonzero()[0]
+        if len(matches):
+            return int(matches[0])
+        if nrows is not None and len(raw) < nrows:
+            break
+    return None
+
+
+def benchmark_excel_reader(file_path: str | Path, sheet_name=0, repeat: int = 3, **kwargs) -> DataFrame:
+    """
+    Vergelijkt de geïnstalleerde engines op snelheid en controleert of ze dezelfde DataFrame geven.
+
+    Parameters
+    ----------
+    file_path: str of Path
+        Het Excel-bestand, bijvoorbeeld een gevulde template
+    sheet_name: str of int
+        Het tabblad dat wordt ingelezen
+    repeat: int
+        Aantal keer inlezen per engine; de snelste tijd telt
+    **kwargs
+        Worden doorgegeven aan pandas.read_excel (bijvoorbeeld skiprows)
+
+    Returns
+    -------
+    DataFrame
+        Per engine de snelste leestijd (s), de versnelling t.o.v. openpyxl en of het resultaat gelijk is aan dat van
+        openpyxl (waarden, index en dtypes)
+    """
+    results, frames = {}, {}
+    for engine in available_engines():
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            frames[engine] = read_excel(file_path, sheet_name=sheet_name, engine=engine, **kwargs)
+            timings.append(time.perf_counter() - start)
+        results[engine] = min(timings)
+
+    reference = frames.get('openpyxl')
+    rows = []
+    for engine, seconds in results.items():
+        identical = None
+        if reference is not None:
+            try:
+                pd.testing.assert_frame_equal(frames[engine], reference)
+                identical = True
+            except AssertionError:
+                identical = False
+        rows.append({'engine': engine, 'seconds': seconds,
+                     'speedup': results['openpyxl'] / seconds if 'openpyxl' in results else None,
+                     'identical': identical})
+    return DataFrame(rows).set_index('engine')
@@ -1,7 +1,12 @@
+from typing import Optional
+import pandas as pd
+from pandas import DataFrame, ExcelWriter
 from openpyxl import load_workbook
 from openpyxl.worksheet.table import Table as XLTable, TableStyleInfo
 from openpyxl.utils import get_column_letter
 
+TABLE_STYLE = "TableStyleMedium2"
+
 
 def format_excel_sheet(
     file_path: str,
@@ -60,7 +65,7 @@ def format_excel_sheet(
 
     # Add a default style
     style = TableStyleInfo(
-        name="TableStyleMedium2",
+        name=TABLE_STYLE,
         showFirstColumn=False,
         showLastColumn=False,
         showRowStripes=True,
@@ -77,3 +82,96 @@ def format_excel_sheet(
     # Add the table to the worksheet
     worksheet.add_table(table)
     workbook.save(file_path)
+
+
+def column_widths(df: DataFrame, index: bool = True) -> list[int]:
+    """
+    Bepaalt de kolombreedtes (langste tekst + 2) per kolom, inclusief de index als index=True.
+    De lengtes worden per kolom in één keer berekend; lege cellen tellen niet mee.
+    """
+    columns = [df.index.to_series()] if index else []
+    columns += [df.iloc[:, position] for position in range(df.shape[1])]
+    headers = ([df.index.name] if index else []) + list(df.columns)
+    widths = []
+    for header, series in zip(headers, columns):
+        lengths = series[series.notna()].astype(str).str.len()
+        longest = int(lengths.max()) if not lengths.empty else 0
+        widths.append(max(longest, len(str(header)) if header is not None else 0) + 2)
+    return widths
+
+
+def write_formatted_sheet(
+    writer: ExcelWriter,
+    df: DataFrame,
+    sheet_name: str,
+    table_name: Optional[str] = None,
+    index: bool = True,
+    number_formats: Optional[dict] = None
+):
+    """
+    Write a DataFrame to a sheet and format it as a table with filters and column widths in the same pass.
+
+    Unlike format_excel_sheet the workbook is not reopened: the formatting is applied to the sheet that the
+    writer holds in memory, so the file is only saved once (when the writer is closed). Works with both the
+    xlsxwriter engine (new files) and the openpyxl engine (appending to an existing template).
+
+    Parameters
+    ----------
+    writer : ExcelWriter
+        Open pandas ExcelWriter
+    df : DataFrame
+        Data to write
+    sheet_name : str
+        Name of the worksheet
+    table_name : str, optional
+        Name for the Excel table. If None, will use sheet_name + "Table".
+    index : bool, default True
+        Whether to write the index as first column
+    number_formats : dict, optional
+        Excel number format per column name, for example {'PV_PHI_KAR': '0.00'}
+    """
+    df.to_excel(writer, sheet_name=sheet_name, index=index)
+    worksheet = writer.sheets[sheet_name]
+
+    if table_name is None:
+        table_name = f"{sheet_name}Table"
+    table_name = "".join(c for c in table_name if c.isalnum())
+
+    headers = ([df.index.name if df.index.name is not None else ''] if index else []) + \
+        [str(col) for col in df.columns]
+    widths = column_widths(df, index=index)
+    offset = 1 if index else 0
+    number_formats = {df.columns.get_loc(col) + offset: fmt for col, fmt in (number_formats or {}).items()
+                      if col in df.columns}
+    # Een Excel-tabel heeft unieke, niet-lege kolomkoppen en minstens één rij nodig
+    add_table = len(df) > 0 and all(headers) and len(set(headers)) == len(headers) \
+        and not isinstance(df.columns, pd.MultiIndex)
+
+    if writer.engine == 'xlsxwriter':
+        for position, width in enumerate(widths):
+            cell_format = writer.book.add_format({'num_format': number_formats[position]}) \
+                if position in number_formats else None
+            worksheet.set_column(position, position, width, cell_format)
+        if add_table:
+            worksheet.add_table(0, 0, len(df), len(headers) - 1, {
+                'name': table_name,
+                'style': 'Table Style Medium 2',
+                'columns': [{'header': header} for header in headers],
+            })
+        return worksheet
+
+    for position, width in enumerate(widths):
+        worksheet.column_dimensions[get_column_letter(position + 1)].width = width
+    for position, fmt in number_formats.items():
+        for (cell,) in worksheet.iter_rows(min_row=2, max_row=len(df) + 1, min_col=position + 1,
+                                          max_col=position + 1):
+            cell.number_format = fmt
+    if add_table:
+        for existing_table in list(worksheet.tables.values()):
+            if existing_table.name == table_name:
+                del worksheet.tables[existing_table.name]
+        table = XLTable(displayName=table_name, ref=f"A1:{get_column_letter(len(headers))}{len(df) + 1}")
+        table.tableStyleInfo = TableStyleInfo(name=TABLE_STYLE, showFirstColumn=False, showLastColumn=False,
+                                              showRowStripes=True, showColumnStripes=False)
+        worksheet.add_table(table)
+    return worksheet
@@ -0,0 +1,311 @@
+from __future__ import annotations
+import json
+from pathlib import Path
+from itertools import islice
+from typing import Iterable, Iterator, Optional
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+from pandas.io.parsers import TextParser
+from openpyxl import load_workbook
+from openpyxl.cell.cell import ERROR_CODES
+
+from pv_tool.imports.import_data import Dbase
+
+SHEET_NAME = 'Dbase5_0'
+INDEX_COLUMN = 'ALG__BORING_MONSTERNR_ID'
+
+# Koppeling tussen de proeftypes en de ALG-vlaggen in de Dbase
+TEST_TYPE_FLAGS = {
+    'TXT': 'ALG__TRIAXIAAL',
+    'DSS': 'ALG__DSS',
+    'CRS': 'ALG__CRS',
+    'SD': 'ALG__SAMENDRUKKING',
+    'CLAS': 'ALG__CLASSIFICATIE',
+}
+
+# Aantal rijen dat per keer uit een bronbestand wordt ingelezen (zie read_chunks)
+CHUNK_ROWS = 5000
+
+# Tekstkolommen waarvan per bestand alle (kleine letters) waarden in de index worden opgenomen
+CATEGORICAL_COLUMNS = ['BORING_NUMMER', 'CLAS_GRONDSOORT', 'CRS_GRONDSOORT', 'DSS_GRONDSOORT',
+                       'KV_GRONDSOORT', 'SD_GRONDSOORT', 'TXT_SS_GRONDSOORT']
+
+
+def find_header_row(file_path: Path, sheet_name: str = SHEET_NAME, max_rows: int = 50) -> int:
+    """Zoekt (zonder het hele tabblad te laden) de rij met ALG__BORING_MONSTERNR_ID."""
+    wb = load_workbook(file_path, read_only=True)
+    try:
+        if sheet_name not in wb.sheetnames:
+            raise ValueError(f"Sheet '{sheet_name}' bestaat niet in {file_path}!")
+        for idx, row in enumerate(wb[sheet_name].iter_rows(max_row=max_rows, values_only=True)):
+            if INDEX_COLUMN in row:
+                return idx
+    finally:
+        wb.close()
+    raise ValueError(f"Column '{INDEX_COLUMN}' not found in {file_path}")
+
+
+def _cell_value(value):
+    """Zet een celwaarde om zoals pandas.read_excel dat doet (leeg wordt '', foutwaarden NaN, gehele getallen int)."""
+    if value is None:
+        return ''
+    if isinstance(value, float):
+        return int(value) if value.is_integer() else value
+    if isinstance(value, str) and value in ERROR_CODES:
+        return np.nan
+    return value
+
+
+def read_chunks(file_path: str | Path, header_row: int, usecols=None,
+                chunk_rows: int = CHUNK_ROWS) -> Iterator[DataFrame]:
+    """
+    Leest het Dbase-tabblad in blokken van chunk_rows rijen, zonder het hele tabblad in het geheugen te laden.
+
+    Het tabblad wordt read-only rij voor rij doorlopen en alleen de cellen van de gevraagde kolommen worden
+    omgezet; ieder blok gaat door dezelfde parser als bij pandas.read_excel, zodat kolomnamen en dtypes
+    overeenkomen met een volledige read_excel. Er wordt altijd minstens één (eventueel leeg) blok gegeven.
+
+    Parameters
+    ----------
+    file_path: str of Path
+        Het bronbestand
+    header_row: int
+        De (0-based) rij met de kolomnamen, zie find_header_row
+    usecols: callable, optional
+        Alleen kolommen waarvoor usecols(kolomnaam) True geeft worden ingelezen
+    chunk_rows: int
+        Aantal rijen per blok
+    """
+    wb = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        sheet = wb[SHEET_NAME]
+        sheet.reset_dimensions()
+        rows = islice(sheet.iter_rows(values_only=True), header_row, None)
+        header = [_cell_value(value) for value in next(rows, ())]
+        while header and header[-1] == '':
+            header.pop()
+        positions = [position for position, name in enumerate(header) if usecols is None or usecols(name)]
+        header = [header[position] for position in positions]
+        first = True
+        while True:
+            block = []
+            for row in islice(rows, chunk_rows):
+                block.append([_cell_value(row[position]) if position < len(row) else '' for position in positions])
+            if not block and not first:
+                return
+            first = False
+            yield TextParser([header] + block, header=0).read()
+    finally:
+        wb.close()
+
+
+def _file_stats(file_path: Path, chunk_rows: int = CHUNK_ROWS) -> dict:
+    """Bepaalt de statistieken van één bronbestand, blok voor blok (zie read_chunks)."""
+    header_row = find_header_row(file_path)
+    stats = {'header_row': header_row, 'rows': 0, 'columns': [], 'groups': [], 'flags': {}, 'values': {},
+             'ranges': {}}
+    groups, values = {}, {}
+    for df in read_chunks(file_path, header_row, chunk_rows=chunk_rows):
+        stats['columns'] = [str(col) for col in df.columns]
+        df = df[df[INDEX_COLUMN].notna()] if INDEX_COLUMN in df.columns else df.iloc[:0]
+        stats['rows'] += len(df)
+        if 'PV_NAAM' in df.columns:
+            groups.update(dict.fromkeys(df['PV_NAAM'].dropna().astype(str).unique().tolist()))
+        for test_type, flag in TEST_TYPE_FLAGS.items():
+            if flag in df.columns:
+                stats['flags'][test_type] = (stats['flags'].get(test_type, 0) +
+                                             int(df[flag].fillna(False).astype(bool).sum()))
+        for col in CATEGORICAL_COLUMNS:
+            if col in df.columns:
+                values.setdefault(col, set()).update(df[col].dropna().astype(str).str.strip().str.lower())
+        for col in df.columns:
+            if col in CATEGORICAL_COLUMNS or col in TEST_TYPE_FLAGS.values() or col == 'PV_NAAM':
+                continue
+            numbers = pd.to_numeric(df[col], errors='coerce').dropna()
+            if not numbers.empty:
+                low, high = stats['ranges'].get(str(col), [np.inf, -np.inf])
+                stats['ranges'][str(col)] = [min(low, float(numbers.min())), max(high, float(numbers.max()))]
+    if INDEX_COLUMN not in stats['columns']:
+        raise ValueError(f"Column '{INDEX_COLUMN}' not found in {file_path}")
+    stats['groups'] = list(groups)
+    stats['values'] = {col: sorted(col_values) for col, col_values in values.items()}
+    return stats
+
+
+class FederatedCatalog:
+    """
+    Luie catalogus over veel Dbase-templates (bijvoorbeeld een archief van projecten).
+
+    Per bronbestand worden alleen statistieken bewaard: aantal monsters, proeven per type, de waarden van
+    PV_NAAM/BORING_NUMMER/grondsoort en het bereik van numerieke kolommen. Een query gebruikt deze statistieken om
+    bestanden over te slaan, en laadt van de overige bestanden alleen de gevraagde kolommen en de rijen die aan de
+    filters voldoen. Zowel het indexeren als een query leest de bestanden één voor één en in blokken van
+    chunk_rows rijen (read_chunks), zodat het geheugengebruik schaalt met één blok plus het resultaat.
+    """
+
+    def __init__(self, sources: Iterable[str | Path] | str | Path, cache_path: Optional[str | Path] = None,
+                 chunk_rows: int = CHUNK_ROWS):
+        """
+        Parameters
+        ----------
+        sources: Iterable[str | Path] of str of Path
+            Lijst met bestanden, of een map waarin (recursief) naar .xlsx-bestanden wordt gezocht
+        cache_path: str of Path, optional
+            JSON-bestand waarin de statistieken worden bewaard, zodat ongewijzigde bestanden niet opnieuw
+            gelezen hoeven te worden
+        chunk_rows: int
+            Aantal rijen dat per keer uit een bronbestand wordt ingelezen
+        """
+        if isinstance(sources, (str, Path)) and Path(sources).is_dir():
+            sources = sorted(p for p in Path(sources).rglob('*.xlsx') if not p.name.startswith('~$'))
+        elif isinstance(sources, (str, Path)):
+            sources = [sources]
+        self.sources = [Path(source) for source in sources]
+        self.cache_path = Path(cache_path) if cache_path is not None else None
+        self.chunk_rows = chunk_rows
+        self.stats: dict[str, dict] = {}
+
+    def build_index(self) -> DataFrame:
+        """Bouwt (of ververst) de statistieken per bronbestand en geeft een overzicht terug."""
+        cache = {}
+        if self.cache_path is not None and self.cache_path.exists():
+            cache = json.loads(self.cache_path.read_text(encoding='utf-8'))
+
+        self.stats = {}
+        for source in self.sources:
+            key = str(source.resolve())
+            stat = source.stat()
+            signature = [stat.st_mtime_ns, stat.st_size]
+            if key in cache and cache[key].get('signature') == signature:
+                self.stats[key] = cache[key]
+                continue
+            try:
+                self.stats[key] = {**_file_stats(source, self.chunk_rows), 'signature': signature}
+            except ValueError as error:
+                print(f"{source} wordt overgeslagen: {error}")
+
+        if self.cache_path is not None:
+            self.cache_path.write_text(json.dumps(self.stats), encoding='utf-8')
+        return self.overview()
+
+    def overview(self) -> DataFrame:
+        """Geeft per bronbestand het aantal monsters, proeven per type en de proevenverzamelingen."""
+        rows = []
+        for key, stats in self.stats.items():
+            row = {'BRON_BESTAND': key, 'AANTAL_MONSTERS': stats['rows']}
+            row.update({f"AANTAL_{test_type}": stats['flags'].get(test_type, 0) for test_type in TEST_TYPE_FLAGS})
+            row['PV_NAMEN'] = ', '.join(stats['groups'])
+            rows.append(row)
+        return DataFrame(rows)
+
+    @staticmethod
+    def _may_match(stats: dict, test_types: Optional[list], groups: Optional[list], where: dict) -> bool:
+        """Bepaalt op basis van de statistieken of een bestand rijen kan bevatten die aan de filters voldoen."""
+        if groups is not None and set(groups).isdisjoint(stats['groups']):
+            return False
+        if test_types and not any(stats['flags'].get(test_type, 0) > 0 for test_type in test_types):
+            return False
+        for col, condition in where.items():
+            if col not in stats['columns']:
+                return False
+            if isinstance(condition, tuple):
+                if col not in stats['ranges']:
+                    return False
+                low, high = condition
+                col_min, col_max = stats['ranges'][col]
+                if (low is not None and col_max < low) or (high is not None and col_min > high):
+                    return False
+            elif col in stats['values']:
+                wanted = {str(value).strip().lower() for value in condition}
+                if wanted.isdisjoint(stats['values'][col]):
+                    return False
+        return True
+
+    @staticmethod
+    def _row_mask(df: DataFrame, test_types: Optional[list], groups: Optional[list], where: dict) -> pd.Series:
+        mask = pd.Series(True, index=df.index)
+        if groups is not None:
+            mask &= df['PV_NAAM'].astype(str).isin(groups)
+        if test_types:
+            flags = [TEST_TYPE_FLAGS[test_type] for test_type in test_types if TEST_TYPE_FLAGS[test_type] in df]
+            mask &= df[flags].fillna(False).astype(bool).any(axis=1) if flags else False
+        for col, condition in where.items():
+            if isinstance(condition, tuple):
+                values = pd.to_numeric(df[col], errors='coerce')
+                low, high = condition
+                if low is not None:
+                    mask &= values >= low
+                if high is not None:
+                    mask &= values <= high
+            else:
+                wanted = {str(value).strip().lower() for value in condition}
+                mask &= df[col].astype(str).str.strip().str.lower().isin(wanted)
+        return mask
+
+    def query(self, test_types: Optional[list[str]] = None, groups: Optional[list[str]] = None,
+              where: Optional[dict] = None, columns: Optional[list[str]] = None) -> DataFrame:
+        """
+        Laadt de monsters die aan de filters voldoen uit alle bronbestanden.
+
+        Parameters
+        ----------
+        test_types: list[str], optional
+            Alleen monsters waarvan minstens één van deze proeven is uitgevoerd ('TXT', 'DSS', 'CRS', 'SD', 'CLAS')
+        groups: list[str], optional
+            Alleen monsters met deze PV_NAAM
+        where: dict, optional
+            Extra filters per kolom: een lijst met toegestane waarden (hoofdletterongevoelig), of een tuple
+            (min, max) voor een bereik. Bijvoorbeeld {'DSS_GRONDSOORT': ['veen'], 'MONSTER_NIVEAU_NAP_VANAF': (-10, 0)}
+        columns: list[str], optional
+            Alleen deze kolommen laden (de index en de kolom BRON_BESTAND worden altijd toegevoegd)
+
+        Returns
+        -------
+        DataFrame
+            Dbase-dataframe met ALG__BORING_MONSTERNR_ID als index en de kolom BRON_BESTAND
+        """
+        if not self.stats:
+            self.build_index()
+        for test_type in test_types or []:
+            if test_type not in TEST_TYPE_FLAGS:
+                raise ValueError(f"Onbekend proeftype '{test_type}'. Kies uit: {', '.join(TEST_TYPE_FLAGS)}.")
+        where = dict(where or {})
+        groups = list(groups) if groups is not None else None
+
+        needed = None
+        if columns is not None:
+            needed = ({INDEX_COLUMN, 'PV_NAAM'} | set(columns) | set(where)
+                      | {TEST_TYPE_FLAGS[test_type] for test_type in test_types or []})
+
+        frames = []
+        for key, stats in self.stats.items():
+            if not self._may_match(stats, test_types, groups, where):
+                continue
+            # Per blok alleen de rijen die aan de filters voldoen bewaren
+            for df in read_chunks(key, stats['header_row'], chunk_rows=self.chunk_rows,
+                                  usecols=(lambda col: col in needed) if needed is not None else None):
+                df = df[df[INDEX_COLUMN].notna()]
+                df = df[self._row_mask(df, test_types, groups, where)]
+                if df.empty:
+                    continue
+                if columns is not None:
+                    df = df[[INDEX_COLUMN] + [col for col in columns if col in df.columns]]
+                frames.append(df.assign(BRON_BESTAND=key).set_index(INDEX_COLUMN))
+
+        if not frames:
+            return DataFrame(columns=(columns or []) + ['BRON_BESTAND'], index=pd.Index([], name=INDEX_COLUMN))
+        return pd.concat(frames)
+
+    def to_dbase(self, test_types: Optional[list[str]] = None, groups: Optional[list[str]] = None,
+                 where: Optional[dict] = None, columns: Optional[list[str]] = None) -> Dbase:
+        """
+        Geeft het resultaat van `query` terug als (virtuele) Dbase die door de analyses gebruikt kan worden.
+
+        De ANA-kolommen worden overgenomen zoals ze in de bronbestanden staan. Monster-ID's zijn alleen binnen
+        een bronbestand uniek; gebruik de kolom BRON_BESTAND om monsters uit verschillende projecten te onderscheiden.
+        """
+        dbase = Dbase()
+        dbase.dbase_df = self.query(test_types=test_types, groups=groups, where=where, columns=columns)
+        dbase.catalog.build()
+        return dbase
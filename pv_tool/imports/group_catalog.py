@@ -0,0 +1,213 @@
+from __future__ import annotations
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Optional
+import pandas as pd
+from pandas import DataFrame
+from pandas.util import hash_pandas_object
+
+if TYPE_CHECKING:
+    from pv_tool.imports.import_data import Dbase
+
+# Koppeling tussen de kolommen in de catalogus en de ALG-vlaggen in de Dbase
+PROEF_VLAGGEN = {
+    'AANTAL_TXT': 'ALG__TRIAXIAAL',
+    'AANTAL_DSS': 'ALG__DSS',
+    'AANTAL_CRS': 'ALG__CRS',
+    'AANTAL_SD': 'ALG__SAMENDRUKKING',
+    'AANTAL_CLAS': 'ALG__CLASSIFICATIE',
+}
+
+# Tabbladen in de template waarin resultaten per proevenverzameling worden opgeslagen
+RESULTATEN_TABBLADEN = {
+    'RESULTATEN_CPHI': 'Resultaten c-phi',
+    'RESULTATEN_SHANSEP': 'Resultaten SHANSEP',
+    'RESULTATEN_SUTABEL': 'Resultaten SU-tabel-m',
+}
+
+SAMENVATTING_KOLOMMEN = list(PROEF_VLAGGEN) + ['AANTAL_MONSTERS', 'AANTAL_BORINGEN', 'NAP_MIN', 'NAP_MAX']
+CATALOGUS_KOLOMMEN = SAMENVATTING_KOLOMMEN + list(RESULTATEN_TABBLADEN) + ['HEEFT_RESULTATEN']
+
+
+def _samenvatting(dbase_df: DataFrame) -> DataFrame:
+    """
+    Maakt de samenvatting per proevenverzameling in één groupby.
+
+    Parameters
+    ----------
+    dbase_df: DataFrame
+        (Deel van) het dbase-dataframe
+
+    Returns
+    -------
+    DataFrame
+        Eén rij per PV_NAAM, in volgorde van eerste voorkomen
+    """
+    df = DataFrame(index=dbase_df.index)
+    df['PV_NAAM'] = dbase_df['PV_NAAM']
+    for kolom, vlag in PROEF_VLAGGEN.items():
+        if vlag in dbase_df.columns:
+            df[kolom] = dbase_df[vlag].fillna(False).astype(bool).astype(int)
+        else:
+            df[kolom] = 0
+    df['BORING_NUMMER'] = dbase_df['BORING_NUMMER'] if 'BORING_NUMMER' in dbase_df.columns else pd.NA
+    for kolom in ['MONSTER_NIVEAU_NAP_VANAF', 'MONSTER_NIVEAU_NAP_TOT']:
+        df[kolom] = pd.to_numeric(dbase_df[kolom], errors='coerce') if kolom in dbase_df.columns else float('nan')
+    df = df[df['PV_NAAM'].notna() & (df['PV_NAAM'] != '')]
+
+    aggregaties = {kolom: (kolom, 'sum') for kolom in PROEF_VLAGGEN}
+    aggregaties.update({
+        'AANTAL_MONSTERS': ('PV_NAAM', 'size'),
+        'AANTAL_BORINGEN': ('BORING_NUMMER', 'nunique'),
+        'NAP_MIN': ('MONSTER_NIVEAU_NAP_TOT', 'min'),
+        'NAP_MAX': ('MONSTER_NIVEAU_NAP_VANAF', 'max'),
+    })
+    return df.groupby('PV_NAAM', sort=False).agg(**aggregaties)
+
+
+def _signatuur(dbase_df: Optional[DataFrame]) -> Optional[tuple]:
+    """
+    Vingerafdruk van de kolommen waaruit de catalogus wordt opgebouwd (PV_NAAM, proefvlaggen, boring en diepte),
+    onafhankelijk van de rijvolgorde, zodat een catalogus na update() dezelfde vingerafdruk heeft als na build().
+    """
+    if dbase_df is None:
+        return None
+    kolommen = ['PV_NAAM', *PROEF_VLAGGEN.values(), 'BORING_NUMMER', 'MONSTER_NIVEAU_NAP_VANAF',
+                'MONSTER_NIVEAU_NAP_TOT']
+    rijen = hash_pandas_object(dbase_df[[kolom for kolom in kolommen if kolom in dbase_df.columns]], index=True)
+    return len(dbase_df), int(rijen.to_numpy().sum())
+
+
+class GroupCatalog:
+    """
+    Catalogus met een samenvatting per proevenverzameling (PV_NAAM) van de Dbase.
+
+    De catalogus wordt in één groupby opgebouwd en bevat per verzameling het aantal proeven per type,
+    het dieptebereik, het aantal boringen en of er al resultaten in de template staan. Na het aanpassen
+    van rijen in de Dbase werkt `update` (via Dbase.refresh_rows) alleen de geraakte verzamelingen bij; met
+    `is_stale` is na te gaan of de Dbase sindsdien buiten refresh_rows om is aangepast. Verzamelingen zonder
+    PV_NAAM (leeg of ontbrekend) komen niet in de catalogus.
+    """
+
+    def __init__(self, dbase: Dbase):
+        self.dbase = dbase
+        self.catalog_df: DataFrame = DataFrame(columns=CATALOGUS_KOLOMMEN)
+        self._pv_naam: pd.Series = pd.Series(dtype=object)
+        self._resultaten: DataFrame = DataFrame(columns=list(RESULTATEN_TABBLADEN), dtype=bool)
+        self._signatuur: Optional[tuple] = None
+
+    def build(self) -> DataFrame:
+        """Bouwt de volledige catalogus opnieuw op uit het dbase-dataframe."""
+        dbase_df = self.dbase.dbase_df
+        self._signatuur = _signatuur(dbase_df)
+        if dbase_df is None or 'PV_NAAM' not in dbase_df.columns:
+            self.catalog_df = DataFrame(columns=CATALOGUS_KOLOMMEN)
+            self._pv_naam = pd.Series(dtype=object)
+            return self.catalog_df
+        self._pv_naam = dbase_df['PV_NAAM'].copy()
+        self.catalog_df = self._with_results(_samenvatting(dbase_df))
+        return self.catalog_df
+
+    def is_stale(self) -> bool:
+        """
+        Geeft aan of de Dbase is aangepast sinds de catalogus voor het laatst is opgebouwd of bijgewerkt, bijvoorbeeld
+        door dbase_df direct te wijzigen zonder Dbase.refresh_rows. Een nog niet opgebouwde catalogus is ook verouderd.
+        """
+        return self._signatuur is None or self._signatuur != _signatuur(self.dbase.dbase_df)
+
+    def update(self, index: Optional[Iterable] = None) -> DataFrame:
+        """
+        Werkt de catalogus bij na het aanpassen, toevoegen of verwijderen van rijen in de Dbase.
+
+        Parameters
+        ----------
+        index: Iterable, optional
+            Indexwaarden (ALG__BORING_MONSTERNR_ID) van de aangepaste rijen. Bij None wordt de catalogus
+            volledig opnieuw opgebouwd.
+
+        Returns
+        -------
+        DataFrame
+            De bijgewerkte catalogus
+        """
+        dbase_df = self.dbase.dbase_df
+        if index is None or dbase_df is None or (self.catalog_df.empty and self._pv_naam.empty):
+            return self.build()
+
+        index = pd.Index(list(index))
+        oud = self._pv_naam.reindex(index[index.isin(self._pv_naam.index)])
+        nieuw = dbase_df['PV_NAAM'].reindex(index[index.isin(dbase_df.index)])
+        geraakt = set(oud.dropna()) | set(nieuw.dropna())
+        geraakt.discard('')
+
+        # PV_NAAM-momentopname bijwerken zodat een volgende update de oude verzamelingen kent
+        self._pv_naam = self._pv_naam.drop(index[index.isin(self._pv_naam.index)])
+        self._pv_naam = pd.concat([self._pv_naam, nieuw])
+        self._signatuur = _signatuur(dbase_df)
+        if not geraakt:
+            return self.catalog_df
+
+        geraakt_df = dbase_df[dbase_df['PV_NAAM'].isin(geraakt)]
+        nieuwe_rijen = self._with_results(_samenvatting(geraakt_df))
+        catalog_df = self.catalog_df.drop(index=[pv for pv in geraakt if pv in self.catalog_df.index])
+        volgorde = [pv for pv in dbase_df['PV_NAAM'].dropna().unique() if pv in catalog_df.index
+                    or pv in nieuwe_rijen.index]
+        self.catalog_df = pd.concat([catalog_df, nieuwe_rijen]).reindex(volgorde)
+        return self.catalog_df
+
+    def scan_results(self, path: str | Path, file_name: str = "Template_PVtool5_0.xlsx") -> DataFrame:
+        """
+        Leest de resultaten-tabbladen van de template en markeert welke verzamelingen al resultaten hebben.
+
+        Parameters
+        ----------
+        path: str of Path
+            Pad naar de map waar het Excel-bestand staat
+        file_name: str
+            Naam van het Excel-bestand
+
+        Returns
+        -------
+        DataFrame
+            De bijgewerkte catalogus
+        """
+        from pv_tool.imports.results_store import get_results_store
+
+        file_path = Path(path) / file_name
+        if not file_path.exists():
+            raise FileNotFoundError(f"Er is geen dbase aanwezig op de locatie {file_path}.")
+
+        store = get_results_store(file_path)
+        groepen = self.catalog_df.index if not self.catalog_df.empty else self.build().index
+        resultaten = DataFrame(False, index=groepen, columns=list(RESULTATEN_TABBLADEN))
+        for kolom, tabblad in RESULTATEN_TABBLADEN.items():
+            resultaten[kolom] = [store.has_results(tabblad, pv) for pv in groepen]
+        self._resultaten = resultaten
+        self.catalog_df = self._with_results(self.catalog_df[SAMENVATTING_KOLOMMEN])
+        return self.catalog_df
+
+    def _with_results(self, samenvatting: DataFrame) -> DataFrame:
+        """Voegt de resultaten-kolommen toe aan (een deel van) de catalogus."""
+        resultaten = self._resultaten.reindex(samenvatting.index, fill_value=False).astype(bool)
+        samenvatting = pd.concat([samenvatting, resultaten], axis=1)
+        samenvatting['HEEFT_RESULTATEN'] = resultaten.any(axis=1)
+        return samenvatting[CATALOGUS_KOLOMMEN]
+
+    def groups(self, test_type: str = 'TXT') -> list[str]:
+        """
+        Geeft de namen van de verzamelingen die minstens één proef van het opgegeven type bevatten.
+
+        Parameters
+        ----------
+        test_type: str
+            Een van 'TXT', 'DSS', 'CRS', 'SD' of 'CLAS'
+        """
+        kolom = f"AANTAL_{test_type.upper()}"
+        if kolom not in PROEF_VLAGGEN:
+            raise ValueError(f"Onbekend proeftype '{test_type}'. Kies uit: TXT, DSS, CRS, SD, CLAS.")
+        return self.catalog_df.index[self.catalog_df[kolom] > 0].tolist()
+
+    def overview(self, test_type: Optional[str] = None) -> DataFrame:
+        """Geeft de catalogus terug, optioneel gefilterd op verzamelingen met het opgegeven proeftype."""
+        if test_type is None:
+            return self.catalog_df.copy()
+        return self.catalog_df.loc[self.groups(test_type)].copy()
@@ -1,7 +1,5 @@
 from pandas import DataFrame
 import pandas as pd
-from openpyxl import load_workbook
-import importlib.resources
 from typing import Optional, Literal
 from pathlib import Path
 import os.path
@@ -9,6 +7,9 @@ import os.path
 from pv_tool.imports.create_dbase import add_missing_columns, select_columns, alg_columns, add_ana_columns, add_pv_naam
 from pv_tool.imports.import_options import import_dbase, import_pv_tool, import_stowa
 from pv_tool.imports.validation import Validation
+from pv_tool.imports.group_catalog import GroupCatalog
+from pv_tool.utilities.resources import load_template
+from pv_tool.imports.sqlite_store import save_to_sqlite, load_from_sqlite
 from pv_tool.imports.globals import PV_TOOL_DBASE_COLUMNS, ANA_COLUMNS
 
 
@@ -20,6 +21,7 @@ class Dbase:
         self.pv_tool: Optional[DataFrame] = None
         self.dbase_df: Optional[DataFrame] = None
         self.validation = Validation(dbase=self)
+        self.catalog = GroupCatalog(dbase=self)
 
     def _create_dbase(self, source: Literal['Stowa', 'PV-tool', 'Dbase']):
         """Maakt de dbase-dataframe"""
@@ -41,6 +43,7 @@ class Dbase:
         """Importeert data uit de Stowa-database, de oude pv-tool of de Dbase (template) en voegt kolommen toe"""
         if source == 'Dbase':
             import_dbase(self, dbase_dir=source_dir)
+            self.catalog.build()
             return self.dbase_df
         else:
             return f"Short import only available for 'Dbase' source, not for '{source}'"
@@ -56,10 +59,28 @@ class Dbase:
         elif source == 'Dbase':
             import_dbase(self, dbase_dir=source_dir)
         self._create_dbase(source=source)
+        self.catalog.build()
         return self.dbase_df
 
-    def validate_data(self, export_path: Path):
-        self.validation.validation_export(export_path=export_path)
+    def save_to_sqlite(self, db_path: Path):
+        """Slaat de dbase op in een SQLite-bestand (bestaande monsters worden bijgewerkt)"""
+        save_to_sqlite(self, db_path=db_path)
+
+    def load_from_sqlite(self, db_path: Path, groups: Optional[list] = None, test_types: Optional[list] = None):
+        """Laadt (een selectie van) de dbase uit een SQLite-bestand, bijvoorbeeld om te exporteren naar de template"""
+        load_from_sqlite(self, db_path=db_path, groups=groups, test_types=test_types)
+        self.catalog.build()
+        return self.dbase_df
+
+    def validate_data(self, export_path: Path, log_format: Optional[str] = 'xlsx'):
+        self.validation.validation_export(export_path=export_path, log_format=log_format)
+        self.validation.print_critical_errors()
+        return self.dbase_df
+
+    def refresh_rows(self, index, export_path: Optional[Path] = None):
+        """Werkt na een handmatige wijziging de catalogus en de validatie bij voor alleen de aangepaste rijen"""
+        self.catalog.update(index)
+        self.validation.revalidate(index, export_path=export_path)
         self.validation.print_critical_errors()
         return self.dbase_df
 
@@ -86,10 +107,8 @@ class Dbase:
         start_row = 7  # Excel: rij 8
         start_col = 1  # Excel: kolom A
 
-        with importlib.resources.path('pv_tool.templates', "Template_PVtool5_0.xlsx") as template_path:
-            wb = load_workbook(template_path)
+        wb = load_template()
 
-        # wb = load_workbook(template_path)
         if sheet_name not in wb.sheetnames:
             raise ValueError(f"Sheet '{sheet_name}' bestaat niet in template!")
 
@@ -2,28 +2,22 @@ from __future__ import annotations
 import pandas as pd
 from pathlib import Path
 from typing import TYPE_CHECKING
+
+from pv_tool.imports.excel_reader import read_excel, find_header_row
 if TYPE_CHECKING:
     from pv_tool.imports.import_data import Dbase
 
 
 def import_dbase(self: Dbase, dbase_dir: Path):
     """Importeert de Dbase-df (template)."""
-    # First, read the file without headers to find the correct header row
-    temp_df = pd.read_excel(dbase_dir, sheet_name='Dbase5_0', header=None)
-
-    # Search for the row containing ALG__BORING_MONSTERNR_ID
-    header_row: int | None = None
-    for idx, row in temp_df.iterrows():
-        if 'ALG__BORING_MONSTERNR_ID' in row.values:
-            # Cast pandas index to int - pandas ensures this is numeric for default RangeIndex
-            header_row = int(str(idx))
-            break
+    # First, find the header row (the first rows are read before the full sheet)
+    header_row = find_header_row(dbase_dir, sheet_name='Dbase5_0', column='ALG__BORING_MONSTERNR_ID')
 
     if header_row is None:
         raise ValueError("Column 'ALG__BORING_MONSTERNR_ID' not found in the Excel file")
 
     # Now read the file with the correct header row and set the index
-    dbase = pd.read_excel(
+    dbase = read_excel(
         dbase_dir,
         sheet_name='Dbase5_0',
         skiprows=header_row,
@@ -42,7 +36,7 @@ def import_pv_tool(self: Dbase, pv_dir: Path):
     ]
 
     # Read the PV-tool file
-    pv = pd.read_excel(pv_dir, skiprows=47, sheet_name='Dbase2')
+    pv = read_excel(pv_dir, skiprows=47, sheet_name='Dbase2')
     pv = pv.dropna(subset=['ALG__BORING_MONSTERNR_ID'])
 
     # Create the ID column
@@ -65,7 +59,7 @@ def import_pv_tool(self: Dbase, pv_dir: Path):
 
 def import_stowa(self: Dbase, stowa_dir: Path):
     """Importeert de stowa-database"""
-    stowa = pd.read_excel(stowa_dir, skiprows=8, sheet_name='Dbase')
+    stowa = read_excel(stowa_dir, skiprows=8, sheet_name='Dbase')
     stowa[['REGEL', 'BORING_NUMMER', 'MONSTER_ID']] = stowa[['REGEL', 'BORING_NUMMER', 'MONSTER_ID']].fillna(
         '').astype(str)
     stowa['ALG__BORING_MONSTERNR_ID'] = stowa[['REGEL', 'BORING_NUMMER', 'MONSTER_ID']].apply('_'.join, axis=1)
@@ -0,0 +1,169 @@
+from __future__ import annotations
+import importlib.resources
+import json
+from pathlib import Path
+from typing import Optional
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+DEFAULT_OUTLINE_FILE = 'nl_outline.json'
+# Punten binnen deze afstand (m) van de omtrek gelden als binnen; de meegeleverde omtrek is grof
+DEFAULT_TOLERANCE = 2000.0
+# Een monster is een uitschieter als het verder dan max(factor x mediane afstand, minimale afstand) van het
+# midden (mediaan) van zijn proevenverzameling ligt
+OUTLIER_FACTOR = 5.0
+MIN_OUTLIER_DISTANCE = 5000.0
+LOCATION_FLAGS = ['BUITEN_GEBIED', 'XY_VERWISSELD', 'GROEP_UITSCHIETER']
+
+
+def _rings_from_geojson(geometry: dict) -> list[list[np.ndarray]]:
+    """Geeft per polygoon de ringen (buitenring, gevolgd door eventuele gaten) uit een GeoJSON-object."""
+    kind = geometry.get('type')
+    if kind == 'FeatureCollection':
+        return [rings for feature in geometry['features'] for rings in _rings_from_geojson(feature)]
+    if kind == 'Feature':
+        return _rings_from_geojson(geometry['geometry'])
+    if kind == 'Polygon':
+        return [[np.asarray(ring, dtype=float)[:, :2] for ring in geometry['coordinates']]]
+    if kind == 'MultiPolygon':
+        return [[np.asarray(ring, dtype=float)[:, :2] for ring in polygon] for polygon in geometry['coordinates']]
+    raise ValueError(f"Onbekend geometrietype '{kind}'. Gebruik een (Multi)Polygon, Feature of FeatureCollection.")
+
+
+def load_polygons(polygon: Optional[str | Path | list] = None) -> list[list[np.ndarray]]:
+    """
+    Leest het gebied waarbinnen de boringen moeten liggen (RD-coördinaten).
+
+    Parameters
+    ----------
+    polygon: str, Path of list, optional
+        Pad naar een GeoJSON-bestand (bijvoorbeeld de projectgrens), of een lijst met [x, y]-punten.
+        Zonder polygoon wordt de meegeleverde omtrek van Nederland gebruikt.
+    """
+    if polygon is None:
+        text = importlib.resources.files('pv_tool.imports').joinpath(DEFAULT_OUTLINE_FILE).read_text(
+            encoding='utf-8')
+        return _rings_from_geojson(json.loads(text))
+    if isinstance(polygon, (str, Path)):
+        path = Path(polygon)
+        if not path.exists():
+            raise FileNotFoundError(f"Er is geen polygoonbestand aanwezig op de locatie {path}.")
+        return _rings_from_geojson(json.loads(path.read_text(encoding='utf-8')))
+    ring = np.asarray(polygon, dtype=float)
+    if ring.ndim != 2 or ring.shape[1] < 2 or len(ring) < 3:
+        raise ValueError("Een polygoon moet uit minstens drie [x, y]-punten bestaan.")
+    return [[ring[:, :2]]]
+
+
+def _in_ring(x: np.ndarray, y: np.ndarray, ring: np.ndarray) -> np.ndarray:
+    """Even-odd-test (ray casting) van alle punten tegelijk; de lus loopt alleen over de randen van de ring."""
+    inside = np.zeros(len(x), dtype=bool)
+    x_start, y_start = ring[:, 0], ring[:, 1]
+    x_end, y_end = np.roll(x_start, -1), np.roll(y_start, -1)
+    for x1, y1, x2, y2 in zip(x_start, y_start, x_end, y_end):
+        if y1 == y2:
+            continue
+        crosses = (y1 > y) != (y2 > y)
+        x_cross = x1 + (y - y1) * (x2 - x1) / (y2 - y1)
+        inside ^= crosses & (x < x_cross)
+    return inside
+
+
+def _distance_to_ring(x: np.ndarray, y: np.ndarray, ring: np.ndarray) -> np.ndarray:
+    """Kortste afstand van alle punten tot de randen van een ring."""
+    distance = np.full(len(x), np.inf)
+    x_start, y_start = ring[:, 0], ring[:, 1]
+    x_end, y_end = np.roll(x_start, -1), np.roll(y_start, -1)
+    for x1, y1, x2, y2 in zip(x_start, y_start, x_end, y_end):
+        dx, dy = x2 - x1, y2 - y1
+        length = dx * dx + dy * dy
+        t = np.clip(((x - x1) * dx + (y - y1) * dy) / length, 0, 1) if length > 0 else 0.0
+        distance = np.minimum(distance, np.hypot(x - (x1 + t * dx), y - (y1 + t * dy)))
+    return distance
+
+
+def points_in_polygons(x, y, polygons: list[list[np.ndarray]], tolerance: float = 0.0) -> np.ndarray:
+    """
+    Bepaalt voor alle punten tegelijk of ze binnen een van de polygonen liggen.
+
+    Parameters
+    ----------
+    x, y: array-like
+        RD-coördinaten; punten met een ontbrekende coördinaat gelden als niet binnen
+    polygons: list
+        Polygonen zoals load_polygons die teruggeeft
+    tolerance: float
+        Punten buiten een polygoon, maar binnen deze afstand (m) van de rand, gelden ook als binnen
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    inside = np.zeros(len(x), dtype=bool)
+    for outer, *holes in polygons:
+        in_polygon = _in_ring(x, y, outer)
+        for hole in holes:
+            in_polygon &= ~_in_ring(x, y, hole)
+        inside |= in_polygon
+    if tolerance > 0:
+        outside = ~inside & ~np.isnan(x) & ~np.isnan(y)
+        if outside.any():
+            near = np.zeros(int(outside.sum()), dtype=bool)
+            for rings in polygons:
+                for ring in rings:
+                    near |= _distance_to_ring(x[outside], y[outside], ring) <= tolerance
+            inside[np.flatnonzero(outside)[near]] = True
+    return inside
+
+
+def location_flags(df: DataFrame, x_column: str = 'BORING_XID', y_column: str = 'BORING_YID',
+                   group_column: Optional[str] = 'PV_NAAM', polygon: Optional[str | Path | list] = None,
+                   tolerance: float = DEFAULT_TOLERANCE, outlier_factor: float = OUTLIER_FACTOR,
+                   min_outlier_distance: float = MIN_OUTLIER_DISTANCE) -> DataFrame:
+    """
+    Controleert of de coördinaten van de boringen geografisch plausibel zijn.
+
+    Parameters
+    ----------
+    df: DataFrame
+        De dbase_df (of een deel daarvan)
+    x_column, y_column: str
+        Kolommen met de RD-coördinaten
+    group_column: str, optional
+        Kolom met de proevenverzameling; None slaat de controle op uitschieters over
+    polygon: str, Path of list, optional
+        Projectgebied (zie load_polygons); standaard de omtrek van Nederland
+    tolerance: float
+        Tolerantie (m) rond de rand van het gebied
+    outlier_factor, min_outlier_distance: float
+        Een monster is een uitschieter als de afstand tot de mediaan van zijn groep groter is dan
+        max(outlier_factor x mediane afstand in de groep, min_outlier_distance)
+
+    Returns
+    -------
+    DataFrame
+        Boolean kolommen BUITEN_GEBIED (ligt buiten het gebied), XY_VERWISSELD (ligt er alleen binnen als X en Y
+        worden verwisseld) en GROEP_UITSCHIETER. Rijen zonder coördinaten krijgen overal False.
+    """
+    polygons = load_polygons(polygon)
+    x = pd.to_numeric(df[x_column], errors='coerce').to_numpy(dtype=float)
+    y = pd.to_numeric(df[y_column], errors='coerce').to_numpy(dtype=float)
+    known = ~np.isnan(x) & ~np.isnan(y)
+
+    inside = points_in_polygons(x, y, polygons, tolerance=tolerance)
+    swapped = known & ~inside
+    if swapped.any():
+        swapped[swapped] = points_in_polygons(y[swapped], x[swapped], polygons, tolerance=tolerance)
+
+    outlier = np.zeros(len(df), dtype=bool)
+    if group_column is not None and group_column in df.columns:
+        points = DataFrame({'x': x, 'y': y, 'groep': df[group_column].to_numpy()})
+        points = points[known & inside & points['groep'].notna().to_numpy()]
+        if not points.empty:
+            centre = points.groupby('groep')[['x', 'y']].transform('median')
+            distance = np.hypot(points['x'] - centre['x'], points['y'] - centre['y'])
+            typical = distance.groupby(points['groep']).transform('median')
+            outlier[points.index.to_numpy()] = (distance > np.maximum(outlier_factor * typical,
+                                                                      min_outlier_distance)).to_numpy()
+
+    return DataFrame({'BUITEN_GEBIED': known & ~inside & ~swapped, 'XY_VERWISSELD': swapped,
+                      'GROEP_UITSCHIETER': outlier}, index=df.index)
@@ -0,0 +1,205 @@
+from __future__ import annotations
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Optional
+from pandas import DataFrame
+from openpyxl import load_workbook
+
+from pv_tool.imports.excel_reader import find_header_row, read_excel
+from pv_tool.imports.results_store import MAX_HEADER_ROWS, _column_name, _row_identity, record_result
+from pv_tool.utilities.resources import load_template
+
+
+class ResultsJournal:
+    """
+    Verzamelt analyseresultaten en schrijft ze in één keer naar de template.
+
+    Rijen worden per tabblad in het geheugen bewaard en, als er een sidecar-bestand is opgegeven, ook direct naar
+    dat bestand geschreven (JSON, één rij per regel), zodat ze een crash overleven. flush() opent de template één
+    keer, vervangt bestaande rijen met hetzelfde PV_RESULTAAT_ID en dezelfde instellingen (PV_TYPEVERZAMELING,
+    PV_PARTPHI, PV_PARTCOH), voegt de overige rijen toe en slaat op via een tijdelijk bestand dat daarna het
+    origineel vervangt. Een afgebroken flush laat de template dus ongewijzigd.
+
+    Voorbeeld
+    ---------
+    >>> with ResultsJournal(Path(export_dir) / 'Template_PVtool5_0.xlsx') as journal:
+    ...     for analyse in analyses:
+    ...         analyse.add_results_to_template(path=export_dir, journal=journal)
+    """
+
+    def __init__(self, file_path: str | Path, sidecar_path: Optional[str | Path] = None):
+        """
+        Parameters
+        ----------
+        file_path: str of Path
+            De template waarin de resultaten worden opgeslagen. Als het bestand niet bestaat, wordt de lege
+            template van de PV-tool als basis gebruikt.
+        sidecar_path: str of Path, optional
+            Bestand waarin nog niet weggeschreven rijen worden bewaard. Rijen die na een crash in dit bestand
+            zijn achtergebleven, worden bij het aanmaken van het journal weer ingelezen.
+        """
+        self.file_path = Path(file_path)
+        self.sidecar_path = Path(sidecar_path) if sidecar_path is not None else None
+        self.pending: list[tuple[str, list, dict]] = []
+        if self.sidecar_path is not None and self.sidecar_path.exists():
+            for line in self.sidecar_path.read_text(encoding='utf-8').splitlines():
+                if line.strip():
+                    entry = json.loads(line)
+                    self.pending.append((entry['sheet'], entry['columns'], entry['row']))
+
+    def __len__(self):
+        return len(self.pending)
+
+    def add(self, sheet_name: str, row: dict, columns: list):
+        """
+        Voegt een resultaatrij toe aan het journal.
+
+        Parameters
+        ----------
+        sheet_name: str
+            Resultaten-tabblad, bijvoorbeeld 'Resultaten c-phi'
+        row: dict
+            De resultaatrij (kolomnaam -> waarde)
+        columns: list
+            Kolomvolgorde, gebruikt als het tabblad nog moet worden aangemaakt
+        """
+        self.pending.append((sheet_name, list(columns), dict(row)))
+        if self.sidecar_path is not None:
+            with open(self.sidecar_path, 'a', encoding='utf-8') as sidecar:
+                sidecar.write(json.dumps({'sheet': sheet_name, 'columns': list(columns), 'row': row},
+                                         default=str) + '\n')
+
+    def rows(self, sheet_name: Optional[str] = None) -> DataFrame:
+        """Geeft de nog niet weggeschreven rijen (van één tabblad) als DataFrame."""
+        return DataFrame([row for sheet, _, row in self.pending if sheet_name is None or sheet == sheet_name])
+
+    @staticmethod
+    def _header(ws) -> tuple[int, dict]:
+        """
+        Zoekt de kopregel van een resultaten-tabblad; geeft (rijnummer, kolomnaam -> kolomnummer). De kolomnamen
+        zijn genormaliseerd zoals in de resultaatrijen ('PV_PARTPHI [-]' -> 'PV_PARTPHI', 'PVNAAM' -> 'PV_NAAM').
+        """
+        for row_idx, values in enumerate(ws.iter_rows(max_row=MAX_HEADER_ROWS, values_only=True), start=1):
+            if 'PV_RESULTAAT_ID' in values:
+                header = {}
+                for col_idx, value in enumerate(values, start=1):
+                    if value is not None:
+                        header.setdefault(_column_name(value), col_idx)
+                return row_idx, header
+        return 0, {}
+
+    def flush(self) -> Path:
+        """Schrijft alle rijen in één keer (atomair) naar de template en leegt het journal."""
+        if not self.pending:
+            return self.file_path
+
+        if self.file_path.exists():
+            wb = load_workbook(self.file_path)
+        else:
+            wb = load_template()
+
+        for sheet_name in dict.fromkeys(sheet for sheet, _, _ in self.pending):
+            entries = [(columns, row) for sheet, columns, row in self.pending if sheet == sheet_name]
+            expected_columns = entries[0][0]
+            if sheet_name in wb.sheetnames:
+                ws = wb[sheet_name]
+                header_row, header = self._header(ws)
+            else:
+                ws = wb.create_sheet(sheet_name)
+                for col_idx, col_name in enumerate(expected_columns, start=1):
+                    ws.cell(row=1, column=col_idx, value=col_name)
+                header_row, header = 1, {_column_name(col_name): idx
+                                         for idx, col_name in enumerate(expected_columns, start=1)}
+            if header_row == 0:
+                raise ValueError(f"Tabblad '{sheet_name}' heeft geen kopregel met PV_RESULTAAT_ID in de eerste "
+                                 f"{MAX_HEADER_ROWS} rijen.")
+
+            # Bestaande rijen per sleutel, zodat een nieuw resultaat voor dezelfde verzameling ze vervangt
+            existing = {}
+            names = {col_idx: name for name, col_idx in header.items()}
+            for row_idx, values in enumerate(ws.iter_rows(min_row=header_row + 1, values_only=True),
+                                             start=header_row + 1):
+                row = {names[col_idx]: value for col_idx, value in enumerate(values, start=1) if col_idx in names}
+                if row.get('PV_RESULTAAT_ID') is not None:
+                    existing[_row_identity(row)] = row_idx
+
+            first_empty_row = ws.max_row + 1 if any(
+                ws.iter_rows(min_row=ws.max_row, max_row=ws.max_row, values_only=True)) else ws.max_row
+            for columns, row in entries:
+                key = _row_identity(row)
+                if key in existing:
+                    target_row = existing[key]
+                else:
+                    target_row = first_empty_row
+                    existing[key] = target_row
+                    first_empty_row += 1
+                for col_name in columns:
+                    name = _column_name(col_name)
+                    if name not in header:
+                        # Kolom die de template nog niet heeft: achteraan de kopregel toevoegen
+                        header[name] = max(ws.max_column, *header.values()) + 1
+                        ws.cell(row=header_row, column=header[name], value=col_name)
+                    ws.cell(row=target_row, column=header[name], value=row.get(col_name, ""))
+
+        # Eerst naar een tijdelijk bestand in dezelfde map, daarna in één keer het origineel vervangen
+        self.file_path.parent.mkdir(parents=True, exist_ok=True)
+        handle, temp_name = tempfile.mkstemp(suffix='.xlsx', dir=self.file_path.parent)
+        os.close(handle)
+        try:
+            wb.save(temp_name)
+            os.replace(temp_name, self.file_path)
+        except BaseException:
+            if os.path.exists(temp_name):
+                os.remove(temp_name)
+            raise
+
+        for sheet_name, _, row in self.pending:
+            record_result(self.file_path, sheet_name, row)
+        print(f"{len(self.pending)} resultaten weggeschreven naar {self.file_path}.")
+        self.pending = []
+        if self.sidecar_path is not None and self.sidecar_path.exists():
+            self.sidecar_path.unlink()
+        return self.file_path
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.flush()
+
+
+def write_result(file_path: str | Path, sheet_name: str, row: dict, columns: list,
+                 journal: Optional[ResultsJournal] = None) -> DataFrame:
+    """
+    Schrijft één resultaatrij naar de template, of zet hem in het journal als dat is opgegeven.
+
+    Returns
+    -------
+    DataFrame
+        De weggeschreven (of in het journal gezette) rij
+    """
+    if journal is not None:
+        journal.add(sheet_name, row, columns)
+    else:
+        single = ResultsJournal(file_path)
+        single.add(sheet_name, row, columns)
+        single.flush()
+    return DataFrame([row], columns=columns)
+
+
+def read_results_sheet(file_path: str | Path, sheet_name: str) -> DataFrame:
+    """
+    Leest een resultaten-tabblad vanaf de kopregel (de rij met PV_RESULTAAT_ID), zonder lege rijen.
+
+    Returns
+    -------
+    DataFrame
+        Alle resultaten in het tabblad, met de kolomnamen als tekst
+    """
+    header_row = find_header_row(file_path, sheet_name, 'PV_RESULTAAT_ID', scan_rows=MAX_HEADER_ROWS)
+    df_results = read_excel(file_path, sheet_name=sheet_name, skiprows=header_row or 0).dropna(how='all')
+    df_results.columns = df_results.columns.astype(str)
+    return df_results
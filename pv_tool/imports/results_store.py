@@ -0,0 +1,218 @@
+from __future__ import annotations
+import re
+from pathlib import Path
+from typing import Optional
+import pandas as pd
+from pandas import DataFrame
+
+from pv_tool.imports.excel_reader import excel_file, read_excel
+from pv_tool.imports.group_catalog import RESULTATEN_TABBLADEN
+
+# Kolommen met de instellingen van een analyse (niet ieder tabblad heeft ze allemaal)
+SETTING_COLUMNS = ['PV_TYPEVERZAMELING', 'PV_PARTPHI', 'PV_PARTCOH']
+MAX_HEADER_ROWS = 20
+# Kolomnamen in de template die afwijken van de namen in de resultaatrijen van de analyses
+COLUMN_ALIASES = {'PVNAAM': 'PV_NAAM'}
+
+# Eén store per templatebestand, zodat het wisselen van verzameling geen bestand opnieuw inleest
+_STORES: dict[str, ResultsStore] = {}
+
+
+def _key_value(value) -> str:
+    """Maakt een waarde geschikt als sleutel (Excel kan '5%' als tekst en 2 als getal teruggeven)."""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def _settings_key(settings: Optional[dict]) -> tuple:
+    return tuple(sorted((col, _key_value(value)) for col, value in (settings or {}).items()))
+
+
+def _column_name(name) -> str:
+    """
+    Kolomnaam zoals in de resultaatrijen: zonder eenheid ('PV_PARTPHI [-]' -> 'PV_PARTPHI') en met de namen uit
+    COLUMN_ALIASES ('PVNAAM' -> 'PV_NAAM').
+    """
+    name = re.sub(r'\s*\[[^\]]*\]$', '', str(name).strip())
+    return COLUMN_ALIASES.get(name, name)
+
+
+def _is_empty(value) -> bool:
+    return value is None or (isinstance(value, str) and not value.strip()) or (
+        not isinstance(value, str) and pd.isna(value))
+
+
+def _row_values(row) -> dict:
+    """Waarden van een resultaatrij (dict of Series) per genormaliseerde kolomnaam (zie _column_name)."""
+    values = {}
+    for col, value in row.items():
+        values.setdefault(_column_name(col), value)
+    return values
+
+
+def _row_identity(row) -> tuple:
+    """
+    Sleutel waarmee een bestaand resultaat wordt vervangen: PV_RESULTAAT_ID plus alle SETTING_COLUMNS. Kolommen die
+    in de rij ontbreken of leeg zijn, tellen als None, zodat de sleutel altijd even lang is.
+    """
+    values = _row_values(row)
+    return tuple(None if _is_empty(values.get(col)) else _key_value(values.get(col))
+                 for col in ['PV_RESULTAAT_ID', *SETTING_COLUMNS])
+
+
+class ResultsStore:
+    """
+    Geïndexeerde opslag van de resultaten-tabbladen van een template.
+
+    De tabbladen worden één keer ingelezen (alleen opnieuw als het bestand is gewijzigd) en per
+    (PV_NAAM, analysetype, rekniveau) en per instellingen (PV_TYPEVERZAMELING, PV_PARTPHI, PV_PARTCOH) geïndexeerd,
+    zodat het opzoeken van eerdere resultaten een dictionary-lookup is. Resultaten die met add_results_to_template
+    worden toegevoegd, worden direct in de index bijgewerkt.
+    """
+
+    def __init__(self, file_path: str | Path):
+        self.file_path = Path(file_path)
+        self.signature: Optional[tuple] = None
+        self.sheets: dict[str, DataFrame] = {}
+        self._latest: dict[tuple, pd.Series] = {}
+        self._latest_settings: dict[tuple, pd.Series] = {}
+        self._groups: dict[str, set] = {}
+
+    def _file_signature(self) -> tuple:
+        stat = self.file_path.stat()
+        return stat.st_mtime_ns, stat.st_size
+
+    def sync(self, force: bool = False) -> ResultsStore:
+        """Leest de resultaten-tabbladen opnieuw in als het bestand sinds de vorige keer is gewijzigd."""
+        if not self.file_path.exists():
+            raise FileNotFoundError(f"Er is geen dbase aanwezig op de locatie {self.file_path}.")
+        signature = self._file_signature()
+        if not force and signature == self.signature:
+            return self
+
+        with excel_file(self.file_path) as excel:
+            sheet_names = [sheet for sheet in excel.sheet_names
+                           if sheet in RESULTATEN_TABBLADEN.values() or sheet.startswith('Resultaten')]
+            raw_sheets = read_excel(excel, sheet_name=sheet_names, header=None) if sheet_names else {}
+
+        self.sheets = {}
+        self._latest, self._latest_settings, self._groups = {}, {}, {}
+        for sheet, raw in raw_sheets.items():
+            results_df = self._parse_sheet(raw)
+            if results_df is None:
+                continue
+            self.sheets[sheet] = results_df
+            for _, row in results_df.iterrows():
+                self._index_row(sheet, row)
+        self.signature = signature
+        return self
+
+    @staticmethod
+    def _parse_sheet(raw: DataFrame) -> Optional[DataFrame]:
+        """Zoekt de kopregel (met PV_RESULTAAT_ID) en geeft de resultatenrijen terug."""
+        for position in range(min(MAX_HEADER_ROWS, len(raw))):
+            header = raw.iloc[position]
+            if (header == 'PV_RESULTAAT_ID').any():
+                results_df = raw.iloc[position + 1:].copy()
+                results_df.columns = [str(col) for col in header]
+                results_df = results_df.dropna(how='all').reset_index(drop=True)
+                results_df = results_df[results_df['PV_RESULTAAT_ID'].notna()]
+                if 'Timestamp' in results_df.columns:
+                    results_df['Timestamp'] = pd.to_datetime(results_df['Timestamp'], errors='coerce')
+                return results_df.infer_objects()
+        return None
+
+    @staticmethod
+    def _row_key(row: pd.Series) -> Optional[tuple]:
+        """Geeft (PV_NAAM, analysetype, rekniveau) van een resultatenrij."""
+        group = row.get('PV_NAAM', row.get('PVNAAM'))
+        if pd.isna(group) or pd.isna(row.get('PV_REK')):
+            return None
+        analysis_type = '_'.join(_key_value(row[col]) for col in ['PV_TYPE_PROEF', 'PV_ANALYSE']
+                                 if col in row.index and not pd.isna(row[col]))
+        return _key_value(group), analysis_type, _key_value(row['PV_REK'])
+
+    @staticmethod
+    def _is_newer(row: pd.Series, current: Optional[pd.Series]) -> bool:
+        if current is None:
+            return True
+        new, old = row.get('Timestamp'), current.get('Timestamp')
+        return pd.isna(old) or (not pd.isna(new) and new >= old)
+
+    def _index_row(self, sheet: str, row: pd.Series):
+        key = self._row_key(row)
+        if key is None:
+            return
+        self._groups.setdefault(sheet, set()).add(key[0])
+        if self._is_newer(row, self._latest.get((sheet, *key))):
+            self._latest[(sheet, *key)] = row
+        values = _row_values(row)
+        settings = {col: values[col] for col in SETTING_COLUMNS if not _is_empty(values.get(col))}
+        settings_key = (sheet, *key, _settings_key(settings))
+        if self._is_newer(row, self._latest_settings.get(settings_key)):
+            self._latest_settings[settings_key] = row
+
+    def latest(self, sheet: str, group: str, analysis_type: str, effective_stress,
+               settings: Optional[dict] = None) -> Optional[pd.Series]:
+        """
+        Geeft het meest recente resultaat voor een proevenverzameling, of None als er geen resultaat is.
+
+        Parameters
+        ----------
+        sheet: str
+            Resultaten-tabblad, bijvoorbeeld 'Resultaten c-phi'
+        group: str
+            PV_NAAM van de proevenverzameling
+        analysis_type: str
+            Analysetype, bijvoorbeeld 'DSS_CPhi' (PV_TYPE_PROEF en PV_ANALYSE)
+        effective_stress: str
+            Rekniveau (PV_REK)
+        settings: dict, optional
+            Alleen resultaten met deze instellingen, bijvoorbeeld {'PV_TYPEVERZAMELING': 0.05}
+        """
+        key = (sheet, _key_value(group), analysis_type, _key_value(effective_stress))
+        if settings is not None:
+            return self._latest_settings.get((*key, _settings_key(settings)))
+        return self._latest.get(key)
+
+    def has_results(self, sheet: str, group: str) -> bool:
+        """Geeft aan of er voor een proevenverzameling resultaten in een tabblad staan."""
+        return _key_value(group) in self._groups.get(sheet, set())
+
+    def record(self, sheet: str, row: dict):
+        """
+        Voegt een zojuist naar het bestand geschreven resultaat toe aan de index, zonder het bestand opnieuw in te
+        lezen. Alleen bijwerken als de index actueel was; anders wordt bij de volgende sync alles ingelezen.
+        """
+        if self.signature is None:
+            return
+        row = pd.Series(row)
+        if 'Timestamp' in row.index:
+            row['Timestamp'] = pd.to_datetime(row['Timestamp'], errors='coerce')
+        sheet_df = self.sheets.get(sheet, DataFrame())
+        # Dezelfde kolomnamen als het tabblad (bijvoorbeeld 'PV_PARTPHI [-]' voor 'PV_PARTPHI')
+        sheet_columns = {_column_name(col): col for col in sheet_df.columns}
+        row = row.rename(lambda col: sheet_columns.get(_column_name(col), col))
+        if not sheet_df.empty and 'PV_RESULTAAT_ID' in row.index:
+            # Een resultaat met hetzelfde PV_RESULTAAT_ID en dezelfde instellingen is in het bestand vervangen
+            identity = _row_identity(row)
+            sheet_df = sheet_df[[_row_identity(old) != identity for _, old in sheet_df.iterrows()]]
+        self.sheets[sheet] = pd.concat([sheet_df, row.to_frame().T], ignore_index=True)
+        self._index_row(sheet, row)
+        self.signature = self._file_signature()
+
+
+def get_results_store(file_path: str | Path) -> ResultsStore:
+    """Geeft de (gedeelde) ResultsStore van een templatebestand, bijgewerkt als het bestand is gewijzigd."""
+    key = str(Path(file_path).resolve())
+    if key not in _STORES:
+        _STORES[key] = ResultsStore(file_path)
+    return _STORES[key].sync()
+
+
+def record_result(file_path: str | Path, sheet: str, row: dict):
+    """Werkt na het wegschrijven van een resultaat de index bij (als er al een store voor het bestand is)."""
+    store = _STORES.get(str(Path(file_path).resolve()))
+    if store is not None:
+        store.record(sheet, row)
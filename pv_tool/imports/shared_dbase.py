@@ -0,0 +1,150 @@
+from __future__ import annotations
+from multiprocessing import shared_memory
+from typing import TYPE_CHECKING, Optional
+import sys
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+if TYPE_CHECKING:
+    from pv_tool.imports.import_data import Dbase
+
+# Dbase die in een worker-proces aan het gedeelde geheugen is gekoppeld (zie attach_worker)
+_WORKER_DBASE: Optional[Dbase] = None
+
+
+class SharedDbaseHandle:
+    """
+    Kleine, picklebare beschrijving van een in gedeeld geheugen gepubliceerde Dbase.
+
+    Alleen de namen van de geheugenblokken, de kolomnamen, de index en de niet-numerieke kolommen worden
+    meegestuurd naar een worker; de numerieke en boolean kolommen worden daar zonder kopie gekoppeld.
+    """
+
+    def __init__(self, numeric_name: Optional[str], numeric_columns: list, bool_name: Optional[str],
+                 bool_columns: list, index: pd.Index, other_df: DataFrame, columns: list):
+        self.numeric_name = numeric_name
+        self.numeric_columns = numeric_columns
+        self.bool_name = bool_name
+        self.bool_columns = bool_columns
+        self.index = index
+        self.other_df = other_df
+        self.columns = columns
+
+    def attach(self) -> Dbase:
+        """
+        Koppelt de gedeelde kolommen aan een nieuwe (alleen-lezen) Dbase.
+
+        De numerieke en boolean kolommen zijn views op het gedeelde geheugen. Het DataFrame wordt per kolom uit die
+        views opgebouwd (copy=False), zodat er ook zonder Copy-on-Write (pandas 2) geen blok gekopieerd of
+        samengevoegd wordt. De kolommen staan in de oorspronkelijke volgorde.
+        """
+        from pv_tool.imports.import_data import Dbase
+
+        n_rows = len(self.index)
+        data = {column: self.other_df[column].to_numpy() for column in self.other_df.columns}
+        segments = []
+        for name, columns, dtype in [(self.numeric_name, self.numeric_columns, np.float64),
+                                     (self.bool_name, self.bool_columns, np.bool_)]:
+            if name is None:
+                continue
+            shm = _open_shared_memory(name)
+            # Per kolom aaneengesloten opgeslagen: iedere rij van (kolommen, rijen) is een view op één kolom
+            values = np.ndarray((len(columns), n_rows), dtype=dtype, buffer=shm.buf)
+            values.flags.writeable = False
+            data.update(zip(columns, values))
+            segments.append(shm)
+
+        dbase = Dbase()
+        dbase.dbase_df = DataFrame({column: data[column] for column in self.columns}, index=self.index, copy=False)
+        # Verwijzing naar de geheugenblokken bewaren zodat de buffers geldig blijven
+        dbase._shared_memory = segments
+        return dbase
+
+
+class SharedDbase:
+    """
+    Publiceert de numerieke en boolean kolommen van een Dbase één keer in gedeeld geheugen.
+
+    Worker-processen krijgen alleen de `handle` mee en koppelen de data zonder kopie, zodat het parallel
+    draaien van CPhiAnalyse, SHANSEP of SUTABEL over veel verzamelingen het geheugengebruik niet vermenigvuldigt.
+    Numerieke kolommen worden als float64 gedeeld (ontbrekende waarden als NaN).
+
+    Voorbeeld
+    ---------
+    >>> with SharedDbase(dbase) as shared:
+    ...     with ProcessPoolExecutor(initializer=attach_worker, initargs=(shared.handle,)) as pool:
+    ...         ...
+    """
+
+    def __init__(self, dbase: Dbase, other_columns: Optional[list] = None):
+        """
+        Parameters
+        ----------
+        dbase : Dbase
+            De Dbase waarvan de dbase_df gepubliceerd wordt
+        other_columns : list, optional
+            Niet-numerieke kolommen die met de handle worden meegestuurd. Standaard alle niet-numerieke kolommen.
+        """
+        dbase_df = dbase.dbase_df
+        if dbase_df is None:
+            raise ValueError("Er is geen dbase_df aanwezig om te publiceren.")
+
+        bool_columns = [col for col in dbase_df.columns if pd.api.types.is_bool_dtype(dbase_df[col])]
+        numeric_columns = [col for col in dbase_df.columns if col not in bool_columns
+                           and pd.api.types.is_numeric_dtype(dbase_df[col])]
+        if other_columns is None:
+            other_columns = [col for col in dbase_df.columns if col not in numeric_columns + bool_columns]
+
+        self._segments: list[shared_memory.SharedMemory] = []
+        numeric_name = self._publish(dbase_df[numeric_columns].to_numpy(dtype=np.float64, na_value=np.nan))
+        bool_name = self._publish(dbase_df[bool_columns].fillna(False).to_numpy(dtype=np.bool_))
+        self.handle = SharedDbaseHandle(
+            numeric_name=numeric_name, numeric_columns=numeric_columns,
+            bool_name=bool_name, bool_columns=bool_columns,
+            index=dbase_df.index.copy(), other_df=dbase_df[other_columns].copy(),
+            columns=list(dbase_df.columns),
+        )
+
+    def _publish(self, values: np.ndarray) -> Optional[str]:
+        """Kopieert een (rijen, kolommen)-array per kolom aaneengesloten naar een nieuw geheugenblok."""
+        if values.size == 0:
+            return None
+        shm = shared_memory.SharedMemory(create=True, size=values.nbytes)
+        target = np.ndarray(values.T.shape, dtype=values.dtype, buffer=shm.buf)
+        target[:] = values.T
+        self._segments.append(shm)
+        return shm.name
+
+    def close(self):
+        """Geeft het gedeelde geheugen vrij. Workers moeten dan al klaar zijn."""
+        for shm in self._segments:
+            shm.close()
+            shm.unlink()
+        self._segments = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def _open_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """Opent een bestaand geheugenblok zonder het (vanaf Python 3.13) opnieuw bij de resource tracker te melden."""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    return shared_memory.SharedMemory(name=name)
+
+
+def attach_worker(handle: SharedDbaseHandle):
+    """Initializer voor een process pool: koppelt de gedeelde Dbase één keer per worker."""
+    global _WORKER_DBASE
+    _WORKER_DBASE = handle.attach()
+
+
+def get_worker_dbase() -> Dbase:
+    """Geeft de Dbase terug die met attach_worker in dit worker-proces is gekoppeld."""
+    if _WORKER_DBASE is None:
+        raise ValueError("Er is in dit proces geen gedeelde Dbase gekoppeld. Gebruik attach_worker als initializer.")
+    return _WORKER_DBASE
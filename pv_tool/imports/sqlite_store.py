@@ -0,0 +1,291 @@
+from __future__ import annotations
+import json
+import sqlite3
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Optional
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+from pv_tool.imports.results_store import _row_identity
+
+if TYPE_CHECKING:
+    from pv_tool.imports.import_data import Dbase
+
+INDEX_COLUMN = 'ALG__BORING_MONSTERNR_ID'
+
+# Koppeling tussen de proeftypes en de ALG-vlaggen in de Dbase
+TEST_TYPE_FLAGS = {
+    'TXT': 'ALG__TRIAXIAAL',
+    'DSS': 'ALG__DSS',
+    'CRS': 'ALG__CRS',
+    'SD': 'ALG__SAMENDRUKKING',
+    'CLAS': 'ALG__CLASSIFICATIE',
+}
+INDEXED_COLUMNS = ['BORING_NUMMER', 'PV_NAAM'] + list(TEST_TYPE_FLAGS.values())
+
+
+def _quote(name: str) -> str:
+    """Zet een kolomnaam tussen dubbele aanhalingstekens (kolomnamen bevatten o.a. apostroffen)."""
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _dtype_kind(series: pd.Series) -> str:
+    """Geeft het soort kolom terug dat nodig is om de kolom na het laden weer te herstellen."""
+    if pd.api.types.is_bool_dtype(series):
+        return 'bool'
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return 'datetime'
+    if pd.api.types.is_integer_dtype(series):
+        return 'int'
+    if pd.api.types.is_float_dtype(series):
+        return 'float'
+    return 'text'
+
+
+SQL_TYPES = {'bool': 'INTEGER', 'int': 'INTEGER', 'float': 'REAL', 'datetime': 'TEXT', 'text': ''}
+
+
+def _to_records(df: DataFrame) -> list[tuple]:
+    """Zet een dataframe om naar rijen met waarden die sqlite3 kan opslaan (NaN/NA -> NULL)."""
+    converted = {}
+    for col in df.columns:
+        series = df[col]
+        kind = _dtype_kind(series)
+        if kind == 'datetime':
+            values = series.dt.strftime('%Y-%m-%dT%H:%M:%S').to_numpy(dtype=object)
+        elif kind == 'bool':
+            values = series.astype(int).to_numpy(dtype=object)
+        else:
+            values = series.to_numpy(dtype=object)
+        values = np.where(pd.isna(values), None, values)
+        if kind == 'text':
+            values = np.array([v.isoformat() if isinstance(v, pd.Timestamp) else v for v in values], dtype=object)
+        converted[col] = values
+    return list(zip(*converted.values())) if converted else []
+
+
+def _identity(record: dict) -> str:
+    """Sleutel van een resultaat in de tabel `results`: PV_RESULTAAT_ID plus de instellingen (zie _row_identity)."""
+    return json.dumps(_row_identity(record))
+
+
+class SQLiteStore:
+    """
+    Optionele SQLite-opslag voor de Dbase.
+
+    De monsters (inclusief ANA-kolommen en PV_NAAM) staan in de tabel `samples` met ALG__BORING_MONSTERNR_ID als
+    sleutel en indexen op BORING_NUMMER, PV_NAAM en de proefvlaggen. Analyseresultaten staan per tabblad in de tabel
+    `results`, met één rij per PV_RESULTAAT_ID en instellingen (zoals in de template). Het kolomtype van iedere
+    Dbase-kolom wordt bijgehouden in `columns`, zodat een geladen Dbase dezelfde types heeft als de opgeslagen Dbase.
+    """
+
+    def __init__(self, db_path: str | Path):
+        self.db_path = Path(db_path)
+        self.connection = sqlite3.connect(self.db_path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self._create_tables()
+
+    def _create_tables(self):
+        with self.connection:
+            self.connection.execute(
+                f"CREATE TABLE IF NOT EXISTS samples ({_quote(INDEX_COLUMN)} TEXT PRIMARY KEY)")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS columns (name TEXT PRIMARY KEY, kind TEXT, position INTEGER)")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS results (sheet TEXT, PV_RESULTAAT_ID TEXT, PV_NAAM TEXT, "
+                "Timestamp TEXT, data TEXT, identity TEXT)")
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS idx_results ON results (sheet, PV_RESULTAAT_ID, Timestamp)")
+            self._migrate_results()
+            self.connection.execute(
+                "CREATE UNIQUE INDEX IF NOT EXISTS idx_results_identity ON results (sheet, identity)")
+
+    def _migrate_results(self):
+        """
+        Vult de kolom identity voor resultaten uit een oudere database, waarin ieder opslaan een nieuwe rij gaf.
+        Van dubbele resultaten blijft alleen de laatst opgeslagen rij over.
+        """
+        names = [row[1] for row in self.connection.execute("PRAGMA table_info(results)")]
+        if 'identity' not in names:
+            self.connection.execute("ALTER TABLE results ADD COLUMN identity TEXT")
+        rows = self.connection.execute("SELECT rowid, data FROM results WHERE identity IS NULL").fetchall()
+        if not rows:
+            return
+        self.connection.executemany("UPDATE results SET identity = ? WHERE rowid = ?",
+                                    [(_identity(json.loads(data)), rowid) for rowid, data in rows])
+        self.connection.execute(
+            "DELETE FROM results WHERE rowid NOT IN (SELECT MAX(rowid) FROM results GROUP BY sheet, identity)")
+
+    def _columns(self) -> dict[str, tuple[str, int]]:
+        rows = self.connection.execute("SELECT name, kind, position FROM columns").fetchall()
+        return {name: (kind, position) for name, kind, position in rows}
+
+    def _add_columns(self, df: DataFrame):
+        """Voegt nog onbekende kolommen toe aan de tabel `samples` en legt hun type vast."""
+        known = self._columns()
+        position = max([pos for _, pos in known.values()], default=-1) + 1
+        for col in df.columns:
+            if col in known:
+                continue
+            kind = _dtype_kind(df[col])
+            self.connection.execute(f"ALTER TABLE samples ADD COLUMN {_quote(col)} {SQL_TYPES[kind]}")
+            self.connection.execute("INSERT INTO columns (name, kind, position) VALUES (?, ?, ?)",
+                                    (col, kind, position))
+            if col in INDEXED_COLUMNS:
+                self.connection.execute(
+                    f"CREATE INDEX IF NOT EXISTS {_quote('idx_' + col)} ON samples ({_quote(col)})")
+            position += 1
+
+    def upsert(self, dbase_df: DataFrame):
+        """
+        Voegt monsters toe of werkt bestaande monsters bij op basis van ALG__BORING_MONSTERNR_ID.
+
+        Parameters
+        ----------
+        dbase_df: DataFrame
+            Dbase-dataframe zoals opgebouwd door Dbase.import_data (Stowa, PV-tool of Dbase)
+        """
+        if dbase_df.index.name != INDEX_COLUMN and INDEX_COLUMN not in dbase_df.columns:
+            raise ValueError(f"De kolom '{INDEX_COLUMN}' ontbreekt; deze is nodig als sleutel.")
+        df = dbase_df.reset_index() if INDEX_COLUMN not in dbase_df.columns else dbase_df
+        df = df[df[INDEX_COLUMN].notna()]
+        df = df.astype({INDEX_COLUMN: str})
+
+        columns = [INDEX_COLUMN] + [col for col in df.columns if col != INDEX_COLUMN]
+        names = ", ".join(_quote(col) for col in columns)
+        placeholders = ", ".join("?" for _ in columns)
+        updates = ", ".join(f"{_quote(col)}=excluded.{_quote(col)}" for col in columns[1:])
+        statement = f"INSERT INTO samples ({names}) VALUES ({placeholders}) ON CONFLICT({_quote(INDEX_COLUMN)}) "
+        statement += f"DO UPDATE SET {updates}" if updates else "DO NOTHING"
+
+        with self.connection:
+            self._add_columns(df[[col for col in columns if col != INDEX_COLUMN]])
+            self.connection.executemany(statement, _to_records(df[columns]))
+
+    def load(self, groups: Optional[Iterable[str]] = None, test_types: Optional[Iterable[str]] = None,
+             borings: Optional[Iterable[str]] = None) -> DataFrame:
+        """
+        Laadt (een selectie van) de monsters als dbase-dataframe.
+
+        Parameters
+        ----------
+        groups: Iterable[str], optional
+            Alleen monsters met deze PV_NAAM
+        test_types: Iterable[str], optional
+            Alleen monsters waarvan minstens één van deze proeven is uitgevoerd ('TXT', 'DSS', 'CRS', 'SD', 'CLAS')
+        borings: Iterable[str], optional
+            Alleen monsters uit deze boringen (BORING_NUMMER)
+
+        Returns
+        -------
+        DataFrame
+            Dbase-dataframe met ALG__BORING_MONSTERNR_ID als index
+        """
+        known = self._columns()
+        conditions, params = [], []
+        for col, values in [('PV_NAAM', groups), ('BORING_NUMMER', borings)]:
+            if values is None:
+                continue
+            values = list(values)
+            if col not in known or not values:
+                return self._restore(DataFrame(columns=[INDEX_COLUMN] + list(known)), known)
+            conditions.append(f"{_quote(col)} IN ({', '.join('?' for _ in values)})")
+            params.extend(values)
+        if test_types is not None:
+            flags = []
+            for test_type in test_types:
+                if test_type not in TEST_TYPE_FLAGS:
+                    raise ValueError(f"Onbekend proeftype '{test_type}'. Kies uit: {', '.join(TEST_TYPE_FLAGS)}.")
+                if TEST_TYPE_FLAGS[test_type] in known:
+                    flags.append(f"{_quote(TEST_TYPE_FLAGS[test_type])} = 1")
+            conditions.append("(" + " OR ".join(flags) + ")" if flags else "0")
+
+        query = "SELECT * FROM samples"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        df = pd.read_sql_query(query, self.connection, params=params)
+        return self._restore(df, known)
+
+    @staticmethod
+    def _restore(df: DataFrame, known: dict[str, tuple[str, int]]) -> DataFrame:
+        """Herstelt kolomvolgorde en -types van een uit SQLite gelezen dataframe."""
+        for col, (kind, _) in known.items():
+            if kind == 'bool':
+                df[col] = df[col].fillna(0).astype(bool)
+            elif kind == 'datetime':
+                df[col] = pd.to_datetime(df[col])
+            elif kind == 'float':
+                df[col] = pd.to_numeric(df[col], errors='coerce').astype(float)
+        ordered = sorted(known, key=lambda col: known[col][1])
+        return df.set_index(INDEX_COLUMN)[ordered]
+
+    def add_results(self, sheet: str, results_df: DataFrame):
+        """
+        Slaat analyseresultaten op. Een resultaat met hetzelfde PV_RESULTAAT_ID en dezelfde instellingen
+        (PV_TYPEVERZAMELING, PV_PARTPHI, PV_PARTCOH) vervangt het opgeslagen resultaat, zoals in de template.
+
+        Parameters
+        ----------
+        sheet: str
+            Naam van het resultaten-tabblad, bijvoorbeeld 'Resultaten c-phi'
+        results_df: DataFrame
+            Resultaten met minimaal de kolommen PV_RESULTAAT_ID en Timestamp
+        """
+        if 'PV_RESULTAAT_ID' not in results_df.columns:
+            raise ValueError("De kolom 'PV_RESULTAAT_ID' ontbreekt in de resultaten.")
+        group_col = 'PV_NAAM' if 'PV_NAAM' in results_df.columns else 'PVNAAM'
+        rows = []
+        for record in results_df.to_dict(orient='records'):
+            record = {key: (None if pd.isna(value) else value.isoformat() if isinstance(value, pd.Timestamp)
+                            else value) for key, value in record.items()}
+            rows.append((sheet, record['PV_RESULTAAT_ID'], record.get(group_col), record.get('Timestamp'),
+                         json.dumps(record, default=str), _identity(record)))
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO results (sheet, PV_RESULTAAT_ID, PV_NAAM, Timestamp, data, identity) "
+                "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(sheet, identity) DO UPDATE SET "
+                "PV_RESULTAAT_ID=excluded.PV_RESULTAAT_ID, PV_NAAM=excluded.PV_NAAM, "
+                "Timestamp=excluded.Timestamp, data=excluded.data", rows)
+
+    def load_results(self, sheet: str, groups: Optional[Iterable[str]] = None) -> DataFrame:
+        """Laadt de opgeslagen resultaten van één tabblad, optioneel gefilterd op PV_NAAM."""
+        query = "SELECT data FROM results WHERE sheet = ?"
+        params = [sheet]
+        if groups is not None:
+            groups = list(groups)
+            query += f" AND PV_NAAM IN ({', '.join('?' for _ in groups)})"
+            params.extend(groups)
+        rows = self.connection.execute(query + " ORDER BY rowid", params).fetchall()
+        results_df = DataFrame([json.loads(data) for (data,) in rows])
+        if 'Timestamp' in results_df.columns:
+            results_df['Timestamp'] = pd.to_datetime(results_df['Timestamp'])
+        return results_df
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def save_to_sqlite(self: Dbase, db_path: str | Path):
+    """Slaat de dbase-dataframe op in (of werkt hem bij in) een SQLite-bestand."""
+    if self.dbase_df is None:
+        raise ValueError("Er is geen dbase_df aanwezig om op te slaan.")
+    with SQLiteStore(db_path) as store:
+        store.upsert(self.dbase_df)
+
+
+def load_from_sqlite(self: Dbase, db_path: str | Path, groups: Optional[Iterable[str]] = None,
+                     test_types: Optional[Iterable[str]] = None):
+    """Laadt (een selectie van) de monsters uit een SQLite-bestand in de dbase-dataframe."""
+    if not Path(db_path).exists():
+        raise FileNotFoundError(f"Er is geen database aanwezig op de locatie {db_path}.")
+    with SQLiteStore(db_path) as store:
+        self.dbase_df = store.load(groups=groups, test_types=test_types)
+    return self.dbase_df
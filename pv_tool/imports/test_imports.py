@@ -4,6 +4,29 @@ from pv_tool.imports.import_data import Dbase
 from pv_tool.utilities.utils import get_repo_root, make_temp_folder
 from pathlib import Path
 import shutil
+import pandas as pd
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from pv_tool.imports.shared_dbase import SharedDbase, attach_worker, get_worker_dbase
+from pv_tool.imports.federated_catalog import FederatedCatalog
+from pv_tool.imports.location_check import location_flags
+from pv_tool.imports.excel_utils import column_widths, write_formatted_sheet
+from openpyxl import load_workbook
+from pv_tool.imports.results_store import get_results_store, record_result
+from pv_tool.imports.sqlite_store import SQLiteStore
+from pv_tool.imports.excel_reader import (available_engines, benchmark_excel_reader, find_header_row,
+                                          get_excel_engine, read_excel, set_excel_engine)
+from pv_tool.imports.import_options import import_dbase
+from pv_tool.imports.results_journal import ResultsJournal, read_results_sheet, write_result
+from pv_tool.utilities.resources import template_bytes, load_template, copy_template
+from pv_tool.utilities.widget_functions_cphi import maak_verzamelings_lijsten
+import tempfile
+from pv_tool.imports.validate_catagories import IsEmptyValidator
+from pandas_schema import Column, Schema
+import json
+import sqlite3
+from pv_tool.imports.validation_rules import RuleSet
+from pandas_schema.validation import InRangeValidation
 
 FILE_PATH = os.path.join(get_repo_root(), "test_files")
 
@@ -49,6 +72,565 @@ def test_validate():
     assert True
 
 
+def _make_catalog_dbase():
+    dbase = Dbase()
+    dbase.dbase_df = pd.DataFrame({
+        'PV_NAAM': ['klei', 'klei', 'veen', 'veen', None],
+        'ALG__TRIAXIAAL': [True, True, False, True, True],
+        'ALG__DSS': [False, True, True, False, False],
+        'ALG__CRS': [False, False, True, False, False],
+        'ALG__SAMENDRUKKING': [False, False, False, False, False],
+        'ALG__CLASSIFICATIE': [True, True, True, True, True],
+        'BORING_NUMMER': ['B1', 'B2', 'B2', 'B2', 'B3'],
+        'MONSTER_NIVEAU_NAP_VANAF': [-1.0, -2.0, -3.0, -4.0, -5.0],
+        'MONSTER_NIVEAU_NAP_TOT': [-1.5, -2.5, -3.5, -4.5, -5.5],
+    }, index=pd.Index(['1_B1_1', '2_B2_1', '3_B2_2', '4_B2_3', '5_B3_1'], name='ALG__BORING_MONSTERNR_ID'))
+    return dbase
+
+
+def test_group_catalog():
+    dbase = _make_catalog_dbase()
+    catalog = dbase.catalog.build()
+    assert catalog.index.tolist() == ['klei', 'veen']
+    assert catalog.loc['klei', 'AANTAL_TXT'] == 2
+    assert catalog.loc['klei', 'AANTAL_DSS'] == 1
+    assert catalog.loc['veen', 'AANTAL_CRS'] == 1
+    assert catalog.loc['klei', 'AANTAL_BORINGEN'] == 2
+    assert catalog.loc['veen', 'NAP_MIN'] == -4.5
+    assert catalog.loc['veen', 'NAP_MAX'] == -3.0
+    assert not catalog['HEEFT_RESULTATEN'].any()
+    assert dbase.catalog.groups('DSS') == ['klei', 'veen']
+
+
+def test_group_catalog_update():
+    dbase = _make_catalog_dbase()
+    dbase.catalog.build()
+    dbase.dbase_df.loc['2_B2_1', 'PV_NAAM'] = 'veen'
+    dbase.dbase_df.loc['5_B3_1', 'PV_NAAM'] = 'zand'
+    dbase.catalog.update(['2_B2_1', '5_B3_1'])
+
+    expected = dbase.catalog.catalog_df.copy()
+    rebuilt = dbase.catalog.build()
+    pd.testing.assert_frame_equal(expected, rebuilt, check_dtype=False)
+    assert rebuilt.loc['klei', 'AANTAL_MONSTERS'] == 1
+    assert rebuilt.loc['veen', 'AANTAL_MONSTERS'] == 3
+
+
+def test_verzamelings_lijsten():
+    dbase = _make_catalog_dbase()
+    dbase.dbase_df.loc['5_B3_1', 'PV_NAAM'] = ''
+    fallback = maak_verzamelings_lijsten(dbase.dbase_df)
+    assert fallback == (['geen', 'klei', 'veen'], ['geen', 'klei', 'veen'])
+    assert maak_verzamelings_lijsten(dbase.dbase_df, catalog=dbase.catalog) == fallback
+    assert not dbase.catalog.is_stale()
+
+    # Een aanpassing zonder refresh_rows maakt de catalogus verouderd; de lijsten worden dan opnieuw opgebouwd
+    dbase.dbase_df.loc['5_B3_1', 'PV_NAAM'] = 'zand'
+    assert dbase.catalog.is_stale()
+    lijsten = maak_verzamelings_lijsten(dbase.dbase_df, catalog=dbase.catalog)
+    assert lijsten == maak_verzamelings_lijsten(dbase.dbase_df) == (['geen', 'klei', 'veen', 'zand'],
+                                                                    ['geen', 'klei', 'veen'])
+    # Via refresh_rows blijft de catalogus actueel
+    dbase.dbase_df.loc['4_B2_3', 'ALG__DSS'] = True
+    dbase.dbase_df.loc['4_B2_3', 'PV_NAAM'] = 'zand'
+    dbase.catalog.update(['4_B2_3'])
+    assert not dbase.catalog.is_stale()
+    assert maak_verzamelings_lijsten(dbase.dbase_df, catalog=dbase.catalog) == maak_verzamelings_lijsten(
+        dbase.dbase_df)
+
+
+def _count_worker_txt(group):
+    dbase_df = get_worker_dbase().dbase_df
+    return int((dbase_df['ALG__TRIAXIAAL'] & (dbase_df['PV_NAAM'] == group)).sum())
+
+
+def test_shared_dbase():
+    dbase = _make_catalog_dbase()
+    with SharedDbase(dbase) as shared:
+        attached = shared.handle.attach()
+        attached_df = attached.dbase_df
+        pd.testing.assert_frame_equal(attached_df, dbase.dbase_df)
+        # Iedere gedeelde kolom is een view op het geheugenblok, ook zonder Copy-on-Write
+        for column in shared.handle.numeric_columns:
+            assert np.shares_memory(attached_df[column].to_numpy(), attached._shared_memory[0].buf)
+        for column in shared.handle.bool_columns:
+            assert np.shares_memory(attached_df[column].to_numpy(), attached._shared_memory[1].buf)
+
+        with ProcessPoolExecutor(max_workers=1, initializer=attach_worker, initargs=(shared.handle,)) as pool:
+            assert list(pool.map(_count_worker_txt, ['klei', 'veen'])) == [2, 1]
+        del attached, attached_df
+
+
+def test_sqlite_store():
+    dbase = _make_catalog_dbase()
+    dbase.dbase_df['BORING_DATUM'] = pd.Timestamp('2024-01-01')
+    export_dir = make_temp_folder(parent_folder=os.path.join(get_repo_root()), add_microseconds=True)
+    db_path = Path(export_dir) / "dbase.sqlite"
+    try:
+        dbase.save_to_sqlite(db_path=db_path)
+        dbase.dbase_df.loc['1_B1_1', 'MONSTER_NIVEAU_NAP_VANAF'] = -1.25
+        dbase.save_to_sqlite(db_path=db_path)
+
+        loaded = Dbase()
+        loaded.load_from_sqlite(db_path=db_path)
+        pd.testing.assert_frame_equal(loaded.dbase_df, dbase.dbase_df, check_dtype=False)
+
+        loaded.load_from_sqlite(db_path=db_path, groups=['veen'], test_types=['TXT'])
+        assert loaded.dbase_df.index.tolist() == ['4_B2_3']
+        assert loaded.catalog.groups('TXT') == ['veen']
+
+        # Hetzelfde resultaat met dezelfde instellingen vervangt het opgeslagen resultaat, zoals in de template
+        def result(typeverzameling, phi, timestamp):
+            return pd.DataFrame({'PV_RESULTAAT_ID': ['klei_5%_DSS_CPhi'], 'PV_NAAM': ['klei'],
+                                 'PV_TYPEVERZAMELING': [typeverzameling], 'PV_PARTPHI': [1.1], 'PV_PARTCOH': [1.25],
+                                 'PV_PHI_KAR': [phi], 'Timestamp': [pd.Timestamp(timestamp)]})
+
+        with SQLiteStore(db_path) as store:
+            store.add_results('Resultaten c-phi', result(0.05, 20.0, '2024-01-01'))
+            store.add_results('Resultaten c-phi', result(0.05, 21.0, '2024-01-02'))
+            store.add_results('Resultaten c-phi', result(0.1, 22.0, '2024-01-03'))
+            assert store.load_results('Resultaten c-phi')['PV_PHI_KAR'].tolist() == [21.0, 22.0]
+
+        # Een database van vóór de sleutel: dubbele resultaten worden bij het openen samengevoegd
+        with sqlite3.connect(db_path) as connection:
+            connection.execute("DROP TABLE results")
+            connection.execute("CREATE TABLE results (sheet TEXT, PV_RESULTAAT_ID TEXT, PV_NAAM TEXT, "
+                               "Timestamp TEXT, data TEXT)")
+            connection.executemany("INSERT INTO results VALUES ('Resultaten c-phi', 'klei_5%_DSS_CPhi', 'klei', ?, ?)",
+                                   [(timestamp, json.dumps({'PV_RESULTAAT_ID': 'klei_5%_DSS_CPhi',
+                                                                 'PV_TYPEVERZAMELING': 0.05, 'PV_PHI_KAR': phi}))
+                                    for timestamp, phi in [('2024-01-01', 20.0), ('2024-01-02', 21.0)]])
+        connection.close()
+        with SQLiteStore(db_path) as store:
+            assert store.load_results('Resultaten c-phi')['PV_PHI_KAR'].tolist() == [21.0]
+            store.add_results('Resultaten c-phi', result(0.05, 23.0, '2024-01-04').drop(
+                columns=['PV_PARTPHI', 'PV_PARTCOH']))
+            assert store.load_results('Resultaten c-phi')['PV_PHI_KAR'].tolist() == [23.0]
+    finally:
+        shutil.rmtree(export_dir)
+
+
+def test_federated_catalog():
+    export_dir = Path(make_temp_folder(parent_folder=os.path.join(get_repo_root()), add_microseconds=True))
+    try:
+        for project, grondsoort in [('project_a', 'Veen'), ('project_b', 'Klei')]:
+            dbase = _make_catalog_dbase()
+            dbase.dbase_df['DSS_GRONDSOORT'] = grondsoort
+            dbase.dbase_df.to_excel(export_dir / f"{project}.xlsx", sheet_name='Dbase5_0', startrow=6)
+
+        catalog = FederatedCatalog(export_dir, cache_path=export_dir / "catalog.json")
+        overview = catalog.build_index()
+        assert overview['AANTAL_DSS'].tolist() == [2, 2]
+
+        result = catalog.query(test_types=['DSS'], where={'DSS_GRONDSOORT': ['veen']},
+                               columns=['PV_NAAM', 'MONSTER_NIVEAU_NAP_VANAF'])
+        assert result.index.tolist() == ['2_B2_1', '3_B2_2']
+        assert set(result.columns) == {'PV_NAAM', 'MONSTER_NIVEAU_NAP_VANAF', 'BRON_BESTAND'}
+        assert result['BRON_BESTAND'].str.endswith('project_a.xlsx').all()
+
+        # In blokken van 2 rijen gelezen: dezelfde statistieken en hetzelfde resultaat als een volledige read_excel
+        chunked = FederatedCatalog(export_dir, chunk_rows=2)
+        pd.testing.assert_frame_equal(chunked.build_index(), overview)
+        assert [{k: v for k, v in stats.items() if k != 'signature'} for stats in chunked.stats.values()] == \
+               [{k: v for k, v in stats.items() if k != 'signature'} for stats in catalog.stats.values()]
+        full = read_excel(export_dir / "project_b.xlsx", sheet_name='Dbase5_0', skiprows=6)
+        pd.testing.assert_frame_equal(chunked.query(groups=['klei'], where={'DSS_GRONDSOORT': ['klei']}),
+                                      full[full['PV_NAAM'] == 'klei'].set_index('ALG__BORING_MONSTERNR_ID')
+                                      .assign(BRON_BESTAND=str((export_dir / "project_b.xlsx").resolve())))
+
+        virtual = FederatedCatalog(export_dir, cache_path=export_dir / "catalog.json").to_dbase(
+            groups=['veen'], where={'MONSTER_NIVEAU_NAP_VANAF': (-3.5, 0)})
+        assert len(virtual.dbase_df) == 2
+        assert virtual.catalog.catalog_df.loc['veen', 'AANTAL_MONSTERS'] == 2
+    finally:
+        shutil.rmtree(export_dir)
+
+
+def test_validate_with_schema():
+    dbase = _make_catalog_dbase()
+    dbase.dbase_df['BORING_XID'] = [100.0, -9000.0, None, 100.0, 100.0]
+    dbase.dbase_df['BORING_YID'] = [300000.0, 300000.0, 300000.0, 1.0, 300000.0]
+    dbase.dbase_df['BORING_MAAIVELDPEIL'] = [0.0, 0.0, 0.0, 0.0, 0.0]
+    dbase.dbase_df['BORING_POSITIE'] = ['x', 'x', '', 'x', 'x']
+    dbase.validation.critical = True
+
+    validation_df, error_log = dbase.validation.validate_with_schema(
+        category="Kenmerken van de boring", schema=Schema([
+            Column('BORING_XID', [InRangeValidation(-7000, 300000)]),
+            Column('BORING_YID', [InRangeValidation(289000, 629000)]),
+            Column('BORING_POSITIE', [IsEmptyValidator])]))
+
+    assert error_log == [['2_B2_1', 'BORING_XID', 'was not in the range [-7000, 300000)'],
+                         ['3_B2_2', 'BORING_XID', 'was not in the range [-7000, 300000)'],
+                         ['3_B2_2', 'BORING_POSITIE', 'This cell is empty'],
+                         ['4_B2_3', 'BORING_YID', 'was not in the range [289000, 629000)']]
+    assert validation_df.index.tolist() == ['samenvatting', 'aantal fouten', '2_B2_1', '3_B2_2', '4_B2_3']
+    assert validation_df.loc['aantal fouten', 'BORING_XID_validate'] == 2
+    assert validation_df.loc['samenvatting', 'BORING_YID'] == 'fouten gevonden'
+
+
+def test_validation_rule_file():
+    export_dir = Path(make_temp_folder(parent_folder=os.path.join(get_repo_root()), add_microseconds=True))
+    try:
+        rules_path = export_dir / "project_rules.json"
+        rules_path.write_text(json.dumps({
+            "version": 1,
+            "checks": [{"name": "validate_kenmerken_boring", "category": "Kenmerken van de boring"}],
+            "rules": [
+                {"check": "validate_kenmerken_boring", "column": "BORING_XID", "severity": "critical",
+                 "range": [-10000, 300000]},
+                {"check": "validate_kenmerken_boring", "column": "BORING_NUMMER", "severity": "critical",
+                 "required_if": {"column": "ALG__DSS", "equals": True}, "required": True,
+                 "message": "Boringnummer ontbreekt bij een DSS-proef"},
+                {"check": "validate_kenmerken_boring", "column": "BORING_YID", "severity": "warning",
+                 "range": [289000, 629000]}]}))
+
+        dbase = _make_catalog_dbase()
+        dbase.dbase_df['BORING_XID'] = [100.0, -9000.0, -20000.0, 100.0, 100.0]
+        dbase.dbase_df['BORING_NUMMER'] = ['B1', None, 'B2', None, 'B3']
+        dbase.validation.rules = RuleSet.from_file(rules_path)
+        assert dbase.validation.rules.check_names('critical') == ['validate_kenmerken_boring']
+
+        validation_df, error_log = dbase.validation.validate_with_rules("validate_kenmerken_boring")
+        assert error_log == [['2_B2_1', 'BORING_NUMMER', 'Boringnummer ontbreekt bij een DSS-proef'],
+                             ['3_B2_2', 'BORING_XID', 'was not in the range [-10000, 300000)']]
+        assert validation_df.index.tolist() == ['samenvatting', 'aantal fouten', '2_B2_1', '3_B2_2']
+
+        dbase.validation.critical = False
+        assert dbase.validation.validate_with_rules("validate_kenmerken_boring")[0].shape[0] == 2
+    finally:
+        shutil.rmtree(export_dir)
+
+
+def test_validate_consistentie():
+    dbase = _make_catalog_dbase()
+    dbase.dbase_df['MONSTER_NIVEAU_NAP_TOT'] = [-1.5, -1.0, -3.5, -4.5, -5.5]
+    dbase.dbase_df['CLAS_VOLUMEGEWICHT_NAT'] = [15.0, 15.0, 12.0, 12.0, None]
+    dbase.dbase_df['CLAS_VOLUMEGEWICHT_DRG'] = [10.0, 10.0, 13.0, 8.0, 20.0]
+    dbase.dbase_df['DSS_T_2%'] = [5.0, 5.0, 5.0, 5.0, 5.0]
+    dbase.dbase_df['DSS_T_5%'] = [6.0, None, 4.0, 6.0, 6.0]
+    dbase.dbase_df['DSS_T_10%'] = [7.0, 4.0, 8.0, 7.0, 7.0]
+
+    dbase.validation.critical = True
+    validation_df, error_log = dbase.validation.validate_with_rules("validate_consistentie")
+    assert error_log == [['2_B2_1', 'MONSTER_NIVEAU_NAP_VANAF', 'ligt lager dan MONSTER_NIVEAU_NAP_TOT'],
+                         ['3_B2_2', 'CLAS_VOLUMEGEWICHT_DRG', 'is groter dan CLAS_VOLUMEGEWICHT_NAT']]
+
+    dbase.validation.critical = False
+    validation_df, error_log = dbase.validation.validate_with_rules("validate_consistentie")
+    assert [error[:2] for error in error_log] == [['2_B2_1', 'DSS_T_10%'], ['3_B2_2', 'DSS_T_5%']]
+    assert 'VALIDATE_CONSISTENTIE' not in validation_df.columns
+    assert 'validate_consistentie' in dbase.validation.rules.check_names('warning')
+
+
+def test_revalidate():
+    dbase = _make_catalog_dbase()
+    dbase.dbase_df['MONSTER_NIVEAU_NAP_TOT'] = [-1.5, -1.0, -3.5, -4.5, -5.5]
+    validation = dbase.validation
+    validation.revalidate(index=[])  # zonder eerdere validatie wordt alles gevalideerd
+    assert ['2_B2_1', 'MONSTER_NIVEAU_NAP_VANAF', 'ligt lager dan MONSTER_NIVEAU_NAP_TOT'] \
+        in validation.critical_error_log
+
+    dbase.dbase_df.loc['2_B2_1', 'MONSTER_NIVEAU_NAP_TOT'] = -2.0
+    dbase.dbase_df.loc['4_B2_3', 'MONSTER_NIVEAU_NAP_TOT'] = 0.0
+    dbase.dbase_df = dbase.dbase_df.drop(index='5_B3_1')
+    incremental = validation.revalidate(index=['2_B2_1', '4_B2_3', '5_B3_1'])
+    incremental_table = validation.error_table.sort_values(['row', 'rule'], ignore_index=True)
+
+    validation.validate_rules()
+    full_table = validation.error_table.sort_values(['row', 'rule'], ignore_index=True)
+    pd.testing.assert_frame_equal(incremental_table, full_table, check_dtype=False)
+    assert incremental == [validation.error_log_from_state('critical'), validation.error_log_from_state('warning')]
+    assert ['4_B2_3', 'MONSTER_NIVEAU_NAP_VANAF', 'ligt lager dan MONSTER_NIVEAU_NAP_TOT'] in incremental[0]
+    assert not any(error[0] in ('2_B2_1', '5_B3_1') and error[1] == 'MONSTER_NIVEAU_NAP_VANAF'
+                   for error in incremental[0])
+
+    # Het foutenlog uit de bewaarde toestand is gelijk aan dat van een volledige validatie per check
+    validation.critical = True
+    expected = []
+    for check in validation.rules.check_names('critical'):
+        expected.extend(validation.validate_with_rules(check)[1])
+    assert validation.error_log_from_state('critical') == expected
+
+
+def test_validation_errors_export():
+    dbase = _make_catalog_dbase()
+    dbase.dbase_df['MONSTER_NIVEAU_NAP_TOT'] = [-1.5, -1.0, -3.5, -4.5, -5.5]
+    validation = dbase.validation
+    errors = validation.errors()
+    assert list(errors.columns) == ['row', 'column', 'rule', 'severity', 'check', 'message']
+    critical = errors[errors['severity'] == 'critical']
+    assert critical[['row', 'column', 'message']].values.tolist() == validation.error_log_from_state('critical')
+    assert validation.errors(rows=['2_B2_1'], columns=['MONSTER_NIVEAU_NAP_VANAF'],
+                             check='validate_consistentie')['message'].tolist() == \
+        ['ligt lager dan MONSTER_NIVEAU_NAP_TOT']
+
+    export_dir = Path(make_temp_folder(parent_folder=get_repo_root(), add_microseconds=True))
+    try:
+        csv_path = validation.export_errors(export_dir / 'fouten.csv')
+        assert len(pd.read_csv(csv_path)) == len(errors)
+        html_path = validation.export_errors(export_dir, severity='critical')
+        assert html_path.suffix == '.html' and '2_B2_1' in html_path.read_text(encoding='utf-8')
+        xlsx_path = validation.export_errors(export_dir / 'fouten.xlsx')
+        assert len(pd.read_excel(xlsx_path)) == len(errors)
+        dbase.validate_data(export_path=export_dir, log_format='csv')
+        assert dbase.validation.critical_error_log == validation.error_log_from_state('critical')
+        assert len(list(export_dir.glob('validation_log_*.csv'))) == 1
+    finally:
+        shutil.rmtree(export_dir)
+
+
+def test_location_check():
+    df = pd.DataFrame({
+        'BORING_XID': [121000, 122000, 487000, 50000, 121500, None, 123000],
+        'BORING_YID': [487000, 488000, 121000, 500000, 486500, 487000, 460000],
+        'PV_NAAM': ['klei', 'klei', 'klei', 'klei', 'klei', 'klei', 'klei'],
+    }, index=[f'{i}_B{i}_1' for i in range(1, 8)])
+    flags = location_flags(df)
+    assert flags['BUITEN_GEBIED'].tolist() == [False, False, False, True, False, False, False]
+    assert flags['XY_VERWISSELD'].tolist() == [False, False, True, False, False, False, False]
+    assert flags['GROEP_UITSCHIETER'].tolist() == [False, False, False, False, False, False, True]
+
+    project = [[120000, 486000], [124000, 486000], [124000, 490000], [120000, 490000]]
+    assert location_flags(df, polygon=project, tolerance=0, group_column=None)['BUITEN_GEBIED'].tolist() == \
+        [False, False, False, True, False, False, True]
+
+    dbase = _make_catalog_dbase()
+    dbase.dbase_df['BORING_XID'] = [121000, 122000, 121500, 123000, 50000]
+    dbase.dbase_df['BORING_YID'] = [487000, 488000, 486500, 487000, 500000]
+    dbase.validation.critical = False
+    validation_df, error_log = dbase.validation.validate_with_rules("validate_locatie")
+    assert error_log == [['5_B3_1', 'BORING_XID', 'ligt buiten Nederland']]
+    # De drie locatiecontroles delen één location_flags-berekening
+    location_checks = [compiled for compiled in dbase.validation.rules.compiled if compiled.check == 'validate_locatie']
+    assert len(location_checks) == 3 and len({compiled.shared for compiled in location_checks}) == 1
+
+    # Een aanpassing van één rij kan een andere rij van dezelfde groep tot uitschieter maken
+    validation = dbase.validation
+    validation.validate_rules()
+    dbase.dbase_df.loc[['1_B1_1', '2_B2_1'], 'PV_NAAM'] = 'veen'
+    dbase.dbase_df.loc['4_B2_3', ['BORING_XID', 'BORING_YID']] = [150000, 450000]
+    validation.revalidate(index=['1_B1_1', '2_B2_1', '4_B2_3'])
+    incremental = validation.errors(check='validate_locatie')
+    validation.validate_rules()
+    pd.testing.assert_frame_equal(incremental, validation.errors(check='validate_locatie'), check_dtype=False)
+    assert incremental['row'].tolist() == ['4_B2_3', '5_B3_1']
+
+
+def test_write_formatted_sheet():
+    df = pd.DataFrame({'PV_NAAM': ['klei', 'veen', None], 'PV_PHI_KAR': [21.123456, 17.5, np.nan]},
+                      index=pd.Index(['1_B1_1', '2_B2_1', '3_B2_2'], name='ALG__BORING_MONSTERNR_ID'))
+    assert column_widths(df) == [len('ALG__BORING_MONSTERNR_ID') + 2, len('PV_NAAM') + 2, len('PV_PHI_KAR') + 2]
+
+    export_dir = Path(make_temp_folder(parent_folder=get_repo_root(), add_microseconds=True))
+    try:
+        file_path = export_dir / 'opgemaakt.xlsx'
+        with pd.ExcelWriter(file_path, engine='xlsxwriter') as writer:
+            write_formatted_sheet(writer, df, sheet_name='Resultaten', table_name='Resultaten Tabel',
+                                  number_formats={'PV_PHI_KAR': '0.00'})
+        # Toevoegen aan een bestaand bestand gaat via openpyxl
+        with pd.ExcelWriter(file_path, engine='openpyxl', mode='a', if_sheet_exists='replace') as writer:
+            write_formatted_sheet(writer, df.reset_index(), sheet_name='Data', index=False,
+                                  number_formats={'PV_PHI_KAR': '0.00'})
+
+        workbook = load_workbook(file_path)
+        for sheet_name, table_name, phi_column in [('Resultaten', 'ResultatenTabel', 'C'), ('Data', 'DataTable', 'C')]:
+            worksheet = workbook[sheet_name]
+            assert list(worksheet.tables) == [table_name]
+            assert worksheet.tables[table_name].ref == 'A1:C4'
+            assert worksheet.column_dimensions['A'].width >= len('ALG__BORING_MONSTERNR_ID')
+            assert worksheet[f'{phi_column}2'].number_format == '0.00'
+        pd.testing.assert_frame_equal(pd.read_excel(file_path, sheet_name='Resultaten', index_col=0), df)
+    finally:
+        shutil.rmtree(export_dir)
+
+
+def test_results_store():
+    export_dir = Path(make_temp_folder(parent_folder=get_repo_root(), add_microseconds=True))
+    try:
+        file_path = export_dir / 'Template_PVtool5_0.xlsx'
+        results = pd.DataFrame({
+            'PV_RESULTAAT_ID': ['klei_15%_DSS_CPhi', 'klei_5%_DSS_CPhi', 'klei_5%_DSS_CPhi', 'veen_5%_DSS_CPhi'],
+            'PV_NAAM': ['klei', 'klei', 'klei', 'veen'],
+            'PV_REK': ['15%', '5%', '5%', '5%'],
+            'PV_TYPE_PROEF': ['DSS', 'DSS', 'DSS', 'DSS'],
+            'PV_ANALYSE': ['CPhi', 'CPhi', 'CPhi', 'CPhi'],
+            'PV_TYPEVERZAMELING': [0.05, 0.05, 0.1, 0.05],
+            'PV_PHI_KAR': [30.0, 20.0, 22.0, 15.0],
+            'Timestamp': ['2024-01-03 10:00:00', '2024-01-01 10:00:00', '2024-01-02 10:00:00', '2024-01-01 10:00:00'],
+        })
+        with pd.ExcelWriter(file_path) as writer:
+            results.to_excel(writer, sheet_name='Resultaten c-phi', startrow=6, index=False)
+
+        store = get_results_store(file_path)
+        assert store.latest('Resultaten c-phi', 'klei', 'DSS_CPhi', '5%')['PV_PHI_KAR'] == 22.0
+        assert store.latest('Resultaten c-phi', 'klei', 'DSS_CPhi', '5%',
+                            settings={'PV_TYPEVERZAMELING': 0.05})['PV_PHI_KAR'] == 20.0
+        assert store.latest('Resultaten c-phi', 'klei', 'DSS_SH', '5%') is None
+        assert store.has_results('Resultaten c-phi', 'veen') and not store.has_results('Resultaten SHANSEP', 'veen')
+
+        # Opnieuw opvragen leest het bestand niet opnieuw in; een toegevoegd resultaat staat direct in de index
+        assert get_results_store(file_path) is store
+        sheets = store.sheets
+        record_result(file_path, 'Resultaten c-phi', {'PV_NAAM': 'veen', 'PV_REK': '5%', 'PV_TYPE_PROEF': 'DSS',
+                                                      'PV_ANALYSE': 'CPhi', 'PV_PHI_KAR': 16.0,
+                                                      'Timestamp': '2024-02-01 10:00:00'})
+        assert get_results_store(file_path).sheets is sheets
+        assert store.latest('Resultaten c-phi', 'veen', 'DSS_CPhi', '5%')['PV_PHI_KAR'] == 16.0
+
+        # Na een wijziging van het bestand wordt opnieuw ingelezen
+        with pd.ExcelWriter(file_path) as writer:
+            results.iloc[:1].to_excel(writer, sheet_name='Resultaten c-phi', startrow=6, index=False)
+        os.utime(file_path, ns=(store.signature[0] + 10 ** 9, store.signature[0] + 10 ** 9))
+        assert get_results_store(file_path).latest('Resultaten c-phi', 'veen', 'DSS_CPhi', '5%') is None
+
+        dbase = _make_catalog_dbase()
+        catalog = dbase.catalog.scan_results(export_dir)
+        assert catalog['RESULTATEN_CPHI'].tolist() == [True, False]
+    finally:
+        shutil.rmtree(export_dir)
+
+
+def test_results_journal():
+    export_dir = Path(make_temp_folder(parent_folder=get_repo_root(), add_microseconds=True))
+    try:
+        file_path = export_dir / 'Template_PVtool5_0.xlsx'
+        sidecar_path = export_dir / 'resultaten.jsonl'
+        columns = ['PV_RESULTAAT_ID', 'PV_NAAM', 'PV_REK', 'PV_TYPE_PROEF', 'PV_ANALYSE', 'PV_TYPEVERZAMELING',
+                   'PV_PHI_KAR', 'Timestamp']
+        existing = pd.DataFrame([['klei_5%_DSS_CPhi', 'klei', '5%', 'DSS', 'CPhi', 0.05, 20.0, '2024-01-01 10:00:00']],
+                                columns=columns)
+        with pd.ExcelWriter(file_path) as writer:
+            existing.to_excel(writer, sheet_name='Resultaten c-phi', startrow=6, index=False)
+        store = get_results_store(file_path)
+
+        def result(group, typeverzameling, phi):
+            return dict(zip(columns, [f'{group}_5%_DSS_CPhi', group, '5%', 'DSS', 'CPhi', typeverzameling, phi,
+                                      '2024-02-01 10:00:00']))
+
+        journal = ResultsJournal(file_path, sidecar_path=sidecar_path)
+        journal.add('Resultaten c-phi', result('klei', 0.05, 21.0), columns)
+        journal.add('Resultaten c-phi', result('veen', 0.05, 15.0), columns)
+        signature = store.signature
+
+        # Na een crash staan de rijen nog in het sidecar-bestand; de template is nog niet gewijzigd
+        recovered = ResultsJournal(file_path, sidecar_path=sidecar_path)
+        assert len(recovered) == 2 and recovered.rows()['PV_NAAM'].tolist() == ['klei', 'veen']
+        assert store._file_signature() == signature
+
+        recovered.flush()
+        assert not sidecar_path.exists() and len(recovered) == 0
+        results = pd.read_excel(file_path, sheet_name='Resultaten c-phi', skiprows=6)
+        # Hetzelfde PV_RESULTAAT_ID met dezelfde instellingen vervangt de bestaande rij
+        assert results['PV_RESULTAAT_ID'].tolist() == ['klei_5%_DSS_CPhi', 'veen_5%_DSS_CPhi']
+        assert results['PV_PHI_KAR'].tolist() == [21.0, 15.0]
+        assert store.latest('Resultaten c-phi', 'veen', 'DSS_CPhi', '5%')['PV_PHI_KAR'] == 15.0
+        assert len(store.sheets['Resultaten c-phi']) == 2
+
+        # Andere instellingen geven een extra rij; zonder journal wordt direct geschreven
+        row_df = write_result(file_path, 'Resultaten c-phi', result('klei', 0.1, 23.0), columns)
+        assert row_df['PV_PHI_KAR'].tolist() == [23.0]
+        results = pd.read_excel(file_path, sheet_name='Resultaten c-phi', skiprows=6)
+        assert results['PV_TYPEVERZAMELING'].tolist() == [0.05, 0.05, 0.1]
+        # Het hele tabblad, zoals add_results_to_template van de SU-tabel het teruggeeft
+        pd.testing.assert_frame_equal(read_results_sheet(file_path, 'Resultaten c-phi'), results)
+        assert get_results_store(file_path).latest('Resultaten c-phi', 'klei', 'DSS_CPhi', '5%',
+                                                   settings={'PV_TYPEVERZAMELING': 0.1})['PV_PHI_KAR'] == 23.0
+    finally:
+        shutil.rmtree(export_dir)
+
+
+def test_results_in_template():
+    # De kopregels van de meegeleverde template hebben eenheden ('PV_PARTPHI [-]') en PVNAAM in plaats van PV_NAAM
+    with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = copy_template(Path(temp_dir) / 'Template_PVtool5_0.xlsx')
+        store = get_results_store(file_path)
+        columns = ['PV_RESULTAAT_ID', 'PV_NAAM', 'PV_REK', 'PV_TYPE_PROEF', 'PV_ANALYSE', 'PV_PARTPHI', 'PV_PARTCOH',
+                   'PV_TYPEVERZAMELING', 'PV_PHI_KAR', 'Timestamp']
+        settings = {'PV_TYPEVERZAMELING': 0.05, 'PV_PARTPHI': 1.1, 'PV_PARTCOH': 1.25}
+        for phi in [20.0, 21.0]:
+            row = dict(zip(columns, ['klei_5%_DSS_CPhi', 'klei', '5%', 'DSS', 'CPhi', 1.1, 1.25, 0.05, phi,
+                                     '2024-02-01 10:00:00']))
+            write_result(file_path, 'Resultaten c-phi', row, columns)
+        results = read_results_sheet(file_path, 'Resultaten c-phi')
+        assert len(results) == 1 and len(store.sheets['Resultaten c-phi']) == 1
+        assert results[['PVNAAM', 'PV_PARTPHI [-]', 'PV_PHI_KAR [graden]']].values.tolist() == [['klei', 1.1, 21]]
+        latest = store.latest('Resultaten c-phi', 'klei', 'DSS_CPhi', '5%', settings=settings)
+        assert latest['PV_PHI_KAR [graden]'] == 21
+        assert store.sync(force=True).latest('Resultaten c-phi', 'klei', 'DSS_CPhi', '5%',
+                                             settings=settings)['PV_PHI_KAR [graden]'] == 21
+
+        # Ook in een journal en op een tabblad zonder PV_PARTPHI en PV_PARTCOH
+        columns = ['PVNAAM', 'PV_REK', 'PV_TYPE_PROEF', 'PV_ANALYSE', 'PV_RESULTAAT_ID', 'PV_TYPEVERZAMELING',
+                   'PV_m_KAR [-]', 'Timestamp']
+        with ResultsJournal(file_path) as journal:
+            for m in [0.8, 0.9]:
+                journal.add('Resultaten SHANSEP', dict(zip(columns, ['klei', '15% rek', 'TXT', 'S_POP',
+                                                                     'klei_15% rek_TXT_S_POP', 0.05, m,
+                                                                     '2024-02-01 10:00:00'])), columns)
+        results = read_results_sheet(file_path, 'Resultaten SHANSEP')
+        assert results['PV_m_KAR [-]'].tolist() == [0.9]
+
+
+def test_template_resources():
+    # De template wordt één keer gelezen en daarna vanuit het geheugen geopend
+    assert template_bytes() is template_bytes()
+    assert 'Dbase5_0' in load_template(read_only=True).sheetnames
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # Buiten een git-checkout valt get_repo_root terug op de map met het pv_tool-package
+        assert Path(get_repo_root(temp_dir)) == Path(__file__).resolve().parents[2]
+        file_path = copy_template(Path(temp_dir) / 'kopie' / 'Template_PVtool5_0.xlsx')
+        assert file_path.read_bytes() == template_bytes()
+        try:
+            template_bytes('bestaat_niet.xlsx')
+            raise AssertionError("Een onbekende template moet een FileNotFoundError geven")
+        except FileNotFoundError:
+            pass
+
+
+def test_excel_reader():
+    export_dir = Path(make_temp_folder(parent_folder=get_repo_root(), add_microseconds=True))
+    try:
+        file_path = export_dir / 'Template_PVtool5_0.xlsx'
+        df = pd.DataFrame({
+            'ALG__BORING_MONSTERNR_ID': ['1_B1_1', '2_B1_2', '3_B2_1'],
+            'PV_NAAM': ['klei', None, 'veen'],
+            'MONSTER_NIVEAU_NAP_VANAF': [-1.25, np.nan, -3.0],
+            'ALG__TRIAXIAAL': [True, False, True],
+            'AANTAL': [1, 2, 3],
+            'DATUM': pd.to_datetime(['2024-01-01', '2024-02-01', '2024-03-01']),
+        })
+        with pd.ExcelWriter(file_path) as writer:
+            pd.DataFrame([['Dbase PV-tool']]).to_excel(writer, sheet_name='Dbase5_0', header=False, index=False)
+            df.to_excel(writer, sheet_name='Dbase5_0', startrow=6, index=False)
+
+        assert 'openpyxl' in available_engines()
+        assert get_excel_engine() == available_engines()[0]
+        assert find_header_row(file_path, 'Dbase5_0', 'ALG__BORING_MONSTERNR_ID') == 6
+        assert find_header_row(file_path, 'Dbase5_0', 'BESTAAT_NIET', scan_rows=2) is None
+
+        # Iedere engine geeft dezelfde Dbase-df als pandas met openpyxl
+        expected = pd.read_excel(file_path, sheet_name='Dbase5_0', skiprows=6, index_col='ALG__BORING_MONSTERNR_ID')
+        try:
+            for engine in available_engines():
+                set_excel_engine(engine)
+                pd.testing.assert_frame_equal(import_dbase(Dbase(), file_path), expected)
+        finally:
+            set_excel_engine(None)
+
+        benchmark = benchmark_excel_reader(file_path, 'Dbase5_0', repeat=1, skiprows=6)
+        assert benchmark['identical'].all() and benchmark.index.tolist() == available_engines()
+
+        try:
+            set_excel_engine('xlrd')
+            raise AssertionError("Een onbekende engine moet een ValueError geven")
+        except ValueError:
+            pass
+    finally:
+        shutil.rmtree(export_dir)
+
+
 class TestImportAndValidate(unittest.TestCase):
 
     def test_import_dbase_data(self):
@@ -62,3 +644,57 @@ class TestImportAndValidate(unittest.TestCase):
 
     def test_validate_data(self):
         test_validate()
+
+    def test_group_catalog(self):
+        test_group_catalog()
+
+    def test_group_catalog_update(self):
+        test_group_catalog_update()
+
+    def test_verzamelings_lijsten(self):
+        test_verzamelings_lijsten()
+
+    def test_shared_dbase(self):
+        test_shared_dbase()
+
+    def test_sqlite_store(self):
+        test_sqlite_store()
+
+    def test_federated_catalog(self):
+        test_federated_catalog()
+
+    def test_validate_with_schema(self):
+        test_validate_with_schema()
+
+    def test_validation_rule_file(self):
+        test_validation_rule_file()
+
+    def test_validate_consistentie(self):
+        test_validate_consistentie()
+
+    def test_revalidate(self):
+        test_revalidate()
+
+    def test_validation_errors_export(self):
+        test_validation_errors_export()
+
+    def test_location_check(self):
+        test_location_check()
+
+    def test_write_formatted_sheet(self):
+        test_write_formatted_sheet()
+
+    def test_results_store(self):
+        test_results_store()
+
+    def test_results_journal(self):
+        test_results_journal()
+
+    def test_results_in_template(self):
+        test_results_in_template()
+
+    def test_template_resources(self):
+        test_template_resources()
+
+    def test_excel_reader(self):
+        test_excel_reader()
@@ -1,6 +1,5 @@
 from __future__ import annotations
-from pv_tool.imports.excel_utils import format_excel_sheet
-import math
+from pv_tool.imports.excel_utils import write_formatted_sheet
 from typing import TYPE_CHECKING, Dict
 from typing import Optional, List, Literal
 import pandas as pd
@@ -9,9 +8,9 @@ from pathlib import Path
 
 from pandas_schema import Schema
 
-from pv_tool.imports.validate_catagories import (validate_alg, validate_kenmerken_boring, validate_monster,
-                                                 validate_clas, validate_crs, validate_samendrukking, validate_dss,
-                                                 validate_triaxiaal)
+from pv_tool.imports.validation_engine import schema_errors
+from pv_tool.imports.validation_report import ERROR_REPORT_COLUMNS, write_error_table
+from pv_tool.imports.validation_rules import RuleSet, rule_errors, rule_error_table
 
 if TYPE_CHECKING:
     from pv_tool.imports.import_data import Dbase
@@ -21,14 +20,18 @@ class Validation:
     """In deze class staan alle functies die nodig zijn om de validatie uit te voeren."""
 
     def __init__(self, dbase: Dbase,
-                 critical: Optional[bool] = True):
+                 critical: Optional[bool] = True,
+                 rules: Optional[RuleSet] = None):
         self.dbase = dbase
+        self.rules = rules if rules is not None else RuleSet.from_file()
         self.dataframes: Optional[Dict] = None
         self.critical = critical
         self.total_error_log: Optional[List] = None
         self.critical_error_log: Optional[List] = None
         self.warning_error_log: Optional[List] = None
         self.error_totals: Optional[List] = []
+        # Fouten per rij en per regel van de laatste validatie (zie validate_rules en revalidate)
+        self.error_table: Optional[pd.DataFrame] = None
 
     def split_dbase(self):
         """Deze functie verdeelt het invoer-dataframe in kleinere dataframes op basis van categorie."""
@@ -112,40 +115,198 @@ class Validation:
         available_columns = [col for col in schema_columns if col in df.columns]
         data_to_validate = df[available_columns]
 
-        # Validate the data
-        errors = schema.validate(data_to_validate)
+        # Validate the data: every rule is evaluated as a whole-column mask
+        errors = schema_errors(data_to_validate, schema)
+        return self._validation_output(df, data_to_validate, available_columns, errors)
 
+    def validate_with_rules(self, check: str, use_state: bool = False):
+        """
+        Valideert de Dbase met de regels uit de rule set voor één check (tabblad in het validatielog).
+        De regels worden op de hele dbase_df toegepast, zodat 'required_if' ook naar andere categorieën kan verwijzen.
+        Met use_state=True worden de fouten uit de laatste (incrementele) validatie gebruikt in plaats van opnieuw
+        berekend. Geeft None terug als er voor deze check geen regels met de huidige ernst (critical/warning) zijn.
+        """
+        severity = 'critical' if self.critical else 'warning'
+        compiled_checks = self.rules.checks_for(check, severity)
+        if not compiled_checks:
+            return None
+
+        df = self.dbase.dbase_df
+        if df is None:
+            raise ValueError("dbase_df is not initialized. Please ensure it is loaded properly.")
+
+        rule_columns = list(dict.fromkeys(compiled.column for compiled in compiled_checks))
+        missing_columns = [col for col in rule_columns if col not in df.columns]
+        if missing_columns:
+            print(f"Ontbrekende kolommen in categorie '{self.rules.checks[check]}': {', '.join(missing_columns)}")
+
+        available_columns = [col for col in rule_columns if col in df.columns]
+        if use_state and self.error_table is not None:
+            errors = self._state_errors(check, severity)[['row', 'column', 'message']]
+        else:
+            errors = rule_errors(df, compiled_checks)
+        return self._validation_output(df, df[available_columns], available_columns, errors,
+                                       drop_rows_with_only_errors=self.rules.drop_rows_with_only_errors[check])
+
+    def validate_rules(self, index=None) -> pd.DataFrame:
+        """
+        Voert alle regels (beide ernstniveaus) uit en bewaart de fouten per rij en per regel in error_table.
+
+        Parameters
+        ----------
+        index: Iterable, optional
+            Indexwaarden (ALG__BORING_MONSTERNR_ID) van rijen die zijn aangepast, toegevoegd of verwijderd sinds de
+            vorige validatie. Alleen deze rijen worden opnieuw gecontroleerd. Bij None (of als er nog geen eerdere
+            validatie is) wordt de hele Dbase gecontroleerd.
+        """
+        df = self.dbase.dbase_df
+        if df is None:
+            raise ValueError("dbase_df is not initialized. Please ensure it is loaded properly.")
+
+        if index is None or self.error_table is None:
+            self.error_table = rule_error_table(df, self.rules.compiled)
+            return self.error_table
+
+        index = pd.Index(list(index)).unique()
+        rows = df.loc[index[index.isin(df.index)]]
+        # Controles die van andere rijen afhangen (zoals uitschieters binnen een groep) gaan over de hele Dbase
+        local = [compiled.row_local for compiled in self.rules.compiled]
+        non_local = [position for position, is_local in enumerate(local) if not is_local]
+        # Fouten van de aangepaste rijen en van rijen die niet meer in de Dbase staan vervallen
+        kept = self.error_table[~self.error_table['row'].isin(index) & self.error_table['row'].isin(df.index)
+                                & ~self.error_table['rule'].isin(non_local)]
+        new_errors = rule_error_table(rows, [compiled if is_local else None
+                                             for compiled, is_local in zip(self.rules.compiled, local)])
+        frames = [kept, new_errors]
+        if non_local:
+            frames.append(rule_error_table(df, [None if is_local else compiled
+                                                for compiled, is_local in zip(self.rules.compiled, local)]))
+        self.error_table = pd.concat([frame for frame in frames if not frame.empty] or [kept], ignore_index=True)
+        return self.error_table
+
+    def _state_errors(self, check: str, severity: str) -> pd.DataFrame:
+        """Geeft de bewaarde fouten van één check en ernst, gesorteerd op rij en daarbinnen op regelvolgorde."""
+        errors = self.error_table[(self.error_table['check'] == check) & (self.error_table['severity'] == severity)]
+        return errors.sort_values(['row', 'rule'], kind='stable', ignore_index=True)
+
+    def _logged_errors(self, check: str, severity: str) -> pd.DataFrame:
+        """
+        Geeft de bewaarde fouten van één check zoals ze in het validatielog komen: net als in het validatielog
+        vervallen de rijen waarin alle kolommen van de check fout zijn.
+        """
+        errors = self._state_errors(check, severity)
+        if not errors.empty and self.rules.drop_rows_with_only_errors[check]:
+            df = self.dbase.dbase_df
+            n_columns = len({compiled.column for compiled in self.rules.checks_for(check, severity)
+                             if compiled.column in df.columns})
+            columns_per_row = errors.groupby('row')['column'].transform('nunique')
+            errors = errors[columns_per_row < n_columns]
+        return errors
+
+    def error_log_from_state(self, severity: str) -> List:
+        """Bouwt het foutenlog (lijst met [rij, kolom, melding]) op uit de bewaarde fouten, zonder Excel te schrijven."""
         error_log = []
-        validation_df = data_to_validate.copy()
+        for check in self.rules.check_names(severity):
+            errors = self._logged_errors(check, severity)
+            error_log.extend([row, column, message] for row, column, message
+                             in errors[['row', 'column', 'message']].itertuples(index=False, name=None))
+        return error_log
+
+    def errors(self, severity: Optional[Literal['critical', 'warning']] = None, check: Optional[str] = None,
+               rows: Optional[List] = None, columns: Optional[List] = None) -> pd.DataFrame:
+        """
+        Geeft de fouten van de laatste validatie als sparse tabel: één rij per fout, met de kolommen 'row',
+        'column', 'rule' (positie van de regel in de rule set), 'severity', 'check' en 'message'. Als er nog niet
+        gevalideerd is, wordt eerst de hele Dbase gevalideerd.
+
+        Parameters
+        ----------
+        severity: str, optional
+            Alleen 'critical' of alleen 'warning'
+        check: str, optional
+            Alleen de fouten van deze check (tabblad in het validatielog), bijvoorbeeld 'validate_dss'
+        rows: List, optional
+            Alleen de fouten in deze rijen (ALG__BORING_MONSTERNR_ID)
+        columns: List, optional
+            Alleen de fouten in deze kolommen
+        """
+        if self.error_table is None:
+            self.validate_rules()
+        frames = [self._logged_errors(name, level)
+                  for level in ([severity] if severity is not None else ['critical', 'warning'])
+                  for name in self.rules.check_names(level) if check is None or name == check]
+        errors = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=ERROR_REPORT_COLUMNS)
+        if rows is not None:
+            errors = errors[errors['row'].isin(rows)]
+        if columns is not None:
+            errors = errors[errors['column'].isin(columns)]
+        return errors[ERROR_REPORT_COLUMNS].reset_index(drop=True)
+
+    def export_errors(self, export_path: Path, file_format: Optional[str] = None, **filters) -> Path:
+        """
+        Schrijft de fouttabel (zie errors) naar Parquet, CSV, een HTML-rapport met filters of Excel.
+
+        Parameters
+        ----------
+        export_path: Path
+            Map of bestandspad. Bij een map wordt 'validation_log_<tijd>.<formaat>' gebruikt.
+        file_format: str, optional
+            'parquet', 'csv', 'html' of 'xlsx'; standaard volgt het formaat uit de extensie (of 'html' bij een map)
+        filters:
+            Filters die worden doorgegeven aan errors (severity, check, rows, columns)
+        """
+        export_path = Path(export_path)
+        if export_path.is_dir():
+            file_format = file_format or 'html'
+            export_path = export_path / f"validation_log_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{file_format}"
+        return write_error_table(self.errors(**filters), export_path, file_format=file_format)
 
-        # Populate the validation columns with error messages
+    def revalidate(self, index, export_path: Optional[Path] = None):
+        """
+        Controleert alleen de opgegeven (aangepaste) rijen opnieuw en werkt de foutenlogs bij.
+
+        Parameters
+        ----------
+        index: Iterable
+            Indexwaarden van de aangepaste, toegevoegde of verwijderde rijen
+        export_path: Path, optional
+            Als opgegeven worden ook de Excel-logbestanden opnieuw geschreven (zonder opnieuw te valideren)
+        """
+        self.validate_rules(index=index)
+        self.critical_error_log = self.error_log_from_state('critical')
+        self.warning_error_log = self.error_log_from_state('warning')
+        self.total_error_log = [self.critical_error_log, self.warning_error_log]
+        if export_path is not None:
+            self.validation_log(export_path, critical=True, use_state=True)
+            self.validation_log(export_path, critical=False, use_state=True)
+        return self.total_error_log
+
+    @staticmethod
+    def _validation_output(df: pd.DataFrame, data_to_validate: pd.DataFrame, available_columns: List[str],
+                           errors: pd.DataFrame, drop_rows_with_only_errors: bool = True):
+        """
+        Bouwt het validatie-dataframe (met _validate-kolommen en samenvattingsrijen) en het foutenlog op uit de
+        fouten-tabel. Rijen zonder fouten en (standaard) rijen met alleen fouten worden verwijderd.
+        """
+        # Populate the validation columns with error messages (the last message per cell wins)
+        validation_df = data_to_validate.copy()
+        cell_messages = errors.drop_duplicates(subset=['row', 'column'], keep='last')
         for column in available_columns:
-            validation_df[f"{column}_validate"] = ""
-            col_position = validation_df.columns.get_loc(column) + 1
-            validation_df.insert(col_position, f"{column}_validate", validation_df.pop(f"{column}_validate"))
-
-        for error in errors:
-            row = error.row
-            column = error.column
-            error_message = error.message
-            validation_df.at[row, f"{column}_validate"] = error_message
-            error_log.append([row, column, error_message])
+            messages = cell_messages[cell_messages['column'] == column]
+            validate_column = pd.Series("", index=validation_df.index, dtype=object)
+            validate_column.loc[messages['row'].to_numpy()] = messages['message'].to_numpy()
+            validation_df.insert(validation_df.columns.get_loc(column) + 1, f"{column}_validate", validate_column)
 
         # Remove rows without any errors or with all errors - those are not interesting for the user
-        to_delete = []
-        for i in validation_df.index:
-            data = [validation_df[f"{schema_column}_validate"].loc[i] for schema_column in available_columns]
-            if not data or all(item == '' for item in data) or all(
-                    isinstance(item, float) and math.isnan(item) for item in data):
-                to_delete.append(i)
-            elif all(data):
-                to_delete.append(i)
-
-        validation_df = validation_df.drop(index=to_delete)
+        validate_columns = [f"{column}_validate" for column in available_columns]
+        errors_per_row = (validation_df[validate_columns] != "").sum(axis=1)
+        to_delete = errors_per_row == 0
+        if drop_rows_with_only_errors:
+            to_delete |= errors_per_row == len(available_columns)
+        validation_df = validation_df[~to_delete.to_numpy()]
 
-        for error in error_log[:]:
-            if error[0] in to_delete:
-                error_log.remove(error)
+        errors = errors[errors['row'].isin(validation_df.index)]
+        error_log = [[row, column, message] for row, column, message in errors.itertuples(index=False, name=None)]
 
         # Add extra validation summary rows at the top
         summary_row_1 = []
@@ -170,9 +331,7 @@ class Validation:
             summary_row_2.append('')
 
             # Add number of errors
-            summary_row_2.append(validation_df[f"{col}_validate"]
-                                 .apply(lambda x: bool(str(x).strip()) if pd.notna(x) else False)
-                                 .sum())
+            summary_row_2.append(int(validation_column_data.str.strip().astype(bool).sum()))
 
         initial_index = validation_df.index.tolist()
         new_index = ['samenvatting', 'aantal fouten'] + initial_index
@@ -184,9 +343,12 @@ class Validation:
         validation_df.index = new_index
         return validation_df, error_log
 
-    def validation_log(self, export_path: Path, critical: Optional[bool] = True):
-        """ Voert alle validaties uit en genereert een Excel-bestand (logbestand)."""
+    def validation_log(self, export_path: Path, critical: Optional[bool] = True, use_state: bool = False):
+        """ Voert alle validaties uit en genereert een Excel-bestand (logbestand).
+        Met use_state=True wordt de bewaarde uitkomst van de laatste (incrementele) validatie gebruikt."""
         self.critical = critical
+        if not use_state or self.error_table is None:
+            self.validate_rules()
 
         c = 'critical_errors' if self.critical else 'warnings'
 
@@ -196,60 +358,29 @@ class Validation:
         elif export_path.suffix != ".xlsx":
             raise ValueError("Als save_path een bestandspad is, moet het de extensie '.xlsx' bevatten.")
 
-        validation_mapping = {
-            "validate_alg": validate_alg,
-            "validate_kenmerken_boring": validate_kenmerken_boring,
-            "validate_clas": validate_clas,
-            "validate_crs": validate_crs,
-            "validate_samendrukking": validate_samendrukking,
-            "validate_monster": validate_monster,
-            "validate_triaxiaal": validate_triaxiaal,
-            "validate_dss": validate_dss
-        }
-
-        if self.critical:
-            validation_mapping.pop("validate_alg", None)
-
         validation_results = {}
         error_logs = []
 
         try:
-            for func_name, func in validation_mapping.items():
-                validation_df, error_log = func(self)
+            for func_name in self.rules.check_names('critical' if self.critical else 'warning'):
+                validation_df, error_log = self.validate_with_rules(func_name, use_state=True)
                 # Ensure all column names are strings
                 validation_df.columns = validation_df.columns.astype(str)
                 validation_results[func_name] = validation_df
                 self.error_totals.append(f"number of {c} in {func_name} = {len(error_log)}")
                 error_logs.extend(error_log)
 
-            sheet_names_print = []
-            # First write all sheets to Excel
+            # Write and format all sheets in one pass
             with pd.ExcelWriter(str(export_path), engine="xlsxwriter") as writer:
                 for func_name, validation_df in validation_results.items():
                     sheet_name = func_name.upper()
-                    sheet_names_print.append(sheet_name)
                     # Ensure index is also strings when writing
                     validation_df.index = validation_df.index.astype(str)
                     # Set index name if it's empty to prevent Excel warnings
                     if validation_df.index.name is None:
                         validation_df.index.name = 'ID'
-                    validation_df.to_excel(writer, sheet_name=sheet_name, index=True)
-
-            # After the file is completely written and closed, then format each sheet
-            for sheet_name in sheet_names_print:
-                try:
-                    num_rows, num_columns = validation_results[sheet_name.lower()].shape
-                    format_excel_sheet(
-                        file_path=str(export_path),
-                        sheet_name=sheet_name,
-                        num_columns=num_columns,
-                        num_rows=num_rows,
-                        table_name=f'tabel_{sheet_name.lower()}',
-                        index=True
-                    )
-                except Exception as format_error:
-                    print(f"Waarschuwing: Kon sheet {sheet_name} niet formatteren: {str(format_error)}")
-                    # Continue with other sheets even if one fails to format
+                    write_formatted_sheet(writer, validation_df, sheet_name=sheet_name,
+                                          table_name=f'tabel_{sheet_name.lower()}', index=True)
 
         except Exception as e:
             print(f"Er trad een fout op tijdens validatie of het schrijven van Excel: {str(e)}")
@@ -257,11 +388,25 @@ class Validation:
 
         return error_logs
 
-    def validation_export(self, export_path: Path):
-        """Hier worden twee exports gemaakt van de validatie.
-        1 voor de kritieke fouten en 1 voor de waarschuwingen."""
-        self.critical_error_log = self.validation_log(export_path, critical=True)
-        self.warning_error_log = self.validation_log(export_path, critical=False)
+    def validation_export(self, export_path: Path,
+                          log_format: Optional[Literal['xlsx', 'parquet', 'csv', 'html']] = 'xlsx'):
+        """Hier worden de exports gemaakt van de validatie. De hele Dbase wordt opnieuw gevalideerd.
+        Met log_format 'xlsx' worden 2 Excel-logbestanden gemaakt: 1 voor de kritieke fouten en 1 voor de
+        waarschuwingen. Met 'parquet', 'csv' of 'html' wordt de fouttabel (zie errors) in één bestand geschreven,
+        en met None wordt er niets geschreven (de fouten zijn dan via errors op te vragen)."""
+        self.validate_rules()
+        if log_format == 'xlsx':
+            self.critical_error_log = self.validation_log(export_path, critical=True, use_state=True)
+            self.warning_error_log = self.validation_log(export_path, critical=False, use_state=True)
+        else:
+            for severity, c in [('critical', 'critical_errors'), ('warning', 'warnings')]:
+                for check in self.rules.check_names(severity):
+                    self.error_totals.append(f"number of {c} in {check} = "
+                                             f"{len(self._logged_errors(check, severity))}")
+            self.critical_error_log = self.error_log_from_state('critical')
+            self.warning_error_log = self.error_log_from_state('warning')
+            if log_format is not None:
+                self.export_errors(export_path, file_format=log_format)
         self.total_error_log = [self.critical_error_log, self.warning_error_log]
 
     def print_critical_errors(self):
@@ -0,0 +1,55 @@
+from __future__ import annotations
+import pandas as pd
+from pandas import DataFrame
+from pandas_schema import Schema
+from pandas_schema.validation import _SeriesValidation
+
+ERROR_COLUMNS = ['row', 'column', 'message']
+
+
+def failing_mask(validation: _SeriesValidation, series: pd.Series, allow_empty: bool = False) -> pd.Series:
+    """
+    Geeft een boolean-masker terug met True voor iedere cel die niet aan de validatie voldoet.
+
+    Dit is dezelfde logica als pandas_schema gebruikt, maar dan zonder per fout een ValidationWarning te maken.
+    """
+    failing = ~validation.validate(series).astype(bool)
+    if allow_empty:
+        if isinstance(series.dtype, pd.CategoricalDtype) or pd.api.types.is_numeric_dtype(series):
+            failing &= series.notna()
+        else:
+            failing &= series.str.len() > 0
+    return failing
+
+
+def schema_errors(df: DataFrame, schema: Schema) -> DataFrame:
+    """
+    Valideert een dataframe kolomsgewijs met de regels uit een pandas_schema-Schema.
+
+    Parameters
+    ----------
+    df: DataFrame
+        Het te valideren dataframe; kolommen uit het schema die ontbreken worden overgeslagen
+    schema: Schema
+        Schema met per kolom een lijst validaties (bijvoorbeeld InRangeValidation of IsEmptyValidator)
+
+    Returns
+    -------
+    DataFrame
+        Eén rij per fout met de kolommen 'row', 'column' en 'message', in dezelfde volgorde als
+        pandas_schema ze teruggeeft (gesorteerd op rij, daarbinnen in de volgorde van het schema)
+    """
+    frames = []
+    for column in schema.columns:
+        if column.name not in df.columns:
+            continue
+        series = df[column.name]
+        for validation in column.validations:
+            failing = failing_mask(validation, series, allow_empty=column.allow_empty)
+            if failing.any():
+                frames.append(DataFrame({'row': series.index[failing.to_numpy()], 'column': column.name,
+                                         'message': validation.message}))
+    if not frames:
+        return DataFrame(columns=ERROR_COLUMNS)
+    errors = pd.concat(frames, ignore_index=True)
+    return errors.sort_values('row', kind='stable', ignore_index=True)
@@ -0,0 +1,133 @@
+from __future__ import annotations
+import html
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+import pandas as pd
+from pandas import DataFrame
+
+from pv_tool.imports.excel_utils import write_formatted_sheet
+
+# Kolommen van de (sparse) fouttabel: één rij per fout
+ERROR_REPORT_COLUMNS = ['row', 'column', 'rule', 'severity', 'check', 'message']
+REPORT_FORMATS = {'.parquet': 'parquet', '.csv': 'csv', '.html': 'html', '.xlsx': 'xlsx'}
+
+HTML_TEMPLATE = """<!DOCTYPE html>
+<html lang="nl">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+body {{ font-family: Arial, sans-serif; font-size: 13px; margin: 20px; }}
+table {{ border-collapse: collapse; }}
+th, td {{ border: 1px solid #ccc; padding: 3px 8px; text-align: left; }}
+th {{ background: #4472c4; color: white; }}
+tr.critical td {{ background: #fde2e2; }}
+tr.warning td {{ background: #fff4d6; }}
+input {{ width: 95%; font-size: 12px; }}
+</style>
+</head>
+<body>
+<h2>{title}</h2>
+<p>{summary}</p>
+<p>Aantal getoonde fouten: <span id="aantal">{n_errors}</span></p>
+<table id="fouten">
+<thead>
+<tr>{header}</tr>
+<tr>{filters}</tr>
+</thead>
+<tbody>
+{body}
+</tbody>
+</table>
+<script>
+function filterTabel() {{
+  var filters = Array.from(document.querySelectorAll('#fouten input')).map(function (f) {{
+    return f.value.toLowerCase();
+  }});
+  var aantal = 0;
+  document.querySelectorAll('#fouten tbody tr').forEach(function (rij) {{
+    var cellen = rij.children;
+    var tonen = filters.every(function (filter, i) {{
+      return filter === '' || cellen[i].textContent.toLowerCase().indexOf(filter) !== -1;
+    }});
+    rij.style.display = tonen ? '' : 'none';
+    if (tonen) {{ aantal += 1; }}
+  }});
+  document.getElementById('aantal').textContent = aantal;
+}}
+document.querySelectorAll('#fouten input').forEach(function (f) {{ f.addEventListener('input', filterTabel); }});
+</script>
+</body>
+</html>
+"""
+
+
+def error_report_html(errors: DataFrame, title: str = "Validatielog") -> str:
+    """
+    Maakt een zelfstandig HTML-rapport (zonder externe bestanden) van een fouttabel, met een filter per kolom.
+
+    Parameters
+    ----------
+    errors: DataFrame
+        Fouttabel zoals Validation.errors() die teruggeeft
+    title: str
+        Titel van het rapport
+    """
+    columns = list(errors.columns)
+    header = "".join(f"<th>{html.escape(str(col))}</th>" for col in columns)
+    filters = "".join(f'<th><input type="text" placeholder="filter"></th>' for _ in columns)
+    severities = errors['severity'].astype(str) if 'severity' in errors.columns else pd.Series('', index=errors.index)
+    cells = errors.astype(str).map(html.escape) if not errors.empty else errors.astype(str)
+    body = "\n".join(
+        f'<tr class="{severity}">' + "".join(f"<td>{value}</td>" for value in values) + "</tr>"
+        for severity, values in zip(severities, cells.itertuples(index=False, name=None))
+    )
+    counts = errors['severity'].value_counts() if 'severity' in errors.columns else pd.Series(dtype=int)
+    summary = ", ".join(f"{severity}: {count}" for severity, count in counts.items()) or "Geen fouten gevonden."
+    summary += f" (gemaakt op {datetime.now().strftime('%d-%m-%Y %H:%M')})"
+    return HTML_TEMPLATE.format(title=html.escape(title), summary=html.escape(summary), n_errors=len(errors),
+                                header=header, filters=filters, body=body)
+
+
+def write_error_table(errors: DataFrame, export_path: Path, file_format: Optional[str] = None) -> Path:
+    """
+    Schrijft een fouttabel naar Parquet, CSV, HTML of Excel.
+
+    Parameters
+    ----------
+    errors: DataFrame
+        Fouttabel zoals Validation.errors() die teruggeeft
+    export_path: Path
+        Bestandspad; het formaat volgt uit de extensie als file_format niet is opgegeven
+    file_format: str, optional
+        'parquet', 'csv', 'html' of 'xlsx'
+
+    Returns
+    -------
+    Path
+        Het pad van het geschreven bestand
+    """
+    export_path = Path(export_path)
+    if file_format is None:
+        if export_path.suffix.lower() not in REPORT_FORMATS:
+            raise ValueError(f"Onbekend formaat '{export_path.suffix}'. "
+                             f"Kies uit: {', '.join(REPORT_FORMATS)}.")
+        file_format = REPORT_FORMATS[export_path.suffix.lower()]
+    if file_format not in REPORT_FORMATS.values():
+        raise ValueError(f"Onbekend formaat '{file_format}'. Kies uit: {', '.join(REPORT_FORMATS.values())}.")
+
+    errors = errors.astype({'row': str}) if 'row' in errors.columns else errors
+    if file_format == 'parquet':
+        try:
+            errors.to_parquet(export_path, index=False)
+        except ImportError as error:
+            raise ImportError("Voor een Parquet-export is het package 'pyarrow' (of 'fastparquet') nodig.") from error
+    elif file_format == 'csv':
+        errors.to_csv(export_path, index=False)
+    elif file_format == 'html':
+        export_path.write_text(error_report_html(errors, title=f"Validatielog {export_path.stem}"), encoding='utf-8')
+    else:
+        with pd.ExcelWriter(str(export_path), engine="xlsxwriter") as writer:
+            write_formatted_sheet(writer, errors, sheet_name='FOUTEN', table_name='tabel_fouten', index=False)
+    return export_path
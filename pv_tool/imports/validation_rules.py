@@ -0,0 +1,309 @@
+from __future__ import annotations
+import importlib.resources
+import json
+import re
+from pathlib import Path
+from typing import Callable, Optional
+import pandas as pd
+from pandas import DataFrame
+
+from pv_tool.imports.location_check import location_flags
+
+SEVERITIES = ('critical', 'warning')
+RULE_KEYS = {'column', 'check', 'type', 'range', 'required', 'required_if', 'expression', 'increasing', 'location',
+             'polygon', 'group_column', 'severity', 'message'}
+# Kolomnamen in een expressie: tussen backticks (voor namen met ' of %) of als gewone naam
+EXPRESSION_NAMES = re.compile(r"`([^`]+)`|\b([A-Za-z_][A-Za-z0-9_]*)\b")
+
+DEFAULT_RULES_FILE = 'validation_rules.json'
+ERROR_TABLE_COLUMNS = ['row', 'column', 'message', 'check', 'severity', 'rule']
+
+
+class CompiledCheck:
+    """Eén gecompileerde controle: een functie die voor een dataframe een masker met foute cellen teruggeeft."""
+
+    def __init__(self, check: str, column: str, severity: str, message: str,
+                 mask: Callable[..., pd.Series], row_local: bool = True,
+                 shared: Optional[Callable[[DataFrame], DataFrame]] = None):
+        self.check = check
+        self.column = column
+        self.severity = severity
+        self.message = message
+        self.mask = mask
+        # False als de uitkomst van een rij ook van andere rijen afhangt (bijvoorbeeld uitschieters binnen een groep)
+        self.row_local = row_local
+        # Berekening die meerdere controles delen (bijvoorbeeld location_flags): rule_error_table voert die één keer
+        # per dataframe uit en geeft de uitkomst als tweede argument aan mask
+        self.shared = shared
+
+
+class RuleSet:
+    """
+    Set met validatieregels, ingelezen uit een (versiebeheerd) JSON- of YAML-bestand.
+
+    Het bestand bevat een lijst `checks` (naam en categorie per tabblad in het validatielog, in volgorde) en een
+    lijst `rules`. Een regel heeft de velden `check` (naam van het tabblad), `column`, `severity` ('critical' of
+    'warning') en één of meer van `required` (cel mag niet leeg zijn), `type` ('number': cel moet een getal zijn) en
+    `range` ([min, max), zoals InRangeValidation). Met `required_if` geldt de regel alleen voor rijen waarin een andere
+    kolom een bepaalde waarde heeft, bijvoorbeeld {'column': 'ALG__DSS', 'equals': true}. Optioneel vervangt
+    `message` de standaard foutmelding. Bij het laden worden de regels gecompileerd naar kolomsgewijze maskers.
+
+    Voor controles tussen kolommen zijn er twee soorten regels. Een `expression` is een booleaanse expressie over
+    meerdere kolommen (pandas eval, namen met ' of % tussen backticks), bijvoorbeeld
+    'MONSTER_NIVEAU_NAP_VANAF >= MONSTER_NIVEAU_NAP_TOT'; de fout komt in `column` terecht. `increasing` is een lijst
+    kolommen die per rij niet mogen afnemen (bijvoorbeeld de schuifspanning bij oplopende rekniveaus); de fout komt
+    in de kolom waar de waarde afneemt. Rijen waarin een betrokken kolom leeg is worden bij deze regels overgeslagen.
+    Een `location`-regel ([X-kolom, Y-kolom]) controleert of de RD-coördinaten binnen Nederland liggen (of binnen de
+    GeoJSON-polygoon uit `polygon`, een pad relatief ten opzichte van het regelbestand), of X en Y verwisseld lijken
+    en of een monster ver van de rest van zijn proevenverzameling (`group_column`, standaard PV_NAAM) ligt.
+    Een check met `"drop_rows_with_only_errors": false` houdt in het validatielog ook rijen waarin alle kolommen
+    fout zijn.
+    """
+
+    def __init__(self, definition: dict, source: Optional[str] = None):
+        self.source = source
+        self.version = definition.get('version')
+        self.checks: dict[str, str] = {}
+        self.drop_rows_with_only_errors: dict[str, bool] = {}
+        for check in definition.get('checks', []):
+            self.checks[check['name']] = check['category']
+            self.drop_rows_with_only_errors[check['name']] = check.get('drop_rows_with_only_errors', True)
+        self.compiled: list[CompiledCheck] = []
+        for number, rule in enumerate(definition.get('rules', []), start=1):
+            self.compiled.extend(compile_rule(rule, number, self.checks,
+                                              base_dir=Path(source).parent if source is not None else None))
+
+    @classmethod
+    def from_file(cls, path: Optional[str | Path] = None) -> RuleSet:
+        """
+        Leest een regelbestand. Zonder pad worden de standaardregels van de PV-tool gebruikt.
+
+        Parameters
+        ----------
+        path: str of Path, optional
+            Pad naar een .json-, .yaml- of .yml-bestand
+        """
+        if path is None:
+            text = importlib.resources.files('pv_tool.imports').joinpath(DEFAULT_RULES_FILE).read_text(
+                encoding='utf-8')
+            return cls(json.loads(text), source=DEFAULT_RULES_FILE)
+
+        path = Path(path)
+        if not path.exists():
+            raise FileNotFoundError(f"Er is geen regelbestand aanwezig op de locatie {path}.")
+        text = path.read_text(encoding='utf-8')
+        if path.suffix.lower() in ('.yaml', '.yml'):
+            try:
+                import yaml
+            except ImportError as error:
+                raise ImportError("Voor YAML-regelbestanden is het package 'pyyaml' nodig.") from error
+            definition = yaml.safe_load(text)
+        elif path.suffix.lower() == '.json':
+            definition = json.loads(text)
+        else:
+            raise ValueError("Een regelbestand moet de extensie '.json', '.yaml' of '.yml' hebben.")
+        return cls(definition, source=str(path))
+
+    def checks_for(self, check: str, severity: str) -> list[CompiledCheck]:
+        """Geeft de gecompileerde controles van één tabblad en ernst terug, in de volgorde van het bestand."""
+        return [compiled for compiled in self.compiled if compiled.check == check and compiled.severity == severity]
+
+    def check_names(self, severity: str) -> list[str]:
+        """Geeft de namen van de tabbladen die minstens één regel met deze ernst hebben."""
+        return [name for name in self.checks if self.checks_for(name, severity)]
+
+
+def _condition_mask(required_if: dict) -> Callable[[DataFrame], pd.Series]:
+    """Compileert een `required_if`-voorwaarde naar een functie die het masker van de geldende rijen geeft."""
+    column = required_if.get('column')
+    if column is None:
+        raise ValueError("'required_if' moet een 'column' bevatten.")
+
+    if 'equals' in required_if:
+        value = required_if['equals']
+        if isinstance(value, bool):
+            return lambda df: df[column].fillna(False).astype(bool) == value
+        return lambda df: df[column] == value
+    if 'in' in required_if:
+        values = list(required_if['in'])
+        return lambda df: df[column].isin(values)
+    if required_if.get('not_empty'):
+        return lambda df: df[column].ne("") & df[column].notna()
+    raise ValueError("'required_if' moet 'equals', 'in' of 'not_empty' bevatten.")
+
+
+def compile_rule(rule: dict, number: int, checks: dict[str, str],
+                 base_dir: Optional[Path] = None) -> list[CompiledCheck]:
+    """
+    Compileert één regel naar een of meer kolomsgewijze controles (volgorde: required, type, range).
+
+    Parameters
+    ----------
+    rule: dict
+        De regel zoals in het regelbestand
+    number: int
+        Volgnummer van de regel, voor foutmeldingen
+    checks: dict
+        De bekende tabbladen (naam -> categorie)
+    base_dir: Path, optional
+        Map van het regelbestand, voor relatieve paden in `polygon`
+    """
+    unknown = set(rule) - RULE_KEYS
+    if unknown:
+        raise ValueError(f"Regel {number} bevat onbekende velden: {', '.join(sorted(unknown))}")
+    for key in ('check', 'severity') if 'increasing' in rule or 'location' in rule else ('check', 'column', 'severity'):
+        if key not in rule:
+            raise ValueError(f"Regel {number} mist het veld '{key}'.")
+    if rule['check'] not in checks:
+        raise ValueError(f"Regel {number} verwijst naar een onbekende check '{rule['check']}'.")
+    if rule['severity'] not in SEVERITIES:
+        raise ValueError(f"Regel {number} heeft een ongeldige severity '{rule['severity']}'. "
+                         f"Kies uit: {', '.join(SEVERITIES)}.")
+
+    if 'increasing' in rule:
+        return _compile_increasing(rule, number)
+    if 'location' in rule:
+        return _compile_location(rule, number, base_dir)
+
+    column = rule['column']
+    applies = _condition_mask(rule['required_if']) if 'required_if' in rule else None
+
+    def conditional(fails: Callable[[pd.Series], pd.Series]) -> Callable[[DataFrame], pd.Series]:
+        if applies is None:
+            return lambda df: fails(df[column])
+        return lambda df: fails(df[column]) & applies(df)
+
+    compiled = []
+    if rule.get('required'):
+        compiled.append(('required', "This cell is empty",
+                         conditional(lambda series: ~(series.ne("") & series.notna()))))
+    if 'type' in rule:
+        if rule['type'] != 'number':
+            raise ValueError(f"Regel {number} heeft een ongeldig type '{rule['type']}'. Alleen 'number' is mogelijk.")
+        compiled.append(('type', "is not a number",
+                         conditional(lambda series: pd.to_numeric(series, errors='coerce').isna()
+                                     & series.ne("") & series.notna())))
+    if 'range' in rule:
+        low, high = rule['range']
+        low = float('-inf') if low is None else low
+        high = float('inf') if high is None else high
+
+        def out_of_range(series, low=low, high=high):
+            values = pd.to_numeric(series, errors='coerce')
+            return ~((values >= low) & (values < high))
+        compiled.append(('range', f"was not in the range [{low}, {high})", conditional(out_of_range)))
+    if 'expression' in rule:
+        expression = rule['expression']
+        compiled.append(('expression', f"voldoet niet aan '{expression}'",
+                         lambda df: _expression_fails(df, expression) & (applies(df) if applies else True)))
+    if not compiled:
+        raise ValueError(f"Regel {number} bevat geen controle ('required', 'type', 'range', 'expression' of "
+                         f"'increasing').")
+
+    return [CompiledCheck(check=rule['check'], column=column, severity=rule['severity'],
+                          message=rule.get('message', message), mask=mask)
+            for _, message, mask in compiled]
+
+
+def _expression_fails(df: DataFrame, expression: str) -> pd.Series:
+    """Evalueert een expressie over meerdere kolommen; rijen met een lege betrokken kolom gelden als goed."""
+    names = [quoted or plain for quoted, plain in EXPRESSION_NAMES.findall(expression)]
+    columns = [name for name in dict.fromkeys(names) if name in df.columns]
+    values = df[columns].apply(pd.to_numeric, errors='coerce')
+    try:
+        result = values.eval(expression)
+    except (pd.errors.UndefinedVariableError, KeyError, ValueError) as error:
+        print(f"Expressie '{expression}' kan niet worden uitgevoerd en wordt overgeslagen: {error}")
+        return pd.Series(False, index=df.index)
+    complete = values.notna().all(axis=1)
+    return complete & ~result.astype(bool)
+
+
+def _compile_increasing(rule: dict, number: int) -> list[CompiledCheck]:
+    """Compileert een `increasing`-regel naar één controle per kolom (vanaf de tweede kolom)."""
+    columns = list(rule['increasing'])
+    if len(columns) < 2:
+        raise ValueError(f"Regel {number}: 'increasing' moet minstens twee kolommen bevatten.")
+    applies = _condition_mask(rule['required_if']) if 'required_if' in rule else None
+
+    def decreases(df, position):
+        available = [col for col in columns[:position + 1] if col in df.columns]
+        values = df[available].apply(pd.to_numeric, errors='coerce')
+        previous_max = values.iloc[:, :-1].max(axis=1)
+        fails = values.iloc[:, -1] < previous_max
+        return fails & applies(df) if applies is not None else fails
+
+    return [CompiledCheck(check=rule['check'], column=column, severity=rule['severity'],
+                          message=rule.get('message', f"is lager dan bij een kleiner rekniveau ({columns[0]} ...)"),
+                          mask=lambda df, position=position: decreases(df, position))
+            for position, column in enumerate(columns) if position > 0]
+
+
+def _compile_location(rule: dict, number: int, base_dir: Optional[Path] = None) -> list[CompiledCheck]:
+    """Compileert een `location`-regel naar controles op gebied, verwisselde X/Y en uitschieters binnen een groep."""
+    if len(rule['location']) != 2:
+        raise ValueError(f"Regel {number}: 'location' moet precies twee kolommen bevatten (X en Y).")
+    x_column, y_column = rule['location']
+    polygon = rule.get('polygon')
+    if polygon is not None and base_dir is not None and not Path(polygon).is_absolute():
+        polygon = base_dir / polygon
+    group_column = rule.get('group_column', 'PV_NAAM')
+
+    def flags(df):
+        if y_column not in df.columns:
+            return DataFrame(False, index=df.index, columns=['BUITEN_GEBIED', 'XY_VERWISSELD', 'GROEP_UITSCHIETER'])
+        return location_flags(df, x_column=x_column, y_column=y_column, polygon=polygon, group_column=group_column)
+
+    area = "het projectgebied" if polygon is not None else "Nederland"
+    messages = {'BUITEN_GEBIED': f"ligt buiten {area}",
+                'XY_VERWISSELD': f"{x_column} en {y_column} lijken verwisseld",
+                'GROEP_UITSCHIETER': f"ligt ver van de andere monsters met dezelfde {group_column}"}
+    return [CompiledCheck(check=rule['check'], column=x_column, severity=rule['severity'],
+                          message=rule.get('message', message), mask=lambda df, flagged, name=name: flagged[name],
+                          row_local=name != 'GROEP_UITSCHIETER', shared=flags)
+            for name, message in messages.items()]
+
+
+def rule_error_table(df: DataFrame, compiled_checks: list[Optional[CompiledCheck]]) -> DataFrame:
+    """
+    Past gecompileerde controles toe op een dataframe en geeft de fouten per rij en per regel terug. Een gedeelde
+    berekening (CompiledCheck.shared, zoals de locatiecontroles) wordt per aanroep één keer uitgevoerd.
+
+    Returns
+    -------
+    DataFrame
+        Eén rij per fout met de kolommen 'row', 'column', 'message', 'check', 'severity' en 'rule' (de positie van
+        de controle in compiled_checks; een None in compiled_checks wordt overgeslagen), in de volgorde van de regels
+    """
+    frames = []
+    shared_results = {}
+    for position, compiled in enumerate(compiled_checks):
+        if compiled is None or compiled.column not in df.columns:
+            continue
+        if compiled.shared is None:
+            failing = compiled.mask(df).to_numpy(dtype=bool)
+        else:
+            if compiled.shared not in shared_results:
+                shared_results[compiled.shared] = compiled.shared(df)
+            failing = compiled.mask(df, shared_results[compiled.shared]).to_numpy(dtype=bool)
+        if failing.any():
+            frames.append(DataFrame({'row': df.index[failing], 'column': compiled.column,
+                                     'message': compiled.message, 'check': compiled.check,
+                                     'severity': compiled.severity, 'rule': position}))
+    if not frames:
+        return DataFrame(columns=ERROR_TABLE_COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+
+def rule_errors(df: DataFrame, compiled_checks: list[CompiledCheck]) -> DataFrame:
+    """
+    Past gecompileerde controles toe op een dataframe.
+
+    Returns
+    -------
+    DataFrame
+        Eén rij per fout met de kolommen 'row', 'column' en 'message', gesorteerd op rij en daarbinnen in de
+        volgorde van de regels (net als schema_errors)
+    """
+    errors = rule_error_table(df, compiled_checks)
+    return errors.sort_values('row', kind='stable', ignore_index=True)[['row', 'column', 'message']]
@@ -1,14 +1,13 @@
-from typing import TYPE_CHECKING, List
-from pandas import ExcelWriter, concat, DataFrame, read_excel
+from typing import TYPE_CHECKING, List, Optional
+from pandas import ExcelWriter, DataFrame
 from datetime import datetime
-from pv_tool.utilities.utils import get_repo_root
-from openpyxl import load_workbook
 from reportlab.lib.pagesizes import A4, landscape
 from reportlab.lib import colors
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.enums import TA_LEFT
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, LongTable
-from pv_tool.imports.excel_utils import format_excel_sheet
+from pv_tool.imports.excel_utils import write_formatted_sheet
+from pv_tool.imports.results_journal import ResultsJournal, write_result
 import plotly.graph_objects as go
 import numpy as np
 from pathlib import Path
@@ -124,7 +123,7 @@ if TYPE_CHECKING:
 #     return df_updated
 
 
-def add_results_to_template(self: "SHANSEP", path, export_name=None):
+def add_results_to_template(self: "SHANSEP", path, export_name=None, journal: Optional[ResultsJournal] = None):
     """
     Voegt de SHANSEP analyseresultaten toe aan de database Excel-bestand.
 
@@ -136,11 +135,14 @@ def add_results_to_template(self: "SHANSEP", path, export_name=None):
         Pad naar de map waar het Excel-bestand staat
     export_name
         Naam van het Excel-bestand
+    journal: ResultsJournal, optional
+        Als opgegeven wordt de rij verzameld en pas bij journal.flush() (in het bestand van het journal)
+        weggeschreven. Een eerder resultaat voor dezelfde verzameling en instellingen wordt vervangen.
 
     Returns
     -------
     DataFrame
-        Bijgewerkte DataFrame met alle resultaten
+        De toegevoegde resultaatrij
     """
     if export_name is None:
         export_name = "Template_PVtool5_0.xlsx"
@@ -187,45 +189,12 @@ def add_results_to_template(self: "SHANSEP", path, export_name=None):
         'Timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     }
 
-    workbook = load_workbook(file_path)
-
-    if 'Resultaten SHANSEP' in workbook.sheetnames:
-        print('Tabblad resultaten SHANSEP in dbase excel bestaat al en wordt aangevuld')
-        df_existing = read_excel(file_path, sheet_name='Resultaten SHANSEP')
-        # Filter out empty rows and ensure consistent types before concatenation
-        df_existing = df_existing.dropna(how='all')
-        # Ensure column headers are strings
-        df_existing.columns = df_existing.columns.astype(str)
-        new_row_df = DataFrame([new_row], columns=df_existing.columns)
-        df_updated = concat([df_existing, new_row_df], ignore_index=True)
-    else:
-        print('Tabblad resultaten SHANSEP in dbase excel bestaat nog niet en wordt aangemaakt')
-        df_updated = DataFrame([new_row], columns=expected_columns)
-
-    # Ensure all column headers are strings
-    df_updated.columns = df_updated.columns.astype(str)
-
-    if file_path.exists():
-        wb = load_workbook(file_path)
-    else:
-        template_path = Path(get_repo_root()) / "pv_tool" / "templates" / "Template_PVtool5_0.xlsx"
-        wb = load_workbook(template_path)
-
-    if sheet_name in wb.sheetnames:
-        ws = wb[sheet_name]
-        first_empty_row = ws.max_row + 1 if any(
-            ws.iter_rows(min_row=ws.max_row, max_row=ws.max_row, values_only=True)) else ws.max_row
-    else:
-        ws = wb.create_sheet(sheet_name)
-        for col_idx, col_name in enumerate(expected_columns, start=1):
-            ws.cell(row=1, column=col_idx, value=col_name)
-        first_empty_row = 2
-
-    for col_idx, col_name in enumerate(expected_columns, start=1):
-        ws.cell(row=first_empty_row, column=col_idx, value=new_row.get(col_name, ""))
-
-    wb.save(file_path)
-    print(f"Resultaat toegevoegd aan template in tabblad '{sheet_name}'.")
+    # Bestaande rijen voor dezelfde verzameling en instellingen worden vervangen; met een journal wordt de rij
+    # pas bij journal.flush() (samen met de andere rijen) weggeschreven
+    result_df = write_result(file_path, sheet_name, new_row, expected_columns, journal=journal)
+    if journal is None:
+        print(f"Resultaat toegevoegd aan template in tabblad '{sheet_name}'.")
+    return result_df
 
 
 def save_total_to_excel(self: "SHANSEP", path: str):
@@ -277,73 +246,29 @@ def save_total_to_excel(self: "SHANSEP", path: str):
     df_gem.index.name = 'analyse'
     df_kar.index.name = 'analyse'
 
-    # Write all data to Excel
-    with ExcelWriter(file_path, engine='openpyxl') as writer:
+    # Write and format all data in one pass
+    with ExcelWriter(file_path, engine='xlsxwriter') as writer:
         # Main analysis data
         if self.shansep_data_df_oc is not None:
-            self.shansep_data_df_oc.to_excel(writer, sheet_name='Analyse Data OC', index=False)
+            write_formatted_sheet(writer, self.shansep_data_df_oc, sheet_name='Analyse Data OC',
+                                  table_name='AnalyseDataOCTable', index=False)
         if self.shansep_data_df_nc_oc is not None:
-            self.shansep_data_df_nc_oc.to_excel(writer, sheet_name='Analyse Data OC en NC', index=False)
-
-        # Results - clean data before export
-        df_gem_export = df_gem.copy()
-        df_kar_export = df_kar.copy()
+            write_formatted_sheet(writer, self.shansep_data_df_nc_oc, sheet_name='Analyse Data OC en NC',
+                                  table_name='AnalyseDataNC_OCTable', index=False)
 
-        # Replace None values with empty string to avoid Excel issues
-        df_gem_export = df_gem_export.fillna('')
-        df_kar_export = df_kar_export.fillna('')
+        # Results - replace None values with empty string to avoid Excel issues
+        df_gem_export = df_gem.fillna('')
+        df_kar_export = df_kar.fillna('')
 
-        df_gem_export.to_excel(writer, sheet_name='Resultaten Gemiddeld', index=True)
-        df_kar_export.to_excel(writer, sheet_name='Resultaten Karakteristiek', index=True)
+        write_formatted_sheet(writer, df_gem_export, sheet_name='Resultaten Gemiddeld',
+                              table_name='ResultatenGemiddeldTable', index=True)
+        write_formatted_sheet(writer, df_kar_export, sheet_name='Resultaten Karakteristiek',
+                              table_name='ResultatenKarakteristiekTable', index=True)
 
         # Su tabel if available
         if hasattr(self, 'sutabel') and self.sutabel is not None:
-            self.sutabel.to_excel(writer, sheet_name='Su Tabel', index=False)
-
-    # format the sheets
-    if self.shansep_data_df_oc is not None:
-        format_excel_sheet(
-            file_path=file_path,
-            sheet_name='Analyse Data OC',
-            num_columns=self.shansep_data_df_oc.shape[1],
-            num_rows=self.shansep_data_df_oc.shape[0],
-            table_name='AnalyseDataOCTable',
-            index=False
-        )
-    if self.shansep_data_df_nc_oc is not None:
-        format_excel_sheet(
-            file_path=file_path,
-            sheet_name='Analyse Data OC en NC',
-            num_columns=self.shansep_data_df_nc_oc.shape[1],
-            num_rows=self.shansep_data_df_nc_oc.shape[0],
-            table_name='AnalyseDataNC_OCTable',
-            index=False
-        )
-    format_excel_sheet(
-        file_path=file_path,
-        sheet_name='Resultaten Gemiddeld',
-        num_columns=df_gem.shape[1],  # +1 for index
-        num_rows=df_gem.shape[0],
-        table_name='ResultatenGemiddeldTable',
-        index=True
-    )
-    format_excel_sheet(
-        file_path=file_path,
-        sheet_name='Resultaten Karakteristiek',
-        num_columns=df_kar.shape[1],  # +1 for index
-        num_rows=df_kar.shape[0],
-        table_name='ResultatenKarakteristiekTable',
-        index=True
-    )
-    if self.sutabel is not None:
-        format_excel_sheet(
-            file_path=file_path,
-            sheet_name='Su Tabel',
-            num_columns=self.sutabel.shape[1],
-            num_rows=self.sutabel.shape[0],
-            table_name='SuTabelTable',
-            index=False
-        )
+            write_formatted_sheet(writer, self.sutabel, sheet_name='Su Tabel', table_name='SuTabelTable',
+                                  index=False)
 
     print(f"SHANSEP Excel export voltooid: {file_path}")
 
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+from pv_tool.cphi_analysis.analysis_matrix import batched_cphi_results
+from pv_tool.cphi_analysis.bootstrap import batched_statistics
+from pv_tool.cphi_analysis.sensitivity import settings_grid
+from pv_tool.cphi_analysis.sufficient_statistics import t_quantile
+
+if TYPE_CHECKING:
+    from pv_tool.shansep_analysis.shansep_analysis import SHANSEP
+
+# Parameters die standaard in de figuur van de sweep komen
+SENSITIVITY_PARAMETERS = ['S_KAR', 'M_KAR', 'POP_KAR']
+
+
+def _kar_regression(df: DataFrame, x_column: str, y_column: str, alpha: np.ndarray) -> DataFrame:
+    """A1_KAR en A2_KAR van de fit van y_column op x_column voor iedere waarde van alpha."""
+    data = df[[x_column, y_column]].apply(pd.to_numeric, errors='coerce').dropna()
+    # Proeftype 'DSS': de regressie zonder de omrekening van de triaxiaalproef naar tan(phi) en c
+    stats = batched_statistics(data[x_column].to_numpy()[np.newaxis, :], data[y_column].to_numpy()[np.newaxis, :],
+                               'DSS')
+    stats = stats.iloc[np.zeros(len(alpha), dtype=int)].reset_index(drop=True)
+    return batched_cphi_results(stats, alpha, 1.0, 1.0)[['A1_KAR', 'A2_KAR']]
+
+
+def sensitivity_sweep(self: SHANSEP, alpha) -> DataFrame:
+    """
+    Berekent de karakteristieke SHANSEP parameters (S, m en POP) voor een reeks waarden van alpha.
+
+    De regressies worden één keer samengevat in sufficient statistics en daarna voor alle waarden van alpha
+    tegelijk geëvalueerd. De uitkomst is gelijk aan die van get_result_values_shansep met die alpha.
+
+    Parameters
+    ----------
+    self: SHANSEP
+        Uitgevoerde SHANSEP analyse
+    alpha: float of array-like
+        Waarde(n) voor het type verzameling (lokaal = 1.0; regionaal = 0.75)
+
+    Returns
+    -------
+    DataFrame
+        Eén rij per waarde van alpha met de kolommen
+        - ALPHA
+        - SNIJPUNT_KAR en S_KAR: snijpunt en helling van de fit van Su op S'v (OC-proeven)
+        - S_KAR_NC_OC en M_KAR: exp(a1) en a2 van de fit van LN(su/svc) op LN(OCR)
+        - POP_KAR: POP uit snijpunt, S en m (zoals in get_result_values_shansep)
+        - POP_KAR_OPGEGEVEN: karakteristieke waarde van de opgegeven POP van de OC-proeven
+        - S_KAR_NC: karakteristieke S uit de NC-proeven (OCR = 1)
+    """
+    grid = settings_grid(ALPHA=alpha)
+    alpha = grid['ALPHA'].to_numpy()
+    oc = _kar_regression(self.shansep_data_df_oc, 'S\'v', 'Su', alpha)
+    nc_oc = _kar_regression(self.shansep_data_df_nc_oc, 'LN(OCR)', 'LN(su/svc)', alpha)
+
+    # Zoals kar_ln_su_svc_nc en kar_pop_oc: gemiddelde - sd * t(n_oc - 2) * sqrt((1 - alpha) + 1 / n_oc)
+    count_oc = int(self.shansep_data_df_oc['S\'v'].count())
+    spread = t_quantile(1 - 0.1 / 2, count_oc - 2) * np.sqrt((1 - alpha) + 1 / count_oc)
+    nc = self.shansep_data_df_nc_oc[self.shansep_data_df_nc_oc['consolidatietype'] == 'NC']
+    ln_su_svc_nc = pd.to_numeric(nc['LN(su/svc)'], errors='coerce')
+    pop = pd.to_numeric(self.shansep_data_df_oc['POP'], errors='coerce')
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return pd.concat([grid, DataFrame({
+            'SNIJPUNT_KAR': oc['A1_KAR'],
+            'S_KAR': oc['A2_KAR'],
+            'S_KAR_NC_OC': np.exp(nc_oc['A1_KAR']),
+            'M_KAR': nc_oc['A2_KAR'],
+            'POP_KAR': oc['A1_KAR'] / oc['A2_KAR'] / nc_oc['A2_KAR'],
+            'POP_KAR_OPGEGEVEN': pop.mean() - pop.std(ddof=1) * spread,
+            'S_KAR_NC': np.exp(ln_su_svc_nc.mean() - ln_su_svc_nc.std(ddof=1) * spread),
+        })], axis=1)
@@ -1,8 +1,9 @@
 import math
+import numpy as np
 from pv_tool.imports.import_data import Dbase
 from typing import Optional, List, Literal
 from pv_tool.shansep_analysis.globals import (TEXTUAL_NAMES, NEW_COLUMN_NAMES, TEXTUAL_NAMES_DSS)
-from pandas import DataFrame, ExcelWriter, read_excel
+from pandas import DataFrame, ExcelWriter
 import plotly.graph_objects as go
 from pathlib import Path
 from pv_tool.shansep_analysis.calc_parameters import (
@@ -11,7 +12,12 @@ from pv_tool.shansep_analysis.calc_parameters import (
     calc_vgwnat_gem_txt, calc_vgwnat_gem_dss,
     calc_vgwnat_sd_txt, calc_vgwnat_sd_dss
 )
-from pv_tool.imports.excel_utils import format_excel_sheet
+from pv_tool.imports.excel_utils import write_formatted_sheet
+from pv_tool.imports.results_journal import ResultsJournal
+from pv_tool.imports.results_store import get_results_store
+from pv_tool.cphi_analysis.influence import influence_diagnostics, influence_trace
+from pv_tool.cphi_analysis.sensitivity import sensitivity_figure
+from pv_tool.shansep_analysis.sensitivity import SENSITIVITY_PARAMETERS, sensitivity_sweep
 
 from pv_tool.shansep_analysis.visualization_shansep import (
     add_proefresultaten_sv_su,
@@ -166,6 +172,7 @@ class SHANSEP:
         self.figure_sv_su = go.Figure()
         self.figure_ln_ocr_ln_s = go.Figure()
         self.figure_sv_su_nc = go.Figure()
+        self.figure_sensitivity: Optional[go.Figure] = None
         self.show_title: Optional[bool] = True
 
     # ========= Instelling en Data Ophalen Methodes ==========
@@ -227,24 +234,18 @@ class SHANSEP:
         except FileNotFoundError:
             raise FileNotFoundError(f"Er is geen dbase aanwezig op de locatie {file_path}.")
 
-        try:
-            results_df = read_excel(file_path, sheet_name='Resultaten SHANSEP', skiprows=6)
-        except ValueError:
+        # De resultaten worden geïndexeerd en pas opnieuw ingelezen als het bestand is gewijzigd
+        store = get_results_store(file_path)
+        if 'Resultaten SHANSEP' not in store.sheets:
             print("Er is geen tabblad 'Resultaten' aanwezig in het Excel-bestand.")
             return None
 
-        filtered_df = results_df[
-            (results_df['PV_RESULTAAT_ID'].str.contains(self.investigation_groups[0])) &
-            (results_df['PV_RESULTAAT_ID'].str.contains(self.effective_stress)) &
-            (results_df['PV_RESULTAAT_ID'].str.contains(self.analysis_type))
-            ]
-
-        if filtered_df.empty:
+        latest_entry = store.latest('Resultaten SHANSEP', group=self.investigation_groups[0],
+                                    analysis_type=self.analysis_type, effective_stress=self.effective_stress)
+        if latest_entry is None:
             print("Er zijn geen eerdere resultaten gevonden voor de opgegeven parameters.")
             return None
 
-        latest_entry = filtered_df.sort_values(by='Timestamp', ascending=False).iloc[0]
-
         return latest_entry
 
     # ========= Analyse Methodes ==========
@@ -447,6 +448,74 @@ class SHANSEP:
 
         self.get_shansep_parameters()
 
+    def influence_diagnostics(self, fit: Literal['OC', 'NC_OC'] = 'NC_OC',
+                              threshold: Optional[float] = None) -> DataFrame:
+        """
+        Invloed van ieder monster op een van de SHANSEP-fits (leverage, residu, Cook's distance en de parameters
+        zonder dat monster), in gesloten vorm uit de sufficient statistics.
+
+        Parameters
+        ----------
+        fit: str
+            'OC' voor de fit van Su op S'v (alleen OC-proeven) of 'NC_OC' voor de fit van LN(su/svc) op LN(OCR)
+        threshold: float, optioneel
+            Grens voor Cook's distance waarboven een monster invloedrijk heet (standaard 4 / n)
+
+        Returns
+        -------
+        DataFrame
+            Per monster de diagnostiek; bij de NC/OC-fit ook S = exp(a1) en m = a2 zonder dat monster
+        """
+        if self.shansep_data_df_oc is None or self.shansep_data_df_nc_oc is None:
+            self._run_shansep()
+        if fit == 'OC':
+            df, x_column, y_column = self.shansep_data_df_oc, 'S\'v', 'Su'
+        elif fit == 'NC_OC':
+            df, x_column, y_column = self.shansep_data_df_nc_oc, 'LN(OCR)', 'LN(su/svc)'
+        else:
+            raise ValueError(f"Onbekende fit '{fit}'. Kies uit 'OC' of 'NC_OC'.")
+
+        diagnostics = influence_diagnostics(df[x_column], df[y_column], index=df.index, threshold=threshold)
+        if fit == 'NC_OC':
+            diagnostics['S_zonder_monster'] = np.exp(diagnostics['a1_zonder_monster'])
+            diagnostics['m_zonder_monster'] = diagnostics['a2_zonder_monster']
+        return diagnostics
+
+    def sensitivity_sweep(self, alpha) -> DataFrame:
+        """
+        Karakteristieke S, m en POP voor een reeks waarden van alpha, zonder de analyse per waarde opnieuw uit te
+        voeren.
+
+        Parameters
+        ----------
+        alpha: float of array-like
+            Waarde(n) voor het type verzameling, bijvoorbeeld np.linspace(0.75, 1.0, 100)
+
+        Returns
+        -------
+        DataFrame
+            Eén rij per waarde van alpha (zie shansep_analysis.sensitivity.sensitivity_sweep)
+        """
+        self._run_shansep()
+        return sensitivity_sweep(self, alpha)
+
+    def show_sensitivity_figure(self, alpha, parameters: Optional[List] = None):
+        """
+        Toont de gevoeligheidsanalyse voor alpha als small multiples, één deelfiguur per parameter.
+
+        Parameters
+        ----------
+        alpha: array-like
+            Waarden voor het type verzameling
+        parameters: List, optioneel
+            Kolommen uit sensitivity_sweep in de figuur (standaard S_KAR, M_KAR en POP_KAR)
+        """
+        sweep = self.sensitivity_sweep(alpha)
+        parameters = SENSITIVITY_PARAMETERS if parameters is None else parameters
+        self.figure_sensitivity = sensitivity_figure(
+            sweep, parameters, title=f"Gevoeligheidsanalyse {self.analysis_type} {self.effective_stress}")
+        self.figure_sensitivity.show()
+
     # ========= Resultaten Methodes ==========
 
     def get_result_values_shansep(self):
@@ -613,27 +682,10 @@ class SHANSEP:
             df_kar.index.name = 'Analyse'
 
         with ExcelWriter(file_path) as writer:
-            df_gem.to_excel(writer, sheet_name='Gemiddeld', index=True)
-            df_kar.to_excel(writer, sheet_name='Karakteristiek', index=True)
-
-        # Format the Excel sheets
-        format_excel_sheet(
-            file_path=file_path,
-            sheet_name='Gemiddeld',
-            num_columns=len(df_gem.columns),
-            num_rows=len(df_gem),
-            table_name='GemiddeldResultaten',
-            index=True
-        )
-
-        format_excel_sheet(
-            file_path=file_path,
-            sheet_name='Karakteristiek',
-            num_columns=len(df_kar.columns),
-            num_rows=len(df_kar),
-            table_name='KarakteristiekResultaten',
-            index=True
-        )
+            write_formatted_sheet(writer, df_gem, sheet_name='Gemiddeld', table_name='GemiddeldResultaten',
+                                  index=True)
+            write_formatted_sheet(writer, df_kar, sheet_name='Karakteristiek',
+                                  table_name='KarakteristiekResultaten', index=True)
 
     # ========== Handmatige Parameters en wegschrijven ==========
 
@@ -671,15 +723,16 @@ class SHANSEP:
         """
         with ExcelWriter(file_path) as writer:
             if self.shansep_data_df is not None:
-                self.shansep_data_df.to_excel(writer, sheet_name='Shansep Data', index=False)
+                write_formatted_sheet(writer, self.shansep_data_df, sheet_name='Shansep Data', index=False)
             if self.shansep_data_df_oc is not None:
-                self.shansep_data_df_oc.to_excel(writer, sheet_name='Shansep Data OC', index=False)
+                write_formatted_sheet(writer, self.shansep_data_df_oc, sheet_name='Shansep Data OC', index=False)
             if self.shansep_data_df_nc_oc is not None:
-                self.shansep_data_df_nc_oc.to_excel(writer, sheet_name='Shansep Data NC_OC', index=False)
+                write_formatted_sheet(writer, self.shansep_data_df_nc_oc, sheet_name='Shansep Data NC_OC',
+                                      index=False)
 
     # ========== Visualisatie Methodes ==========
 
-    def set_figure_sv_su(self, plot_extra_dataset: Optional[List] = None):
+    def set_figure_sv_su(self, plot_extra_dataset: Optional[List] = None, plot_invloed: bool = False):
         """
         Maakt een visualisatie van de analyseresultaten.
 
@@ -687,6 +740,8 @@ class SHANSEP:
         ----------
         plot_extra_dataset : List, optioneel
             Extra dataset om in de plot weer te geven
+        plot_invloed : bool, optioneel
+            Of de invloedrijke monsters van de OC-fit omcirkeld worden (zie influence_diagnostics)
         """
         self._run_shansep()
         add_proefresultaten_sv_su(self)
@@ -695,6 +750,8 @@ class SHANSEP:
         add_5pr_bovengrens_sv_su(self)
         add_5pr_ondergrens_sv_su(self)
         add_linear_fit_sv_su(self)
+        if plot_invloed:
+            self.figure_sv_su.add_trace(influence_trace(self.influence_diagnostics(fit='OC')))
 
         if self.parameters_handmatig:
             add_fysische_realiseerbare_ondergrens_sv_su(self)
@@ -733,7 +790,7 @@ class SHANSEP:
 
         set_layout_sv_su_nc(self)
 
-    def set_figure_ln_ocr_ln_s(self, plot_extra_dataset: Optional[List] = None):
+    def set_figure_ln_ocr_ln_s(self, plot_extra_dataset: Optional[List] = None, plot_invloed: bool = False):
         """
         Maakt een visualisatie van de analyseresultaten.
 
@@ -741,6 +798,8 @@ class SHANSEP:
         ----------
         plot_extra_dataset : List, optioneel
             Extra dataset om in de plot weer te geven
+        plot_invloed : bool, optioneel
+            Of de invloedrijke monsters van de NC/OC-fit omcirkeld worden (zie influence_diagnostics)
         """
         self._run_shansep()
         add_proefresultaten_ln_ocr_ln_s(self)
@@ -749,13 +808,15 @@ class SHANSEP:
         add_5pr_bovengrens_ln_ocr_ln_s(self)
         add_5pr_ondergrens_ln_ocr_ln_s(self)
         add_linear_fit_ln_ocr_ln_s(self)
+        if plot_invloed:
+            self.figure_ln_ocr_ln_s.add_trace(influence_trace(self.influence_diagnostics(fit='NC_OC')))
 
         if self.parameters_handmatig:
             add_shansep_lijn_ln_ocr_ln_s(self)
 
         set_layout_ln_ocr_ln_s(self)
 
-    def show_figure_sv_su(self, plot_extra_dataset: Optional[List] = None):
+    def show_figure_sv_su(self, plot_extra_dataset: Optional[List] = None, plot_invloed: bool = False):
         """
         Toont de visualisatie van de analyseresultaten.
 
@@ -763,13 +824,15 @@ class SHANSEP:
         ----------
         plot_extra_dataset : List, optioneel
             Extra dataset om in de plot weer te geven
+        plot_invloed : bool, optioneel
+            Of de invloedrijke monsters omcirkeld worden
         """
         self._run_shansep()
         self.figure_sv_su = go.Figure()
-        self.set_figure_sv_su(plot_extra_dataset)
+        self.set_figure_sv_su(plot_extra_dataset, plot_invloed=plot_invloed)
         self.figure_sv_su.show()
 
-    def show_figure_ln_ocr_ln_s(self, plot_extra_dataset: Optional[List] = None):
+    def show_figure_ln_ocr_ln_s(self, plot_extra_dataset: Optional[List] = None, plot_invloed: bool = False):
         """
         Toont de visualisatie van de analyseresultaten.
 
@@ -777,10 +840,12 @@ class SHANSEP:
         ----------
         plot_extra_dataset : List, optioneel
             Extra dataset om in de plot weer te geven
+        plot_invloed : bool, optioneel
+            Of de invloedrijke monsters omcirkeld worden
         """
         self._run_shansep()
         self.figure_ln_ocr_ln_s = go.Figure()
-        self.set_figure_ln_ocr_ln_s(plot_extra_dataset)
+        self.set_figure_ln_ocr_ln_s(plot_extra_dataset, plot_invloed=plot_invloed)
         self.figure_ln_ocr_ln_s.show()
 
     def show_figure_sv_su_nc(self, plot_extra_dataset: Optional[List] = None):
@@ -829,7 +894,8 @@ class SHANSEP:
             self.save_fig_html(fig=fig, path=path, export_name=file_name)
         print(f"Figuren opgeslagen als HTML in : {path}")
 
-    def add_results_to_template(self, path: str, export_name: str = 'Template_PVtool5_0.xlsx'):
+    def add_results_to_template(self, path: str, export_name: str = 'Template_PVtool5_0.xlsx',
+                                journal: Optional[ResultsJournal] = None):
         """
         Voegt de SHANSEP analyseresultaten toe aan het templateExcel-bestand.
 
@@ -839,13 +905,15 @@ class SHANSEP:
             Pad naar de map waar het Excel-bestand staat
         export_name : str, optioneel
             Naam van het Excel-bestand (default: 'Template_PVtool5_0.xlsx')
+        journal : ResultsJournal, optioneel
+            Verzamelt de rij om hem later met andere resultaten in één keer weg te schrijven
 
         Returns
         -------
         DataFrame
-            Bijgewerkte DataFrame met alle resultaten
+            De toegevoegde resultaatrij
         """
-        return _add_results_to_template(self, path, export_name)
+        return _add_results_to_template(self, path, export_name, journal=journal)
 
     def save_total_to_excel(self, path: str):
         """
@@ -6,6 +6,8 @@ from pv_tool.imports.import_data import Dbase
 from pv_tool.utilities.utils import get_repo_root, make_temp_folder
 from pathlib import Path
 from pv_tool.shansep_analysis.shansep_analysis import SHANSEP
+import numpy as np
+import pandas as pd
 
 FILE_PATH = os.path.join(get_repo_root(), "test_files")
 repo_root = get_repo_root()
@@ -167,6 +169,74 @@ def test_shansep_analyse():
     assert True
 
 
+def _make_shansep_dbase(n: int = 30, seed: int = 2) -> Dbase:
+    rng = np.random.default_rng(seed)
+    sv = rng.uniform(20, 200, n)
+    ocr = np.where(np.arange(n) < 10, 1.0, rng.uniform(1.5, 4.0, n))
+    dbase = Dbase()
+    dbase.dbase_df = pd.DataFrame({
+        'ALG__TRIAXIAAL': True, 'ALG__DSS': False, 'PV_NAAM': 'klei', 'ALG__REGEL': np.arange(n),
+        'ANA_TXT_MAX_VERTICALE_CONSOLIDATIE_SPANNING': sv,
+        'TXT_SS_T_15%': 0.3 * sv * ocr ** 0.8 * np.exp(rng.normal(0, 0.08, n)),
+        'ANA_TXT_CONSOLIDATIE_TYPE_REKEN': np.where(ocr == 1.0, 'NC', 'OC'), 'OCR_TXT': ocr,
+        'ANA_TERREINSPANNING': sv / ocr,
+        'TXT_SS_WATERGEHALTE_VOOR': rng.uniform(20, 60, n), 'TXT_SS_VOLUMEGEWICHT_NAT': rng.uniform(14, 18, n),
+    }, index=pd.Index([f'{i}_B1_1' for i in range(n)], name='ALG__BORING_MONSTERNR_ID'))
+    return dbase
+
+
+def test_sensitivity_sweep():
+    analyse = SHANSEP(_make_shansep_dbase(), 'TXT_S_POP', ['klei'], '15% rek')
+    sweep = analyse.sensitivity_sweep(np.linspace(0.75, 1.0, 100))
+    assert len(sweep) == 100
+
+    # Iedere rij is gelijk aan een volledige analyse met die alpha
+    for alpha in [0.75, 1.0]:
+        single = SHANSEP(_make_shansep_dbase(), 'TXT_S_POP', ['klei'], '15% rek')
+        single.apply_settings(alpha=alpha)
+        single.get_result_values_shansep()
+        row = sweep[np.isclose(sweep['ALPHA'], alpha)].iloc[0]
+        assert np.isclose(row['S_KAR'], single.a2_kar_oc, rtol=1e-9)
+        assert np.isclose(row['M_KAR'], single.a2_kar_nc_oc, rtol=1e-9)
+        assert np.isclose(row['S_KAR_NC_OC'], single.exp_a1_kar_nc_oc, rtol=1e-9)
+        assert np.isclose(row['POP_KAR'], single.inschatting_pop_kar, rtol=1e-9)
+        assert np.isclose(row['POP_KAR_OPGEGEVEN'], single.pop_kar_oc, rtol=1e-9)
+        assert np.isclose(row['S_KAR_NC'], single.exp_kar_ln_su_svc_nc, rtol=1e-9)
+
+
+def test_influence_diagnostics():
+    analyse = SHANSEP(_make_shansep_dbase(), 'TXT_S_POP', ['klei'], '15% rek')
+    fits = [('OC', lambda: analyse.shansep_data_df_oc, 'S\'v', 'Su', 20),
+            ('NC_OC', lambda: analyse.shansep_data_df_nc_oc, 'LN(OCR)', 'LN(su/svc)', 30)]
+    for fit, data, x_column, y_column, n in fits:
+        diagnostics = analyse.influence_diagnostics(fit=fit)
+        x = data()[x_column].to_numpy(dtype=float)
+        y = data()[y_column].to_numpy(dtype=float)
+        assert len(diagnostics) == n and list(diagnostics.index) == list(data().index)
+
+        # Gesloten vorm gelijk aan n losse fits zonder het betreffende monster
+        for i in range(n):
+            keep = np.arange(n) != i
+            slope, intercept = np.polyfit(x[keep], y[keep], 1)
+            assert np.isclose(diagnostics['a2_zonder_monster'].iloc[i], slope, rtol=1e-9), (fit, i)
+            assert np.isclose(diagnostics['a1_zonder_monster'].iloc[i], intercept, rtol=1e-9), (fit, i)
+            if fit == 'NC_OC':
+                assert np.isclose(diagnostics['S_zonder_monster'].iloc[i], np.exp(intercept), rtol=1e-9)
+                assert np.isclose(diagnostics['m_zonder_monster'].iloc[i], slope, rtol=1e-9)
+        assert np.isclose(diagnostics['leverage'].sum(), 2)
+
+    analyse.set_figure_sv_su(plot_invloed=True)
+    assert analyse.figure_sv_su.data[-1].name.startswith('Invloedrijk')
+    analyse.set_figure_ln_ocr_ln_s(plot_invloed=True)
+    assert analyse.figure_ln_ocr_ln_s.data[-1].name.startswith('Invloedrijk')
+
+    try:
+        analyse.influence_diagnostics(fit='NC')
+        raise AssertionError("Verwacht een ValueError voor een onbekende fit")
+    except ValueError:
+        pass
+
+
 class TestShansepAnalyse(unittest.TestCase):
     """Unit test klasse voor SHANSEP analyse methoden."""
 
@@ -174,6 +244,12 @@ class TestShansepAnalyse(unittest.TestCase):
         """Test de volledige SHANSEP analyse workflow."""
         test_shansep_analyse()
 
+    def test_sensitivity_sweep(self):
+        test_sensitivity_sweep()
+
+    def test_influence_diagnostics(self):
+        test_influence_diagnostics()
+
 
 if __name__ == '__main__':
     unittest.main()
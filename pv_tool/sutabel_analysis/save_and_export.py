@@ -5,17 +5,18 @@ Deze module bevat functies voor het opslaan en exporteren van sutabel-m analyser
 naar Excel en PDF-formaat.
 """
 
-from typing import TYPE_CHECKING, List
-from pandas import ExcelWriter, concat, DataFrame, read_excel
+from typing import TYPE_CHECKING, List, Optional
+from pandas import ExcelWriter, concat, DataFrame
 from datetime import datetime
-from pv_tool.utilities.utils import get_repo_root
 from openpyxl import load_workbook
 from reportlab.lib.pagesizes import A4, landscape
 from reportlab.lib import colors
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.enums import TA_LEFT
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, LongTable, PageBreak
-from pv_tool.imports.excel_utils import format_excel_sheet
+from pv_tool.imports.excel_reader import read_excel
+from pv_tool.imports.excel_utils import write_formatted_sheet
+from pv_tool.imports.results_journal import ResultsJournal, read_results_sheet, write_result
 import plotly.graph_objects as go
 from pathlib import Path
 
@@ -113,25 +114,16 @@ def add_sutabel_results_to_dbase(self: "SUTABEL", path: str, file_name: str = 'T
     # Ensure all column headers are strings
     df_updated.columns = df_updated.columns.astype(str)
 
-    # Write data to Excel
+    # Write and format the sheet in one pass
     with ExcelWriter(file_path, mode='a', engine='openpyxl', if_sheet_exists='replace') as writer:
-        df_updated.to_excel(writer, sheet_name='Resultaten SU-tabel - m', index=False)
-
-    # Format the Excel sheet
-    format_excel_sheet(
-        file_path=file_path,
-        sheet_name='Resultaten SU-tabel - m',
-        num_columns=df_updated.shape[1],
-        num_rows=df_updated.shape[0],
-        table_name='ResultatenSUTabelMTable',
-        index=False
-    )
+        write_formatted_sheet(writer, df_updated, sheet_name='Resultaten SU-tabel - m',
+                              table_name='ResultatenSUTabelMTable', index=False)
 
     print(f"Sutabel resultaten toegevoegd aan database: {file_path}")
     return df_updated
 
 
-def add_results_to_template(self: "SUTABEL", path, export_name=None):
+def add_results_to_template(self: "SUTABEL", path, export_name=None, journal: Optional[ResultsJournal] = None):
     """
     Voegt de sutabel-m analyseresultaten toe aan de database Excel-bestand.
 
@@ -143,11 +135,15 @@ def add_results_to_template(self: "SUTABEL", path, export_name=None):
         Pad naar de map waar het Excel-bestand staat
     export_name
         Naam van het Excel-bestand
+    journal: ResultsJournal, optional
+        Als opgegeven wordt de rij verzameld en pas bij journal.flush() (in het bestand van het journal)
+        weggeschreven. Een eerder resultaat voor dezelfde verzameling en instellingen wordt vervangen.
 
     Returns
     -------
     DataFrame
-        Bijgewerkte DataFrame met alle resultaten
+        Bijgewerkte DataFrame met alle resultaten in het tabblad; met een journal de in het journal gezette rij,
+        omdat het tabblad dan pas bij journal.flush() wordt bijgewerkt
     """
     if export_name is None:
         export_name = "Template_PVtool5_0.xlsx"
@@ -243,44 +239,13 @@ def add_results_to_template(self: "SUTABEL", path, export_name=None):
                                          3) if self.sutabel_grafiek is not None else None
     }
 
-    workbook = load_workbook(file_path)
-
-    if 'Resultaten SU-tabel - m' in workbook.sheetnames:
-        print('Tabblad Resultaten SU-tabel - m in dbase excel bestaat al en wordt aangevuld')
-        df_existing = read_excel(file_path, sheet_name='Resultaten SU-tabel - m')
-        df_existing = df_existing.dropna(how='all')
-        df_existing.columns = df_existing.columns.astype(str)
-        new_row_df = DataFrame([new_row], columns=df_existing.columns)
-        df_updated = concat([df_existing, new_row_df], ignore_index=True)
-    else:
-        print('Tabblad Resultaten SU-tabel - m in dbase excel bestaat nog niet en wordt aangemaakt')
-        df_updated = DataFrame([new_row], columns=expected_columns)
-
-    # Ensure all column headers are strings
-    df_updated.columns = df_updated.columns.astype(str)
-
-    if file_path.exists():
-        wb = load_workbook(file_path)
-    else:
-        template_path = Path(get_repo_root()) / "pv_tool" / "templates" / "Template_PVtool5_0.xlsx"
-        wb = load_workbook(template_path)
-
-    if sheet_name in wb.sheetnames:
-        ws = wb[sheet_name]
-        first_empty_row = ws.max_row + 1 if any(
-            ws.iter_rows(min_row=ws.max_row, max_row=ws.max_row, values_only=True)) else ws.max_row
-    else:
-        ws = wb.create_sheet(sheet_name)
-        for col_idx, col_name in enumerate(expected_columns, start=1):
-            ws.cell(row=1, column=col_idx, value=col_name)
-        first_empty_row = 2
-
-    for col_idx, col_name in enumerate(expected_columns, start=1):
-        ws.cell(row=first_empty_row, column=col_idx, value=new_row.get(col_name, ""))
-
-    wb.save(file_path)
+    # Bestaande rijen voor dezelfde verzameling en instellingen worden vervangen; met een journal wordt de rij
+    # pas bij journal.flush() (samen met de andere rijen) weggeschreven
+    result_df = write_result(file_path, sheet_name, new_row, expected_columns, journal=journal)
+    if journal is not None:
+        return result_df
     print(f"Resultaat toegevoegd aan template in tabblad '{sheet_name}'.")
-    return df_updated
+    return read_results_sheet(file_path, sheet_name)
 
 
 def _create_sutabel_input_table(self: "SUTABEL") -> Table:
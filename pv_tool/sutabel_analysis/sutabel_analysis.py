@@ -7,10 +7,15 @@ om de ongedraineerde schuifsterkte te bepalen.
 """
 
 import math
+import numpy as np
 from pv_tool.imports.import_data import Dbase
 from typing import Optional, List, Literal
 from pv_tool.shansep_analysis.globals import (TEXTUAL_NAMES, NEW_COLUMN_NAMES, TEXTUAL_NAMES_DSS)
 from pandas import DataFrame, ExcelWriter
+from pv_tool.imports.excel_utils import write_formatted_sheet
+from pv_tool.imports.results_journal import ResultsJournal
+from pv_tool.imports.results_store import get_results_store
+from pv_tool.cphi_analysis.influence import influence_diagnostics, influence_trace
 import plotly.graph_objects as go
 from pathlib import Path
 from pv_tool.shansep_analysis.calc_parameters import (
@@ -19,7 +24,6 @@ from pv_tool.shansep_analysis.calc_parameters import (
     calc_vgwnat_gem_txt, calc_vgwnat_gem_dss,
     calc_vgwnat_sd_txt, calc_vgwnat_sd_dss
 )
-from pandas import read_excel
 from scipy.stats import lognorm
 
 
@@ -200,24 +204,18 @@ class SUTABEL:
         except FileNotFoundError:
             raise FileNotFoundError(f"Er is geen dbase aanwezig op de locatie {file_path}.")
 
-        try:
-            results_df = read_excel(file_path, sheet_name='Resultaten SU-tabel-m', skiprows=6)
-        except ValueError:
+        # De resultaten worden geïndexeerd en pas opnieuw ingelezen als het bestand is gewijzigd
+        store = get_results_store(file_path)
+        if 'Resultaten SU-tabel-m' not in store.sheets:
             print("Er is geen tabblad 'Resultaten' aanwezig in het Excel-bestand.")
             return None
 
-        filtered_df = results_df[
-            (results_df['PV_RESULTAAT_ID'].str.contains(self.investigation_groups[0])) &
-            (results_df['PV_RESULTAAT_ID'].str.contains(self.effective_stress)) &
-            (results_df['PV_RESULTAAT_ID'].str.contains(self.analysis_type))
-            ]
-
-        if filtered_df.empty:
+        latest_entry = store.latest('Resultaten SU-tabel-m', group=self.investigation_groups[0],
+                                    analysis_type=self.analysis_type, effective_stress=self.effective_stress)
+        if latest_entry is None:
             print("Er zijn geen eerdere resultaten gevonden voor de opgegeven parameters.")
             return None
 
-        latest_entry = filtered_df.sort_values(by='Timestamp', ascending=False).iloc[0]
-
         return latest_entry
 
     def expand_analysis_df_sutabel(self):
@@ -356,6 +354,29 @@ class SUTABEL:
         self.expand_analysis_df_sutabel()
         self.get_sutabel_parameters()
 
+    def influence_diagnostics(self, threshold: Optional[float] = None) -> DataFrame:
+        """
+        Invloed van ieder OC-monster op de fit van ln(su) op ln(s'v) (leverage, residu, Cook's distance en de
+        parameters zonder dat monster), in gesloten vorm uit de sufficient statistics.
+
+        Parameters
+        ----------
+        threshold : float, optioneel
+            Grens voor Cook's distance waarboven een monster invloedrijk heet (standaard 4 / n)
+
+        Returns
+        -------
+        DataFrame
+            Per monster de diagnostiek, met daarnaast svgm = exp(a1) en m = 1 - a2 zonder dat monster
+        """
+        if self.sutabel_data_df is None:
+            self._run_sutabel()
+        diagnostics = influence_diagnostics(self.sutabel_data_df['ln(s\'v)'], self.sutabel_data_df['ln(su)'],
+                                            index=self.sutabel_data_df.index, threshold=threshold)
+        diagnostics['svgm_zonder_monster'] = np.exp(diagnostics['a1_zonder_monster'])
+        diagnostics['m_zonder_monster'] = 1 - diagnostics['a2_zonder_monster']
+        return diagnostics
+
     # ========== Handmatige Parameters en wegschrijven ==========
 
     def set_manual_parameters(self,
@@ -496,17 +517,18 @@ class SUTABEL:
         """
         with ExcelWriter(file_path) as writer:
             if self.sutabel_data_df is not None:
-                self.sutabel_data_df.to_excel(writer, sheet_name='Data', index=False)
+                write_formatted_sheet(writer, self.sutabel_data_df, sheet_name='Data', index=False)
             if self.sutabel_filtered_data_df is not None:
-                self.sutabel_filtered_data_df.to_excel(writer, sheet_name='Sutabel Filtered Data', index=False)
+                write_formatted_sheet(writer, self.sutabel_filtered_data_df, sheet_name='Sutabel Filtered Data',
+                                      index=False)
             if self.sutabel_grafiek is not None:
-                self.sutabel_grafiek.to_excel(writer, sheet_name='Sutabel Grafiek', index=False)
+                write_formatted_sheet(writer, self.sutabel_grafiek, sheet_name='Sutabel Grafiek', index=False)
             if self.su_fit_constante_vc is not None:
-                self.su_fit_constante_vc.to_excel(writer, sheet_name='vc Fit', index=False)
+                write_formatted_sheet(writer, self.su_fit_constante_vc, sheet_name='vc Fit', index=False)
 
     # ========== Visualisatie Methodes ==========
 
-    def set_figure_ln_sv_ln_su_sutabel(self, plot_extra_dataset: Optional[List] = None):
+    def set_figure_ln_sv_ln_su_sutabel(self, plot_extra_dataset: Optional[List] = None, plot_invloed: bool = False):
         """
         Maakt een visualisatie van de sutabel analyseresultaten voor ln(s'v) vs ln(su).
 
@@ -515,6 +537,7 @@ class SUTABEL:
         - Lineaire fit
         - 5% boven- en ondergrens
         - Fysische realiseerbare ondergrens (gebaseerd op a1_kar en a2_kar)
+        - Optioneel (plot_invloed) de invloedrijke monsters volgens Cook's distance
 
         De analyse wordt automatisch uitgevoerd als deze nog niet is gedaan.
         """
@@ -539,16 +562,18 @@ class SUTABEL:
         add_5pr_bovengrens_ln_sv_ln_su_sutabel(self)
         add_5pr_ondergrens_ln_sv_ln_su_sutabel(self)
         add_fysische_realiseerbare_ondergrens_ln_sv_ln_su_sutabel(self)
+        if plot_invloed:
+            self.figure_ln_sv_ln_su.add_trace(influence_trace(self.influence_diagnostics()))
         set_layout_ln_sv_ln_su_sutabel(self)
 
-    def show_figure_ln_sv_ln_su_sutabel(self, plot_extra_dataset: Optional[List] = None):
+    def show_figure_ln_sv_ln_su_sutabel(self, plot_extra_dataset: Optional[List] = None, plot_invloed: bool = False):
         """
         Toont de visualisatie van de sutabel analyseresultaten voor ln(s'v) vs ln(su).
 
         De analyse wordt automatisch uitgevoerd als deze nog niet is gedaan.
         """
         self.figure_ln_sv_ln_su = go.Figure()
-        self.set_figure_ln_sv_ln_su_sutabel(plot_extra_dataset)
+        self.set_figure_ln_sv_ln_su_sutabel(plot_extra_dataset, plot_invloed=plot_invloed)
         self.figure_ln_sv_ln_su.show()
 
     def set_figure_sv_su_sutabel(self, plot_extra_dataset: Optional[List] = None):
@@ -638,7 +663,8 @@ class SUTABEL:
             self.save_fig_html(fig=fig, path=path, export_name=file_name)
         print(f"Figuren opgeslagen als HTML in: {path}")
 
-    def add_results_to_template(self, path: str, export_name: str = 'Template_PVtool5_0.xlsx'):
+    def add_results_to_template(self, path: str, export_name: str = 'Template_PVtool5_0.xlsx',
+                                journal: Optional[ResultsJournal] = None):
         """
         Voegt de sutabel-m analyseresultaten toe aan het templateExcel-bestand.
 
@@ -650,11 +676,13 @@ class SUTABEL:
             Pad naar de map waar het Excel-bestand staat
         export_name: str
             Naam van het Excel-bestand
+        journal: ResultsJournal, optioneel
+            Verzamelt de rij om hem later met andere resultaten in één keer weg te schrijven
 
         Returns
         -------
         DataFrame
-            Bijgewerkte DataFrame met alle resultaten
+            Bijgewerkte DataFrame met alle resultaten in het tabblad; met een journal de in het journal gezette rij
         """
         # Voer analyse uit als nog niet gedaan
         if self.sutabel_data_df is None or self.e_a1_sutabel is None:
@@ -664,7 +692,7 @@ class SUTABEL:
                 self.get_sutabel_parameters()
 
         from pv_tool.sutabel_analysis.save_and_export import add_results_to_template
-        return add_results_to_template(self, path, export_name)
+        return add_results_to_template(self, path, export_name, journal=journal)
 
     def save_to_pdf(self, path: str, vc_fit_kar: float = None) -> str:
         """
@@ -5,6 +5,8 @@ from pv_tool.utilities.utils import get_repo_root, make_temp_folder
 from pathlib import Path
 from pv_tool.sutabel_analysis.sutabel_analysis import SUTABEL
 from typing import Literal
+import numpy as np
+import pandas as pd
 
 FILE_PATH = os.path.join(get_repo_root(), "test_files")
 repo_root = get_repo_root()
@@ -114,6 +116,45 @@ def test_sutabel_analyse():
     assert True
 
 
+def _make_sutabel_dbase(n: int = 30, seed: int = 2) -> Dbase:
+    rng = np.random.default_rng(seed)
+    sv = rng.uniform(20, 200, n)
+    ocr = np.where(np.arange(n) < 10, 1.0, rng.uniform(1.5, 4.0, n))
+    dbase = Dbase()
+    dbase.dbase_df = pd.DataFrame({
+        'ALG__TRIAXIAAL': True, 'ALG__DSS': False, 'PV_NAAM': 'klei', 'ALG__REGEL': np.arange(n),
+        'ANA_TXT_MAX_VERTICALE_CONSOLIDATIE_SPANNING': sv,
+        'TXT_SS_T_15%': 0.3 * sv * ocr ** 0.8 * np.exp(rng.normal(0, 0.08, n)),
+        'ANA_TXT_CONSOLIDATIE_TYPE_REKEN': np.where(ocr == 1.0, 'NC', 'OC'), 'OCR_TXT': ocr,
+        'ANA_TERREINSPANNING': sv / ocr,
+        'TXT_SS_WATERGEHALTE_VOOR': rng.uniform(20, 60, n), 'TXT_SS_VOLUMEGEWICHT_NAT': rng.uniform(14, 18, n),
+    }, index=pd.Index([f'{i}_B1_1' for i in range(n)], name='ALG__BORING_MONSTERNR_ID'))
+    return dbase
+
+
+def test_influence_diagnostics():
+    analyse = SUTABEL(dbase=_make_sutabel_dbase(), investigation_groups=['klei'], effective_stress='15% rek',
+                      analysis_type='TXT_su_tabel')
+    diagnostics = analyse.influence_diagnostics()
+    ln_sv = analyse.sutabel_data_df['ln(s\'v)'].to_numpy(dtype=float)
+    ln_su = analyse.sutabel_data_df['ln(su)'].to_numpy(dtype=float)
+    n = len(ln_sv)
+    assert n == 20 and len(diagnostics) == n
+
+    # Gesloten vorm gelijk aan n losse fits van ln(su) op ln(s'v) zonder het betreffende monster
+    for i in range(n):
+        keep = np.arange(n) != i
+        slope, intercept = np.polyfit(ln_sv[keep], ln_su[keep], 1)
+        assert np.isclose(diagnostics['a2_zonder_monster'].iloc[i], slope, rtol=1e-9)
+        assert np.isclose(diagnostics['a1_zonder_monster'].iloc[i], intercept, rtol=1e-9)
+        assert np.isclose(diagnostics['svgm_zonder_monster'].iloc[i], np.exp(intercept), rtol=1e-9)
+        assert np.isclose(diagnostics['m_zonder_monster'].iloc[i], 1 - slope, rtol=1e-9)
+    assert np.isclose(diagnostics['leverage'].sum(), 2)
+
+    analyse.set_figure_ln_sv_ln_su_sutabel(plot_invloed=True)
+    assert analyse.figure_ln_sv_ln_su.data[-1].name.startswith('Invloedrijk')
+
+
 class TestSutabelAnalyse(unittest.TestCase):
     """Unit test klasse voor SUTABEL analyse methoden."""
 
@@ -121,6 +162,9 @@ class TestSutabelAnalyse(unittest.TestCase):
         """Test de volledige SUTABEL analyse workflow."""
         test_sutabel_analyse()
 
+    def test_influence_diagnostics(self):
+        test_influence_diagnostics()
+
 
 if __name__ == '__main__':
     unittest.main()
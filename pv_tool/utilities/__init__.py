@@ -5,11 +5,13 @@ Deze module bevat algemene utility functies en widget functionaliteit
 voor de PV-tool applicatie.
 
 Modules:
-    utils: Algemene utility functies voor bestandsbeheer en git operaties
+    utils: Algemene utility functies voor bestandsbeheer
+    resources: Meegeleverde templates en assets (via importlib.resources, met cache)
     widget_functions: Widget functies voor interactieve Jupyter notebook gebruik
 """
 
 from pv_tool.utilities.utils import get_repo_root, make_temp_folder
+from pv_tool.utilities.resources import template_bytes, load_template, copy_template
 
 # Note: widget_functions imports are available but not exposed here to avoid circular imports
 # Import directly from pv_tool.utilities.widget_functions when needed
@@ -17,4 +19,7 @@ from pv_tool.utilities.utils import get_repo_root, make_temp_folder
 __all__ = [
     'get_repo_root',
     'make_temp_folder',
+    'template_bytes',
+    'load_template',
+    'copy_template',
 ]
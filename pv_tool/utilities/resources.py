@@ -0,0 +1,77 @@
+"""
+Meegeleverde bestanden (templates en andere assets) van de PV-tool.
+
+Alle bestanden worden via importlib.resources opgezocht, zodat dit ook werkt buiten een git-checkout en in een
+geïnstalleerd (wheel) of bevroren pakket. De inhoud van een template wordt één keer gelezen en in het geheugen
+bewaard; iedere export krijgt een eigen kopie van die bytes.
+"""
+
+from __future__ import annotations
+import importlib.resources
+from functools import lru_cache
+from io import BytesIO
+from pathlib import Path
+from openpyxl import load_workbook
+from openpyxl.workbook import Workbook
+
+TEMPLATE_PACKAGE = 'pv_tool.templates'
+DEFAULT_TEMPLATE = 'Template_PVtool5_0.xlsx'
+
+
+@lru_cache(maxsize=None)
+def resource_bytes(package: str, name: str) -> bytes:
+    """
+    Geeft de inhoud van een meegeleverd bestand (één keer gelezen per proces).
+
+    Parameters
+    ----------
+    package: str
+        Package waarin het bestand staat, bijvoorbeeld 'pv_tool.templates'
+    name: str
+        Bestandsnaam binnen het package
+    """
+    resource = importlib.resources.files(package).joinpath(name)
+    if not resource.is_file():
+        raise FileNotFoundError(f"Het bestand '{name}' is niet aanwezig in {package}.")
+    return resource.read_bytes()
+
+
+def template_bytes(name: str = DEFAULT_TEMPLATE) -> bytes:
+    """Geeft de inhoud van een meegeleverde Excel-template."""
+    return resource_bytes(TEMPLATE_PACKAGE, name)
+
+
+def load_template(name: str = DEFAULT_TEMPLATE, **kwargs) -> Workbook:
+    """
+    Opent een nieuwe kopie van een meegeleverde template vanuit het geheugen.
+
+    Parameters
+    ----------
+    name: str
+        Bestandsnaam van de template
+    **kwargs
+        Worden doorgegeven aan openpyxl.load_workbook
+    """
+    return load_workbook(BytesIO(template_bytes(name)), **kwargs)
+
+
+def copy_template(destination: str | Path, name: str = DEFAULT_TEMPLATE) -> Path:
+    """
+    Schrijft een lege template naar een bestand.
+
+    Parameters
+    ----------
+    destination: str of Path
+        Het bestand dat wordt aangemaakt (of overschreven)
+    name: str
+        Bestandsnaam van de template
+
+    Returns
+    -------
+    Path
+        Het pad van het geschreven bestand
+    """
+    destination = Path(destination)
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    destination.write_bytes(template_bytes(name))
+    return destination
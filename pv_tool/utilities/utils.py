@@ -1,43 +1,28 @@
 import os
-
-os.environ["GIT_PYTHON_REFRESH"] = "quiet"
-import git  # TODO: git gaat nu fout als je werkt met conda
+from pathlib import Path
 from typing import Optional
 import datetime
 
+# Directory containing the pv_tool package; used when no repository can be found
+PACKAGE_PARENT = Path(__file__).resolve().parents[2]
 
-def get_repo_root(root_search_dir: Optional[str] = None) -> str:
-    """Returns the repository root by searching in the given directory and its subdirectories.
-
-    :param root_search_dir: The given directory in which it will search for the repository root. It will also
-        search in the subdirectories of this given directory. If not provided (i.e. None) then function will use
-        os.getcwd().
-    :return:
-    """
 
-    # Determine search directory
-    if root_search_dir is None:
-        root_search_dir = os.getcwd()
-
-    # Initial search at that directory
-    try:
-        repo = git.Repo(root_search_dir, search_parent_directories=False)
-        return repo.working_tree_dir
-    except git.InvalidGitRepositoryError:
-        pass
+def get_repo_root(root_search_dir: Optional[str] = None) -> str:
+    """Returns the repository root by searching the given directory and its parent directories for a '.git' entry.
 
-    # After that subdirectories
-    for subdir, dirs, files in os.walk(os.getcwd()):
-        for directory in dirs:
-            try:
-                repo = git.Repo(os.path.join(subdir, directory), search_parent_directories=False)
-                return repo.working_tree_dir
-            except git.InvalidGitRepositoryError:
-                continue
+    No git installation is needed and the working directory is not walked, so the lookup is cheap. Bundled files
+    (templates, assets) should not be located with this function; use pv_tool.utilities.resources instead.
 
-    # Last resort: search parent directories
-    repo = git.Repo(root_search_dir, search_parent_directories=True)
-    return repo.working_tree_dir
+    :param root_search_dir: The directory from which the search starts. If not provided (i.e. None) then function
+        will use os.getcwd().
+    :return: The repository root, or the directory containing the pv_tool package if no repository is found (for
+        example in an installed or frozen package).
+    """
+    search_dir = Path(root_search_dir if root_search_dir is not None else os.getcwd()).resolve()
+    for directory in (search_dir, *search_dir.parents):
+        if (directory / '.git').exists():
+            return str(directory)
+    return str(PACKAGE_PARENT)
 
 
 def make_temp_folder(parent_folder: Optional[str] = None, add_microseconds: bool = False) -> str:
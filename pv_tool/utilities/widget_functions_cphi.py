@@ -212,15 +212,34 @@ def process_export(dbase, export_dir, filename=None):
     display(Markdown(f"**DataFrame geëxporteerd naar:** `{out_path}`"))
 
 
-def maak_verzamelings_lijsten(dbase_df):
+def maak_verzamelings_lijsten(dbase_df, catalog=None):
     """
-    Genereert lijsten met unieke verzamelnamen voor TXT en DSS.
+    Genereert lijsten met unieke verzamelnamen voor TXT en DSS; monsters zonder PV_NAAM (leeg of ontbrekend) tellen
+    niet mee.
+    Als de GroupCatalog van deze dbase_df wordt meegegeven, worden de lijsten uit de catalogus gehaald. Een catalogus
+    die verouderd is (dbase_df aangepast zonder Dbase.refresh_rows) wordt eerst opnieuw opgebouwd.
     """
-    pv_txt_lijst = ['geen'] + dbase_df.loc[dbase_df['ALG__TRIAXIAAL'], 'PV_NAAM'].dropna().unique().tolist()
-    pv_dss_lijst = ['geen'] + dbase_df.loc[dbase_df['ALG__DSS'], 'PV_NAAM'].dropna().unique().tolist()
+    if catalog is not None and catalog.dbase.dbase_df is dbase_df:
+        if catalog.is_stale():
+            catalog.build()
+        if not catalog.catalog_df.empty:
+            return ['geen'] + catalog.groups('TXT'), ['geen'] + catalog.groups('DSS')
+    lijsten = []
+    for vlag in ['ALG__TRIAXIAAL', 'ALG__DSS']:
+        pv_naam = dbase_df.loc[dbase_df[vlag], 'PV_NAAM']
+        lijsten.append(['geen'] + pv_naam[pv_naam.notna() & (pv_naam != '')].unique().tolist())
+    pv_txt_lijst, pv_dss_lijst = lijsten
     return pv_txt_lijst, pv_dss_lijst
 
 
+def toon_verzamelingen_overzicht(dbase, test_type=None):
+    """Toont per proevenverzameling het aantal proeven, het dieptebereik, het aantal boringen en of er resultaten zijn."""
+    if dbase.catalog.catalog_df.empty:
+        dbase.catalog.build()
+    display(Markdown("**Overzicht proevenverzamelingen:**"))
+    display(dbase.catalog.overview(test_type=test_type))
+
+
 def maak_proef_widgets(pv_txt_lijst, pv_dss_lijst):
     """Maakt de widgets voor de proefkeuze, rekpercentage en verzamelingen"""
     # Dropdowns
@@ -325,7 +344,7 @@ def toon_widgets(
 def dropdown_widgets(dbase):
     # Lijsten aanmaken
     dbase_df = dbase.dbase_df
-    PV_txt_lijst, PV_dss_lijst = maak_verzamelings_lijsten(dbase_df)
+    PV_txt_lijst, PV_dss_lijst = maak_verzamelings_lijsten(dbase_df, catalog=dbase.catalog)
 
     # Widgets aanmaken
     (dropdown_type_proef, dropdown_rekpercentage_txt, dropdown_rekpercentage_dss,
@@ -73,7 +73,7 @@ def toon_widgets_shansep(
 
 def dropdown_widgets_shansep(dbase):
     dbase_df = dbase.dbase_df
-    PV_txt_lijst, PV_dss_lijst = maak_verzamelings_lijsten(dbase_df)
+    PV_txt_lijst, PV_dss_lijst = maak_verzamelings_lijsten(dbase_df, catalog=dbase.catalog)
 
     # Widgets aanmaken
     (dropdown_type_proef_shansep, dropdown_rekpercentage_txt_shansep, dropdown_rekpercentage_dss_shansep,
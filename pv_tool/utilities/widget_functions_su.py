@@ -72,7 +72,7 @@ def toon_widgets_su(
 
 def dropdown_widgets_su(dbase):
     dbase_df = dbase.dbase_df
-    PV_txt_lijst, PV_dss_lijst = maak_verzamelings_lijsten(dbase_df)
+    PV_txt_lijst, PV_dss_lijst = maak_verzamelings_lijsten(dbase_df, catalog=dbase.catalog)
 
     # Widgets aanmaken
     (dropdown_type_proef_su, dropdown_rekpercentage_txt_su, dropdown_rekpercentage_dss_su,